@@ -10,6 +10,8 @@ import { useState, useEffect, useCallback } from "react";
 import { collection, addDoc, getDocs, doc, deleteDoc, updateDoc } from "firebase/firestore";
 import { db } from "@/lib/firebase";
 import { useAuth } from "@/lib/firebase-provider";
+import { fetchDataFile } from "@/lib/data-files";
+import { loadFacetIndex, matchFacets, facetItemNames, type FacetIndex } from "@/lib/facets";
 import { 
   HelpDialog, 
   HelpDialogContent, 
@@ -83,6 +85,8 @@ export default function DailyPlanPage() {
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedJobs, setSelectedJobs] = useState<Set<string>>(new Set());
   const [availableJobs, setAvailableJobs] = useState<string[]>([]);
+  const [selectedLevels, setSelectedLevels] = useState<Set<string>>(new Set());
+  const [facetIndex, setFacetIndex] = useState<FacetIndex | null>(null);
   const [selectedResources, setSelectedResources] = useState<Set<string>>(new Set());
   const [loading, setLoading] = useState(true);
   const [itemsLoading, setItemsLoading] = useState(true);
@@ -147,17 +151,22 @@ export default function DailyPlanPage() {
   // Extraire tous les métiers disponibles depuis les recettes de craft
   const extractAvailableJobs = useCallback(() => {
     const jobsSet = new Set<string>();
-    Object.values(craftRecipes).forEach(recipe => {
-      if (recipe.has_recipe && recipe.job) {
-        jobsSet.add(recipe.job);
-      }
-    });
+    if (facetIndex) {
+      // Noms de métier normalisés par facet_index.py ("AlchimisteNiveau" et "Alchimiste" fusionnés)
+      Object.keys(facetIndex.facets.recipe_job || {}).forEach(job => jobsSet.add(job));
+    } else {
+      Object.values(craftRecipes).forEach(recipe => {
+        if (recipe.has_recipe && recipe.job) {
+          jobsSet.add(recipe.job);
+        }
+      });
+    }
     const jobsArray = Array.from(jobsSet).sort();
     setAvailableJobs(jobsArray);
     
     // Sélectionner tous les métiers par défaut
     setSelectedJobs(new Set(jobsArray));
-  }, [craftRecipes]);
+  }, [craftRecipes, facetIndex]);
 
   // Charger les données de craft
   const loadCraftRecipes = useCallback(async () => {
@@ -178,7 +187,7 @@ export default function DailyPlanPage() {
         });
         setCraftRecipes(guestCraftData);
       } else {
-        const response = await fetch('/data/craft.json');
+        const response = await fetchDataFile('craft.json');
         const craftData = await response.json();
         setCraftRecipes(craftData);
       }
@@ -505,6 +514,7 @@ export default function DailyPlanPage() {
     loadCraftRecipes();
     loadFavorites();
     loadAllItemsComplete();
+    loadFacetIndex().then(setFacetIndex);
   }, [loadCraftRecipes, loadFavorites, loadAllItemsComplete]);
 
   useEffect(() => {
@@ -529,31 +539,38 @@ export default function DailyPlanPage() {
       return;
     }
 
-    const filtered = allItems.filter(item => {
-      const recipe = craftRecipes[item.nom];
-      if (!recipe || !recipe.has_recipe || !recipe.job) {
-        return false;
-      }
-
-      // Vérifier que le métier de l'item est dans la sélection
-      if (selectedJobs.size > 0 && !selectedJobs.has(recipe.job)) {
-        return false;
-      }
+    let candidates: Item[];
+    if (facetIndex) {
+      // Recette, métiers et tranches de niveau résolus par ET de bitsets précalculés, puis un seul passage
+      const selection = matchFacets(facetIndex, {
+        craftable: ['true'],
+        recipe_job: Array.from(selectedJobs),
+        level: Array.from(selectedLevels),
+      });
+      const allowed = selection ? facetItemNames(facetIndex, selection) : new Set<string>();
+      candidates = allItems.filter(item => allowed.has(item.nom));
+    } else {
+      candidates = allItems.filter(item => {
+        const recipe = craftRecipes[item.nom];
+        if (!recipe || !recipe.has_recipe || !recipe.job) {
+          return false;
+        }
 
-      // Vérifier le terme de recherche
-      if (searchTerm.trim() !== "") {
-        return (
-          item.nom.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          item.type.toLowerCase().includes(searchTerm.toLowerCase()) ||
-          item.category.toLowerCase().includes(searchTerm.toLowerCase())
-        );
-      }
+        // Vérifier que le métier de l'item est dans la sélection
+        return selectedJobs.size === 0 || selectedJobs.has(recipe.job);
+      });
+    }
 
-      return true;
-    });
+    // Vérifier le terme de recherche
+    const searchTermLower = searchTerm.trim().toLowerCase();
+    const filtered = searchTermLower === "" ? candidates : candidates.filter(item => (
+      item.nom.toLowerCase().includes(searchTermLower) ||
+      item.type.toLowerCase().includes(searchTermLower) ||
+      item.category.toLowerCase().includes(searchTermLower)
+    ));
     
     setFilteredItems(filtered);
-  }, [allItems, searchTerm, craftRecipes, selectedJobs]);
+  }, [allItems, searchTerm, craftRecipes, selectedJobs, selectedLevels, facetIndex]);
 
   useEffect(() => {
     calculateResourceRequirements();
@@ -572,6 +589,19 @@ export default function DailyPlanPage() {
     });
   };
 
+  // Toggle la sélection d'une tranche de niveau (aucune sélection = tous niveaux)
+  const toggleLevelSelection = (level: string) => {
+    setSelectedLevels(prev => {
+      const newSet = new Set(prev);
+      if (newSet.has(level)) {
+        newSet.delete(level);
+      } else {
+        newSet.add(level);
+      }
+      return newSet;
+    });
+  };
+
   // Sélectionner tous les métiers
   const selectAllJobs = () => {
     setSelectedJobs(new Set(availableJobs));
@@ -704,6 +734,28 @@ export default function DailyPlanPage() {
                 ))}
               </div>
             </div>
+
+            {/* Filtre par tranche de niveau (index de facettes uniquement) */}
+            {facetIndex && (
+              <div className="mb-4">
+                <label className="text-sm font-medium mb-2 block">Filtrer par niveau</label>
+                <div className="flex flex-wrap gap-2">
+                  {Object.keys(facetIndex.facets.level || {})
+                    .sort((a, b) => parseInt(a) - parseInt(b))
+                    .map((level) => (
+                      <Button
+                        key={level}
+                        variant="outline"
+                        size="sm"
+                        onClick={() => toggleLevelSelection(level)}
+                        className={`text-xs ${selectedLevels.has(level) ? "bg-primary text-primary-foreground hover:bg-primary/90 hover:text-primary-foreground" : "bg-secondary text-secondary-foreground hover:bg-secondary/90 hover:text-secondary-foreground"}`}
+                      >
+                        {level}
+                      </Button>
+                    ))}
+                </div>
+              </div>
+            )}
             
             {/* Sélecteur de taille de lot pour faciliter l'ajout */}
             <div>
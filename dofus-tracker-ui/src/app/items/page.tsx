@@ -15,6 +15,7 @@ import { HelpDialogComponent } from "@/components/ui/help-dialog";
 import { GuestAuthDialog } from "@/components/ui/guest-auth-dialog";
 import { GUEST_FAVORITES } from "@/lib/guest-data";
 import { loadJobs, loadJobsItemsMapping, getItemsForJob, loadAllItemsFromJson, type Job, type JobItemMapping, type ItemDetail } from "@/lib/jobs-utils";
+import { loadFacetIndex, matchFacets, facetItemNames, type FacetIndex } from "@/lib/facets";
 
 interface Item {
   category: string;
@@ -54,6 +55,7 @@ export default function ItemsPage() {
   // Jobs states
   const [jobs, setJobs] = useState<Job[]>([]);
   const [jobsItemsMapping, setJobsItemsMapping] = useState<JobItemMapping>({});
+  const [facetIndex, setFacetIndex] = useState<FacetIndex | null>(null);
 
   const categories = [
     { id: "armes", name: "Armes" },
@@ -236,18 +238,32 @@ export default function ItemsPage() {
 
   const filterItems = useCallback(() => {
     let filtered = allItems;
+    const jobActive = jobFilterEnabled && selectedJob;
+
+    if (facetIndex) {
+      // Catégorie, type et métier résolus par ET de bitsets précalculés, puis un seul passage sur les items
+      const selection = matchFacets(facetIndex, {
+        category: selectedCategory ? [selectedCategory] : [],
+        type: selectedType ? [selectedType] : [],
+        job: jobActive ? [selectedJob] : [],
+      });
+      if (selection) {
+        const allowed = facetItemNames(facetIndex, selection);
+        filtered = filtered.filter(item => allowed.has(item.nom));
+      }
+    } else {
+      if (selectedCategory) {
+        filtered = filtered.filter(item => item.category === selectedCategory);
+      }
 
-    if (selectedCategory) {
-      filtered = filtered.filter(item => item.category === selectedCategory);
-    }
-
-    if (selectedType) {
-      filtered = filtered.filter(item => item.type === selectedType);
-    }
+      if (selectedType) {
+        filtered = filtered.filter(item => item.type === selectedType);
+      }
 
-    if (jobFilterEnabled && selectedJob) {
-      const jobItems = getItemsForJob(selectedJob, jobsItemsMapping);
-      filtered = filtered.filter(item => jobItems.includes(item.nom));
+      if (jobActive) {
+        const jobItems = new Set(getItemsForJob(selectedJob, jobsItemsMapping));
+        filtered = filtered.filter(item => jobItems.has(item.nom));
+      }
     }
 
     if (searchTerm) {
@@ -269,7 +285,7 @@ export default function ItemsPage() {
     }
 
     setFilteredItems(filtered);
-  }, [allItems, searchTerm, selectedCategory, selectedType, selectedJob, favoriteFilter, favoriteItems, jobsItemsMapping]);
+  }, [allItems, searchTerm, selectedCategory, selectedType, selectedJob, jobFilterEnabled, favoriteFilter, favoriteItems, jobsItemsMapping, facetIndex]);
 
   const loadMoreItems = () => {
     setItemsToShow(prev => prev + 100);
@@ -278,6 +294,7 @@ export default function ItemsPage() {
   useEffect(() => {
     loadAllItems();
     loadJobsData();
+    loadFacetIndex().then(setFacetIndex);
     if (user) {
       loadFavorites();
     }
@@ -287,7 +304,7 @@ export default function ItemsPage() {
   useEffect(() => {
     filterItems();
   // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [allItems, searchTerm, selectedCategory, selectedType, selectedJob, jobFilterEnabled, favoriteFilter, favoriteItems, jobsItemsMapping]); // Retrait de filterItems pour éviter la boucle infinie
+  }, [allItems, searchTerm, selectedCategory, selectedType, selectedJob, jobFilterEnabled, favoriteFilter, favoriteItems, jobsItemsMapping, facetIndex]); // Retrait de filterItems pour éviter la boucle infinie
 
   useEffect(() => {
     // Mettre à jour les items affichés quand les items filtrés changent
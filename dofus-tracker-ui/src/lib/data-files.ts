@@ -0,0 +1,29 @@
+// Résolution des fichiers de données publiés par touch_database/publish_ui.py
+
+interface DataManifest {
+  created: string;
+  files: Record<string, { file: string; sha256: string }>;
+}
+
+let manifestPromise: Promise<DataManifest | null> | null = null;
+
+function loadManifest(): Promise<DataManifest | null> {
+  if (!manifestPromise) {
+    // Le manifest est le seul fichier non immuable : toujours revalidé
+    manifestPromise = fetch('/data/manifest.json', { cache: 'no-cache' })
+      .then((response) => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  return manifestPromise;
+}
+
+export async function dataFileUrl(name: string): Promise<string> {
+  const manifest = await loadManifest();
+  const entry = manifest?.files[name];
+  // Sans manifest (environnement de dev non publié), on retombe sur le nom fixe
+  return entry ? `/data/${entry.file}` : `/data/${name}`;
+}
+
+export async function fetchDataFile(name: string): Promise<Response> {
+  return fetch(await dataFileUrl(name));
+}
@@ -0,0 +1,107 @@
+import { fetchDataFile } from '@/lib/data-files';
+
+// Index de facettes construit par touch_database/facet_index.py :
+// une posting list en bitset (base64, bit i = octet i >> 3, bit i & 7) par valeur de facette
+
+export type FacetName = 'category' | 'type' | 'level' | 'job' | 'recipe_job' | 'craftable';
+export type FacetFilters = Partial<Record<FacetName, string[]>>;
+
+export interface FacetIndex {
+  size: number;
+  items: string[];
+  facets: Record<string, Record<string, Uint8Array>>;
+}
+
+let facetIndexPromise: Promise<FacetIndex | null> | null = null;
+
+function decodeBitset(encoded: string): Uint8Array {
+  const binary = atob(encoded);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  return bytes;
+}
+
+export function loadFacetIndex(): Promise<FacetIndex | null> {
+  if (!facetIndexPromise) {
+    facetIndexPromise = fetchDataFile('facets.json')
+      .then((response) => (response.ok ? response.json() : null))
+      .then((data) => {
+        if (!data) return null;
+        const facets: FacetIndex['facets'] = {};
+        for (const [facet, values] of Object.entries(data.facets as Record<string, Record<string, string>>)) {
+          facets[facet] = {};
+          for (const [value, encoded] of Object.entries(values)) {
+            facets[facet][value] = decodeBitset(encoded);
+          }
+        }
+        return { size: data.size, items: data.items, facets };
+      })
+      // Index absent : les pages retombent sur le filtrage Array.filter
+      .catch(() => null);
+  }
+  return facetIndexPromise;
+}
+
+// OU entre les valeurs d'une facette, ET entre facettes ; null si aucun filtre actif
+export function matchFacets(index: FacetIndex, filters: FacetFilters): Uint8Array | null {
+  let selection: Uint8Array | null = null;
+  for (const [facet, values] of Object.entries(filters)) {
+    if (!values || values.length === 0) continue;
+    const union = new Uint8Array((index.size + 7) >> 3);
+    for (const value of values) {
+      const bitset = index.facets[facet]?.[value];
+      if (!bitset) continue;
+      for (let i = 0; i < union.length; i++) union[i] |= bitset[i];
+    }
+    if (selection) {
+      for (let i = 0; i < selection.length; i++) selection[i] &= union[i];
+    } else {
+      selection = union;
+    }
+  }
+  return selection;
+}
+
+export function facetItemNames(index: FacetIndex, selection: Uint8Array): Set<string> {
+  const names = new Set<string>();
+  for (let byte = 0; byte < selection.length; byte++) {
+    let bits = selection[byte];
+    while (bits) {
+      const bit = 31 - Math.clz32(bits & -bits);
+      names.add(index.items[(byte << 3) + bit]);
+      bits &= bits - 1;
+    }
+  }
+  return names;
+}
+
+export function countBits(selection: Uint8Array): number {
+  let count = 0;
+  for (let i = 0; i < selection.length; i++) {
+    let bits = selection[i];
+    while (bits) {
+      bits &= bits - 1;
+      count++;
+    }
+  }
+  return count;
+}
+
+// Comptes par valeur d'une facette sous les filtres des autres facettes
+export function facetCounts(index: FacetIndex, filters: FacetFilters, facet: FacetName): Record<string, number> {
+  const others = { ...filters, [facet]: undefined };
+  const selection = matchFacets(index, others);
+  const counts: Record<string, number> = {};
+  for (const [value, bitset] of Object.entries(index.facets[facet] || {})) {
+    if (!selection) {
+      counts[value] = countBits(bitset);
+      continue;
+    }
+    const intersection = new Uint8Array(bitset.length);
+    for (let i = 0; i < bitset.length; i++) intersection[i] = bitset[i] & selection[i];
+    counts[value] = countBits(intersection);
+  }
+  return counts;
+}
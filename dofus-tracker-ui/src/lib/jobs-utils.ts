@@ -1,3 +1,5 @@
+import { fetchDataFile } from '@/lib/data-files';
+
 export interface Job {
   job_id: number;
   job_name: string;
@@ -21,7 +23,7 @@ export async function loadJobs(): Promise<Job[]> {
   }
 
   try {
-    const response = await fetch('/data/images.json');
+    const response = await fetchDataFile('images.json');
     const imagesData = await response.json();
     
     const jobsImages = imagesData.jobs || {};
@@ -52,7 +54,7 @@ export async function loadJobsItemsMapping(): Promise<JobItemMapping> {
   }
 
   try {
-    const response = await fetch('/data/jobs_map.json');
+    const response = await fetchDataFile('jobs_map.json');
     const jobsMap: JobItemMapping = await response.json();
     
     jobsMapCache = jobsMap;
@@ -103,8 +105,8 @@ export async function loadAllItemsFromJson(): Promise<ItemDetail[]> {
   try {
     // Charger les données des items et des images en parallèle
     const [itemsResponse, imagesResponse] = await Promise.all([
-      fetch('/data/items_details.json'),
-      fetch('/data/images.json')
+      fetchDataFile('items_details.json'),
+      fetchDataFile('images.json')
     ]);
     
     const itemsData = await itemsResponse.json();
@@ -0,0 +1,355 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+from craft_graph import CraftGraph
+from craft_solver import CraftSolver
+from item_registry import ItemRegistry
+from item_table import ItemTable
+from monster_index import ELEMENTS, MonsterIndex
+from search_index import KINDS, SearchIndex
+from zone_index import ZoneIndex
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+
+DEFAULT_CACHE_SIZE = 2048
+GZIP_MIN_SIZE = 512
+MAX_SEARCH_LIMIT = 50
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Dataset:
+    # Tout est chargé une fois au démarrage ; les tables binaires restent en mmap
+    def __init__(self):
+        self.items = ItemTable()
+        self.graph = CraftGraph()
+        self.solver = CraftSolver(self.graph)
+        self.registry = ItemRegistry.load()
+        self.search_index = SearchIndex.load()
+        self.zones = ZoneIndex.load()
+        self.monsters = MonsterIndex()
+        with (JSON_DIR / "craft_by_id.json").open(encoding="utf-8") as file:
+            self.craft_by_id = json.load(file)
+        with (JSON_DIR / "jobs_map_by_id.json").open(encoding="utf-8") as file:
+            jobs_map_by_id = json.load(file)
+        self.job_names = {job_id: name for name, job_id in self.registry.job_ids.items()}
+        # Index inverse item -> métiers : remplace le parcours de toutes les listes côté client
+        self.item_jobs: dict[int, list[int]] = {}
+        for job_id, item_ids in jobs_map_by_id.items():
+            for item_id in item_ids:
+                self.item_jobs.setdefault(item_id, []).append(int(job_id))
+
+    def item(self, item_id: int) -> dict:
+        record = self.items.get(item_id)
+        if record is None:
+            raise ApiError(404, f"Item inconnu: {item_id}")
+        item = record.as_dict()
+        item["image_id"] = self.registry.image_ids[self.registry.row(item_id)]
+        return item
+
+    def item_ref(self, item_id: int, **extra) -> dict:
+        record = self.items.get(item_id)
+        return {"id": item_id, "name": record.name if record else None, **extra}
+
+    def find_item(self, name: str) -> dict:
+        record = self.items.find(name)
+        item_id = record.id if record else self.registry.resolve(name)
+        if item_id is None:
+            raise ApiError(404, f"Item inconnu: {name}")
+        return self.item(item_id)
+
+    def recipe(self, item_id: int) -> dict:
+        recipe = self.craft_by_id.get(str(item_id))
+        if recipe is None or not recipe["has_recipe"]:
+            raise ApiError(404, f"Pas de recette pour l'item {item_id}")
+        return {
+            "item": self.item_ref(item_id),
+            "job_id": recipe["job_id"],
+            "job": self.job_names.get(recipe["job_id"]) or recipe.get("job"),
+            "job_level": recipe["job_level"],
+            "ingredients": [
+                self.item_ref(ingredient_id, quantity=quantity)
+                for ingredient_id, quantity in zip(recipe["ingredient_ids"], recipe["quantities"])
+            ],
+        }
+
+    def bom(self, item_id: int, quantity: int) -> dict:
+        self.item(item_id)
+        materials = self.graph.bom({item_id: quantity})
+        return {
+            "item": self.item_ref(item_id, quantity=quantity),
+            "materials": [
+                self.item_ref(material_id, quantity=amount)
+                for material_id, amount in sorted(materials.items(), key=lambda entry: -entry[1])
+            ],
+        }
+
+    def where_used(self, item_id: int) -> dict:
+        self.item(item_id)
+        uses = self.graph.where_used(item_id)
+        return {"item": self.item_ref(item_id), "used_in": [self.item_ref(crafted_id, quantity=amount) for crafted_id, amount in uses.items()]}
+
+    def drops(self, item_id: int, level: int | None) -> dict:
+        self.item(item_id)
+        monster_rows, probabilities = self.zones.item_drop_slice(item_id)
+        monsters = [
+            {
+                "monster_id": int(self.zones.monster_ids[row]),
+                "name": self.zones.monster_names[row],
+                "level": int(self.zones.monster_levels[row]),
+                "probability": float(probability),
+            }
+            for row, probability in zip(monster_rows, probabilities)
+            if level is None or self.zones.monster_levels[row] <= level
+        ]
+        monsters.sort(key=lambda monster: -monster["probability"])
+        return {
+            "item": self.item_ref(item_id),
+            "monsters": monsters,
+            "best_zones": self.zones.best_zones_for_resource(item_id, level=level),
+        }
+
+    def craftable(self, inventory: dict[int, int], intermediate: bool) -> dict:
+        for item_id in inventory:
+            self.item(item_id)
+        counts = self.solver.craftable(inventory, intermediate=intermediate)
+        return {
+            "intermediate": intermediate,
+            "recipes": [
+                self.item_ref(item_id, count=count) for item_id, count in sorted(counts.items(), key=lambda entry: -entry[1])
+            ],
+        }
+
+    def jobs_for_item(self, item_id: int) -> dict:
+        return {
+            "item": self.item_ref(item_id),
+            "jobs": [{"id": job_id, "name": self.job_names.get(job_id)} for job_id in self.item_jobs.get(item_id, [])],
+        }
+
+
+def int_param(query: dict[str, list[str]], name: str, default: int | None = None, minimum: int | None = None) -> int | None:
+    values = query.get(name)
+    if not values:
+        return default
+    if not values[0].lstrip("-").isdigit():
+        raise ApiError(400, f"Paramètre {name} invalide: {values[0]}")
+    value = int(values[0])
+    if minimum is not None and value < minimum:
+        raise ApiError(400, f"Paramètre {name} invalide: {value} (minimum {minimum})")
+    return value
+
+
+def limit_param(query: dict[str, list[str]], default: int = 10) -> int:
+    # limit négatif : argpartition(values, -5)[:-5] renverrait presque tous les monstres
+    return min(int_param(query, "limit", default, minimum=1), MAX_SEARCH_LIMIT)
+
+
+def float_param(query: dict[str, list[str]], name: str, default: float = 0.0) -> float:
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return float(values[0])
+    except ValueError:
+        raise ApiError(400, f"Paramètre {name} invalide: {values[0]}")
+
+
+def inventory_param(query: dict[str, list[str]]) -> dict[int, int]:
+    # inventory=ID:quantité,ID:quantité
+    inventory: dict[int, int] = {}
+    for entry in ",".join(query.get("inventory", [])).split(","):
+        if not entry:
+            continue
+        item_id, _, quantity = entry.partition(":")
+        if not item_id.isdigit() or not quantity.isdigit():
+            raise ApiError(400, f"Entrée d'inventaire invalide: {entry}")
+        inventory[int(item_id)] = inventory.get(int(item_id), 0) + int(quantity)
+    return inventory
+
+
+ROUTES = [
+    (re.compile(r"^/items/(\d+)$"), lambda data, item_id, query: data.item(item_id)),
+    (re.compile(r"^/items/(\d+)/jobs$"), lambda data, item_id, query: data.jobs_for_item(item_id)),
+    (re.compile(r"^/recipes/(\d+)$"), lambda data, item_id, query: data.recipe(item_id)),
+    (re.compile(r"^/bom/(\d+)$"), lambda data, item_id, query: data.bom(item_id, int_param(query, "quantity", 1, minimum=1))),
+    (re.compile(r"^/where-used/(\d+)$"), lambda data, item_id, query: data.where_used(item_id)),
+    (re.compile(r"^/drops/(\d+)$"), lambda data, item_id, query: data.drops(item_id, int_param(query, "level"))),
+]
+
+
+def route(data: Dataset, path: str, query: dict[str, list[str]]) -> dict | list:
+    for pattern, handler in ROUTES:
+        match = pattern.match(path)
+        if match:
+            return handler(data, int(match.group(1)), query)
+    if path == "/items":
+        if "name" not in query:
+            raise ApiError(400, "Paramètre name requis")
+        return data.find_item(query["name"][0])
+    if path == "/search":
+        kind = query.get("kind", [None])[0]
+        if kind is not None and kind not in KINDS:
+            raise ApiError(400, f"Paramètre kind invalide: {kind}")
+        limit = limit_param(query)
+        return data.search_index.search(query.get("q", [""])[0], limit=limit, kind=kind)
+    if path == "/monsters/weakest":
+        element = query.get("element", [None])[0]
+        if element not in ELEMENTS:
+            raise ApiError(400, f"Paramètre element invalide: {element} (choix: {', '.join(ELEMENTS)})")
+        return data.monsters.weakest_to(
+            element,
+            int_param(query, "min_level"),
+            int_param(query, "max_level"),
+            limit_param(query),
+        )
+    if path == "/monsters/nearest":
+        profile = {element: float_param(query, element) for element in ELEMENTS}
+        return data.monsters.nearest(
+            profile,
+            limit_param(query),
+            int_param(query, "min_level"),
+            int_param(query, "max_level"),
+        )
+    if path == "/craftable":
+        return data.craftable(inventory_param(query), query.get("intermediate", ["0"])[0] not in ("0", "false", ""))
+    if path == "/health":
+        return {"items": len(data.items), "recipes": len(data.craft_by_id)}
+    raise ApiError(404, f"Route inconnue: {path}")
+
+
+class CachedResponse:
+    __slots__ = ("status", "body", "gzip_body", "etag")
+
+    def __init__(self, status: int, payload):
+        self.status = status
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=6) if len(self.body) >= GZIP_MIN_SIZE else None
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+
+
+class ApiServer:
+    def __init__(self, data: Dataset, cache_size: int = DEFAULT_CACHE_SIZE):
+        self.data = data
+        self.cache_size = cache_size
+        self.cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0}
+
+    def respond(self, target: str) -> CachedResponse:
+        # Cache LRU des réponses sérialisées (et compressées) par URL normalisée
+        cached = self.cache.get(target)
+        if cached is not None:
+            self.cache.move_to_end(target)
+            self.stats["cache_hits"] += 1
+            return cached
+        parsed = urlparse(target)
+        try:
+            response = CachedResponse(200, route(self.data, unquote(parsed.path), parse_qs(parsed.query)))
+        except ApiError as error:
+            response = CachedResponse(error.status, {"error": str(error)})
+        except ValueError as error:
+            # Erreurs levées par les index sur une requête invalide (cycle de nomenclature, k=0...)
+            response = CachedResponse(400, {"error": str(error)})
+        except Exception as error:
+            # Pas mise en cache : une erreur interne ne doit pas survivre à un correctif des données
+            print(f"❌ {target}: {error!r}")
+            return CachedResponse(500, {"error": f"Erreur interne: {type(error).__name__}"})
+        self.cache[target] = response
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return response
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self.stats["requests"] += 1
+                if method not in ("GET", "HEAD"):
+                    response = CachedResponse(405, {"error": f"Méthode non supportée: {method}"})
+                else:
+                    response = self.respond(target)
+                writer.write(self.encode(response, headers, method == "HEAD", keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, ValueError):
+            # ValueError ici : ligne de requête malformée, les erreurs de route sont gérées par respond
+            return
+        finally:
+            writer.close()
+
+    def encode(self, response: CachedResponse, headers: dict[str, str], head_only: bool, keep_alive: bool) -> bytes:
+        status, body = response.status, response.body
+        extra_headers = [f"ETag: {response.etag}", "Cache-Control: no-cache", "Vary: Accept-Encoding"]
+        if status == 200 and headers.get("if-none-match") == response.etag:
+            self.stats["not_modified"] += 1
+            status, body = 304, b""
+        elif response.gzip_body is not None and "gzip" in headers.get("accept-encoding", ""):
+            body = response.gzip_body
+            extra_headers.append("Content-Encoding: gzip")
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+            *extra_headers,
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body)
+
+
+async def serve(host: str, port: int, cache_size: int) -> None:
+    api = ApiServer(Dataset(), cache_size)
+    server = await asyncio.start_server(api.handle, host, port)
+    print(f"🌐 API sur http://{host}:{port} (/items, /recipes, /bom, /where-used, /drops, /craftable, /search, /monsters)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(f"📊 {json.dumps(api.stats)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="API HTTP locale (asyncio) sur le dataset construit par build_jsons.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="Nombre de réponses gardées en cache LRU.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        print("\n⏹️ Arrêt de l'API")
+
+
+if __name__ == "__main__":
+    main()
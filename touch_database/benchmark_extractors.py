@@ -0,0 +1,212 @@
+import argparse
+import json
+import random
+import resource
+import shutil
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+BENCHMARK_DIR = ROOT_DIR / "benchmarks"
+# Corpus synthétique versionné (mêmes balises que l'encyclopédie) ; --freeze le remplace par des pages du cache local
+FIXTURES_DIR = BENCHMARK_DIR / "fixtures"
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+
+DEFAULT_SAMPLE_SIZE = 40
+DEFAULT_REPEAT = 10
+# Chaque mesure est la médiane de plusieurs processus neufs : un pic de charge isolé ne fait pas une régression
+DEFAULT_RUNS = 3
+DEFAULT_THRESHOLD = 0.15
+
+# Sources du cache local échantillonnées par --freeze, par type de fixture
+FIXTURE_SOURCES = {
+    "lists": [f"html/{category}/{category}_page_*.html" for category in ["armes", "equipements", "consommables", "ressources"]],
+    "items": [f"deep_html/{category}/*.html" for category in ["armes", "equipements", "consommables", "ressources"]],
+    "monsters": ["deep_html/monstres/*.html"],
+    "jobs": ["html/jobs/job_*.html"],
+}
+
+EXTRACTOR_FIXTURES = {
+    "extract_table_data": "lists",
+    "extract_recipe_from_html": "items",
+    "extract_job_items": "jobs",
+    "extract_monster_details": "monsters",
+}
+
+
+def freeze_fixtures(sample_size: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for kind, patterns in FIXTURE_SOURCES.items():
+        candidates = sorted(path for pattern in patterns for path in ROOT_DIR.glob(pattern))
+        if not candidates:
+            print(f"⚠️ Aucune page en cache pour {kind}: {', '.join(patterns)}")
+            continue
+        target_dir = FIXTURES_DIR / kind
+        if target_dir.exists():
+            shutil.rmtree(target_dir)
+        target_dir.mkdir(parents=True)
+        sample = rng.sample(candidates, min(sample_size, len(candidates)))
+        for path in sample:
+            # Le préfixe de catégorie garde les noms uniques entre deep_html/<catégorie>
+            shutil.copyfile(path, target_dir / f"{path.parent.name}__{path.name}")
+        print(f"🧊 {kind}: {len(sample)} pages figées dans {target_dir}")
+
+
+def load_extractor(name: str):
+    sys.path.insert(0, str(ROOT_DIR))
+    if name == "extract_table_data":
+        from data_extractor import extract_table_data
+
+        return lambda path, html: extract_table_data(html)
+    if name == "extract_recipe_from_html":
+        from craft_data_extractor import extract_item_info_from_filename, extract_recipe_from_html
+
+        def run_recipe(path: Path, html: str):
+            item_id, item_slug = extract_item_info_from_filename(path.name.split("__", 1)[-1])
+            return extract_recipe_from_html(html, item_id, item_slug)
+
+        return run_recipe
+    if name == "extract_job_items":
+        from jobs_scraper import extract_job_items
+
+        return lambda path, html: extract_job_items(html, path.stem)
+    if name == "extract_monster_details":
+        from monsters_scraper import BASE_URL, extract_monster_details
+
+        def run_monster(path: Path, html: str):
+            monster_id, monster_slug = path.stem.split("__", 1)[-1].split("_", 1)
+            url = f"{BASE_URL}/fr/mmorpg/encyclopedie/monstres/{monster_id}-{monster_slug}"
+            return extract_monster_details(html, url)
+
+        return run_monster
+    raise ValueError(f"Extracteur inconnu: {name}")
+
+
+def run_extractor(name: str, repeat: int) -> dict | None:
+    # Exécuté dans un processus neuf : le pic RSS mesuré est celui de cet extracteur seul
+    pages = [(path, path.read_text(encoding="utf-8")) for path in sorted((FIXTURES_DIR / EXTRACTOR_FIXTURES[name]).glob("*.html"))]
+    if not pages:
+        return None
+    extractor = load_extractor(name)
+    extractor(*pages[0])
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path, html in pages:
+            page_started = time.perf_counter()
+            extractor(path, html)
+            latencies.append(time.perf_counter() - page_started)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    return {
+        "pages": len(pages),
+        "runs": len(latencies),
+        "pages_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_benchmarks(extractors: list[str], repeat: int, runs: int = DEFAULT_RUNS) -> dict:
+    results = {}
+    for name in extractors:
+        samples = []
+        for _ in range(runs):
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                samples.append(executor.submit(run_extractor, name, repeat).result())
+        if samples[0] is None:
+            print(f"⚠️ {name}: aucune fixture dans {FIXTURES_DIR / EXTRACTOR_FIXTURES[name]} (lancer --freeze)")
+            continue
+        result = {metric: statistics.median(sample[metric] for sample in samples) for metric in samples[0]}
+        results[name] = result
+        print(
+            f"⏱️ {name}: {result['pages_per_sec']:.1f} pages/s, "
+            f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+            f"RSS max {result['peak_rss_mb']:.1f} Mo ({result['pages']} pages x {repeat}, médiane de {runs} runs)"
+        )
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        if result["pages_per_sec"] < reference["pages_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{name}: débit {result['pages_per_sec']:.1f} pages/s < baseline {reference['pages_per_sec']:.1f}"
+            )
+        if result["p99_ms"] > reference["p99_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p99 {result['p99_ms']:.2f} ms > baseline {reference['p99_ms']:.2f} ms")
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + threshold):
+            regressions.append(
+                f"{name}: RSS {result['peak_rss_mb']:.1f} Mo > baseline {reference['peak_rss_mb']:.1f} Mo"
+            )
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark hors-ligne des extracteurs HTML sur un corpus figé.")
+    parser.add_argument(
+        "--freeze",
+        action="store_true",
+        help="Échantillonne le cache html/ et deep_html/ local vers benchmarks/fixtures.",
+    )
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--extractor", action="append", dest="extractors", choices=list(EXTRACTOR_FIXTURES))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Nombre de passes sur le corpus.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Processus mesurés par extracteur (médiane).")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre les résultats comme baseline.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Dégradation relative tolérée avant de signaler une régression (0.15 = 15%%).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.freeze:
+        freeze_fixtures(args.sample_size, args.seed)
+        return
+
+    results = run_benchmarks(args.extractors or list(EXTRACTOR_FIXTURES), args.repeat, args.runs)
+    if not results:
+        return
+
+    if args.save_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=4), encoding="utf-8")
+        print(f"💾 Baseline sauvegardée: {BASELINE_PATH}")
+        return
+
+    if not BASELINE_PATH.exists():
+        print("⚠️ Pas de baseline: relancer avec --save-baseline pour en créer une.")
+        return
+    regressions = compare_to_baseline(results, json.loads(BASELINE_PATH.read_text(encoding="utf-8")), args.threshold)
+    for regression in regressions:
+        print(f"❌ Régression {regression}")
+    if regressions:
+        sys.exit(1)
+    print("✅ Aucune régression par rapport à la baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
 import pandas as pd
 import json
 import os
-
-def items_details_json():
+from craft_graph import build_craft_graph, save_craft_graph
+from delta_feed import publish_deltas
+from facet_index import build_facet_index, save_facet_index
+from item_registry import ItemRegistry, build_id_keyed_jsons, build_registry, recipe_entry, save_registry
+from item_table import build_item_table, save_item_table
+from monster_index import build_monster_index, save_monster_index
+from profiling import run_stage, stage
+from publish_ui import publish_ui_data
+from search_index import build_search_index, collect_names, save_search_index
+from zone_index import build_zone_index, save_zone_index
+
+def items_details_json(registry=None):
     """Construit le fichier JSON de mapping
     {
         "item_name": {
-            "id": "item_id",
+            "id": "image_id",
+            "item_id": "encyclopedia_id",
             "name": "item_name",
             "category": "item_category",
             "type": "item_type",
@@ -31,6 +42,10 @@ def items_details_json():
             "type": item_details["type"],
             "level": item_details["niveau"]
         }
+        # L'ID d'image ne correspond pas à l'ID d'encyclopédie : on le résout via le registre
+        # (None pour un nom porté par plusieurs items, voir registry.json "homonyms")
+        if registry is not None:
+            items_details_data[item_name]["item_id"] = registry.resolve(item_name, item_details["category"])
     with open(f'touch_database/data/json/items_details.json', 'w', encoding='utf-8') as f:
         json.dump(items_details_data, f, ensure_ascii=False, indent=4)
     print("Items details JSON built")
@@ -97,63 +112,9 @@ def build_craft_json():
     # Créer le dictionnaire final
     craft_data = {}
     
-    # Grouper par item_name
+    # Grouper par item_name (mêmes règles que craft_by_id.json, voir item_registry.recipe_entry)
     for item_name in craft_df['item_name'].unique():
-        item_data = craft_df[craft_df['item_name'] == item_name]
-        
-        # Prendre les données de base (même pour tous les ingrédients)
-        first_row = item_data.iloc[0]
-
-        has_recipe = bool(first_row['has_recipe'])
-        # Éviter toute mutation d'une vue de DataFrame (SettingWithCopyWarning)
-        job_from_row = first_row['job']
-        job_level_from_row = first_row['job_level']
-        has_job = not pd.isna(job_from_row)
-
-        
-        if not has_job and 'Graine' in item_name:
-            has_job = True
-            job_from_row = 'Paysan'
-            job_level_from_row = 1
-            
-        if not has_job and ('Farine' in item_name or 'gely' in item_name):
-            has_job = True
-            job_from_row = 'Boulanger'
-            job_level_from_row = 1
-
-        if not has_job and ('Potion' in item_name or 'Soin' in item_name):
-            has_job = True
-            job_from_row = 'Alchimiste'
-            job_level_from_row = 1
-
-        if not has_job and ('vidé' in item_name):
-            has_job = True
-            job_from_row = 'Pêcheur'
-            job_level_from_row = 1
-
-        if not has_job and ('Rune ' in item_name or 'Fantôme' in item_name or 'Pierre d' in item_name):
-            has_recipe = False
-
-        if has_recipe and has_job:
-            craft_data[item_name] = {
-                "category": first_row['category'],
-                "has_recipe": has_recipe,
-                "job": job_from_row,
-                "job_level": float(job_level_from_row),
-                "ingredient_names": item_data['ingredient_name'].dropna().tolist(),
-                "ingredient_ids": [int(id) for id in item_data['ingredient_id'].dropna().tolist()],
-                "quantities": [int(qty) for qty in item_data['quantity'].dropna().tolist()]
-            }
-        else:
-            craft_data[item_name] = {
-                "category": first_row['category'],
-                "has_recipe": has_recipe,
-                "job": None,
-                "job_level": None,
-                "ingredient_names": [],
-                "ingredient_ids": [],
-                "quantities": []
-            }
+        craft_data[item_name] = recipe_entry(item_name, craft_df[craft_df['item_name'] == item_name])
     
     # Sauvegarder le JSON
     with open('touch_database/data/json/craft.json', 'w', encoding='utf-8') as f:
@@ -161,8 +122,42 @@ def build_craft_json():
     
     print("Craft JSON built")
 
+def build_item_registry():
+    """Construit le registre canonique des IDs d'encyclopédie"""
+    registry_data = build_registry()
+    save_registry(registry_data)
+    return ItemRegistry(registry_data)
+
+def main():
+    with stage("registry"):
+        registry = build_item_registry()
+    with stage("item_table"):
+        save_item_table(build_item_table(registry))
+    with stage("items_details"):
+        items_details_json(registry)
+    with stage("image"):
+        image_json()
+    with stage("jobs"):
+        jobs_json()
+    with stage("craft"):
+        build_craft_json()
+    with stage("id_keyed"):
+        build_id_keyed_jsons(registry)
+    with stage("facets"):
+        save_facet_index(build_facet_index())
+    with stage("search_index"):
+        save_search_index(build_search_index(collect_names()))
+    with stage("craft_graph"):
+        save_craft_graph(build_craft_graph(registry))
+    with stage("monster_index"):
+        save_monster_index(build_monster_index())
+    with stage("zone_index"):
+        save_zone_index(build_zone_index())
+    with stage("deltas"):
+        publish_deltas()
+    with stage("publish_ui"):
+        publish_ui_data()
+
+
 if __name__ == "__main__":
-    items_details_json()
-    image_json()
-    jobs_json()
-    build_craft_json()
\ No newline at end of file
+    run_stage("build_jsons", main)
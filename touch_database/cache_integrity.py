@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from metrics import METRICS
+from monsters_scraper import BASE_URL, is_blocked_html
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+HTML_DIR = ROOT_DIR / "html"
+DEEP_HTML_DIR = ROOT_DIR / "deep_html"
+QUARANTINE_DIR = ROOT_DIR / "quarantine"
+REFETCH_QUEUE = QUARANTINE_DIR / "refetch.jsonl"
+
+# Une vraie page de l'encyclopédie pèse plusieurs dizaines de Ko ; en dessous, réponse d'erreur ou coupée
+MIN_PAGE_SIZE = 4096
+CLOSING_TAG_WINDOW = 2048
+# (motif du chemin relatif, type de page, conteneurs dont dépendent les extracteurs)
+PAGE_KINDS = [
+    (re.compile(r"^html/jobs/jobs_page_(?P<page>\d+)\.html$"), "jobs_list", ["ak-mosaic-item"]),
+    # Les métiers de forgemagie n'ont aucun item listé : pas de ak-table, seul le conteneur de page est garanti
+    (re.compile(r"^html/jobs/job_(?P<id>\d+)_(?P<slug>.+?)(?:_page_(?P<page>\d+))?\.html$"), "job", ["ak-panel"]),
+    (re.compile(r"^html/monstres/monstres_page_(?P<page>\d+)\.html$"), "monster_list", ["/encyclopedie/monstres/"]),
+    (re.compile(r"^html/(?P<category>[a-z]+)/(?P=category)_page_(?P<page>\d+)\.html$"), "list", ["ak-table"]),
+    (re.compile(r"^deep_html/monstres/(?P<id>\d+)_(?P<slug>.+)\.html$"), "monster", ["ak-panel"]),
+    (re.compile(r"^deep_html/(?P<category>[a-z]+)/(?P<id>\d+)_(?P<slug>.+)\.html$"), "item", ["ak-return-link"]),
+]
+
+
+def page_kind(relative_path: str) -> tuple[str, dict, list[str]] | None:
+    for pattern, kind, markers in PAGE_KINDS:
+        match = pattern.match(relative_path)
+        if match:
+            return kind, match.groupdict(), markers
+    return None
+
+
+def page_problem(html_content: str, markers: list[str]) -> str | None:
+    if len(html_content.encode("utf-8")) < MIN_PAGE_SIZE:
+        return "too_small"
+    if is_blocked_html(html_content):
+        return "blocked"
+    if "</html>" not in html_content[-CLOSING_TAG_WINDOW:].lower():
+        return "truncated"
+    for marker in markers:
+        if marker not in html_content:
+            return f"missing:{marker}"
+    return None
+
+
+def validate_page(relative_path: str, html_content: str) -> str | None:
+    # Utilisé par les scrapers avant d'écrire dans le cache : une page invalide n'y entre jamais
+    kind = page_kind(relative_path)
+    return page_problem(html_content, kind[2] if kind else [])
+
+
+def check_file(path: Path) -> tuple[str, str | None, str | None]:
+    relative_path = path.relative_to(ROOT_DIR).as_posix()
+    kind = page_kind(relative_path)
+    html_content = path.read_bytes().decode("utf-8", errors="replace")
+    return relative_path, kind[0] if kind else None, page_problem(html_content, kind[2] if kind else [])
+
+
+def scan_pages(workers: int | None = None) -> list[tuple[str, str | None, str]]:
+    paths = sorted(path for root in [HTML_DIR, DEEP_HTML_DIR] if root.exists() for path in root.rglob("*.html"))
+    problems = []
+    # Lecture + recherche de marqueurs sur des milliers de pages : réparti sur tous les cœurs
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for index, (relative_path, kind, problem) in enumerate(pool.map(check_file, paths, chunksize=64)):
+            METRICS.inc("pages", stage="integrity")
+            if problem:
+                METRICS.inc("invalid", stage="integrity")
+                problems.append((relative_path, kind, problem))
+            METRICS.progress(index + 1, len(paths), "integrity")
+    return problems
+
+
+def load_queue() -> list[dict]:
+    if not REFETCH_QUEUE.exists():
+        return []
+    with REFETCH_QUEUE.open(encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_queue(entries: list[dict]) -> None:
+    QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = REFETCH_QUEUE.with_name(f".{REFETCH_QUEUE.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        for entry in entries:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, REFETCH_QUEUE)
+
+
+def quarantine(problems: list[tuple[str, str | None, str]]) -> int:
+    # Déplacer (et non supprimer) : les scrapers "fetch if missing" reprennent exactement ces pages
+    queue = {entry["path"]: entry for entry in load_queue()}
+    created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    for relative_path, kind, problem in problems:
+        target = QUARANTINE_DIR / relative_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(ROOT_DIR / relative_path, target)
+        queue[relative_path] = {"path": relative_path, "kind": kind, "problem": problem, "quarantined": created}
+    save_queue(list(queue.values()))
+    return len(problems)
+
+
+def refetch_page(entry: dict, registry=None) -> bool:
+    # Imports locaux : chaque scraper garde ses propres chemins, en-têtes et limites de débit
+    kind, fields = entry["kind"], (page_kind(entry["path"]) or (None, {}, []))[1]
+    if kind == "list":
+        from database_scraper import fetch_page_if_missing
+
+        fetch_page_if_missing(fields["category"], int(fields["page"]))
+    elif kind == "item" and fields["category"] != "items":
+        from deep_database_scraper import fetch_item_page_if_missing
+
+        return fetch_item_page_if_missing(fields["category"], fields["id"], fields["slug"])
+    elif kind == "item":
+        from monsters_scraper import fetch_item_condition
+
+        # deep_html/items ne garde pas la catégorie, nécessaire à l'URL : on la reprend du registre
+        if registry is None or int(fields["id"]) not in registry or not registry.item(int(fields["id"]))["category"]:
+            print(f"⚠️ Catégorie inconnue pour {entry['path']}: à relancer via monsters_scraper")
+            return False
+        category = registry.item(int(fields["id"]))["category"]
+        fetch_item_condition(f"{BASE_URL}/fr/mmorpg/encyclopedie/{category}/{fields['id']}-{fields['slug']}")
+    elif kind == "monster_list":
+        from monsters_scraper import fetch_list_page_if_missing
+
+        fetch_list_page_if_missing(int(fields["page"]))
+    elif kind == "monster":
+        from monsters_scraper import fetch_monster_page_if_missing
+
+        fetch_monster_page_if_missing(f"{BASE_URL}/fr/mmorpg/encyclopedie/monstres/{fields['id']}-{fields['slug']}")
+    elif kind == "jobs_list":
+        from jobs_scraper import fetch_jobs_page
+
+        fetch_jobs_page(int(fields["page"]))
+    elif kind == "job":
+        from jobs_scraper import fetch_job_page
+
+        fetch_job_page(fields["id"], fields["slug"], int(fields["page"] or 1))
+    else:
+        print(f"⚠️ Type de page inconnu, non refetchable: {entry['path']}")
+        return False
+    return (ROOT_DIR / entry["path"]).exists()
+
+
+def refetch_quarantined() -> tuple[int, int]:
+    remaining, repaired = [], 0
+    queue = load_queue()
+    registry = None
+    if any(entry["path"].startswith("deep_html/items/") for entry in queue):
+        from item_registry import ItemRegistry
+
+        registry = ItemRegistry.load()
+    for index, entry in enumerate(queue):
+        try:
+            ok = refetch_page(entry, registry)
+        except Exception as exc:
+            print(f"❌ {entry['path']}: {exc}")
+            ok = False
+        if ok:
+            repaired += 1
+            (QUARANTINE_DIR / entry["path"]).unlink(missing_ok=True)
+        else:
+            remaining.append(entry)
+        METRICS.progress(index + 1, len(queue), "refetch")
+    save_queue(remaining)
+    return repaired, len(remaining)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vérifie l'intégrité du cache HTML et met en quarantaine les pages invalides.")
+    parser.add_argument(
+        "command",
+        choices=["scan", "quarantine", "refetch"],
+        help="scan: rapport, quarantine: déplace et met en file les pages invalides, refetch: retélécharge la file.",
+    )
+    parser.add_argument("--workers", type=int, help="Processus de vérification (défaut: nombre de cœurs).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "refetch":
+        repaired, remaining = refetch_quarantined()
+        print(f"✅ {repaired} pages réparées, {remaining} restent en file ({REFETCH_QUEUE})")
+        return
+
+    problems = scan_pages(args.workers)
+    by_problem: dict[str, int] = {}
+    for _, kind, problem in problems:
+        key = f"{kind or 'inconnu'}/{problem}"
+        by_problem[key] = by_problem.get(key, 0) + 1
+    for key, count in sorted(by_problem.items(), key=lambda entry: -entry[1]):
+        print(f"  {key:<40} {count:>6}")
+    for relative_path, _, problem in problems[:20]:
+        print(f"  ⚠️ {relative_path}: {problem}")
+
+    if args.command == "quarantine" and problems:
+        quarantine(problems)
+        print(f"🚧 {len(problems)} pages en quarantaine, à retélécharger avec: refetch")
+    else:
+        print(f"🔬 {len(problems)} pages invalides")
+
+
+if __name__ == "__main__":
+    try:
+        run_stage("cache_integrity", main)
+    finally:
+        METRICS.report("cache_integrity")
@@ -0,0 +1,287 @@
+import argparse
+import csv
+import hashlib
+import os
+import re
+import time
+from pathlib import Path
+
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+HTML_DIR = ROOT_DIR / "html"
+DEEP_HTML_DIR = ROOT_DIR / "deep_html"
+IMAGES_DIR = ROOT_DIR / "images"
+CACHE_DIRS = {"html": HTML_DIR, "deep_html": DEEP_HTML_DIR, "images": IMAGES_DIR}
+# Seuls ces fichiers sont du cache évinçable : deep_html/ héberge aussi la base item_conditions.sqlite
+# (et ses -wal/-shm) de monsters_scraper, ouverte pendant les crawls
+CACHE_SUFFIXES = {
+    "html": {".html"},
+    "deep_html": {".html"},
+    "images": {".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg"},
+}
+
+# Budgets par défaut des hôtes de rafraîchissement (vides = pas de limite)
+DEFAULT_MAX_SIZE = os.environ.get("DOFUS_CACHE_MAX_SIZE")
+DEFAULT_MAX_AGE_DAYS = os.environ.get("DOFUS_CACHE_MAX_AGE_DAYS")
+
+# CSV dont la colonne local_url référence les images servies par l'UI : jamais évincées
+IMAGE_CSVS = [DATA_DIR / "merged_with_local_images.csv", DATA_DIR / "jobs_list_with_local_images.csv"]
+LIST_LINK = re.compile(r"/fr/mmorpg/encyclopedie/(?P<category>[a-z]+)/(?P<id>\d+)-")
+CACHED_PAGE = re.compile(r"^(?P<id>\d+)_(?P<slug>.+)\.html$")
+LIST_PAGE = re.compile(r"^(?P<category>[a-z]+)_page_(?P<page>\d+)\.html$")
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+# Ordre du rapport : raisons "sûres" d'abord, budgets ensuite
+REASONS = ["duplicate", "superseded", "stale", "expired", "lru"]
+
+
+class CacheEntry:
+    __slots__ = ("path", "cache", "size", "inode", "links", "modified", "used")
+
+    def __init__(self, path: Path, cache: str, stat: os.stat_result):
+        self.path = path
+        self.cache = cache
+        self.size = stat.st_size
+        self.inode = (stat.st_dev, stat.st_ino)
+        self.links = stat.st_nlink
+        self.modified = stat.st_mtime
+        # atime = dernier usage (mark_used) ; un fichier fraîchement téléchargé compte comme utilisé
+        self.used = max(stat.st_atime, stat.st_mtime)
+
+
+def mark_used(path: str | Path) -> None:
+    # Met à jour l'atime seul : la mtime reste la date de téléchargement, indépendamment de relatime/noatime
+    try:
+        stat = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def parse_size(value: str | None) -> int | None:
+    if not value:
+        return None
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", value.upper())
+    if not match:
+        raise ValueError(f"Taille invalide: {value} (ex: 500M, 2G)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def format_size(size: int) -> str:
+    for unit in ["o", "Ko", "Mo", "Go"]:
+        if size < 1024 or unit == "Go":
+            return f"{size:.0f} {unit}" if unit == "o" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
+
+
+def scan_caches(caches: dict[str, Path] = CACHE_DIRS) -> list[CacheEntry]:
+    entries = []
+    for cache, root in caches.items():
+        if not root.exists():
+            continue
+        suffixes = CACHE_SUFFIXES.get(cache, {".html"})
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(directory) / filename
+                if path.suffix.lower() in suffixes:
+                    entries.append(CacheEntry(path, cache, path.stat()))
+    return entries
+
+
+def listed_ids(html_dir: Path = HTML_DIR, expected_pages: dict[str, int] | None = None) -> dict[str, set[str]]:
+    # IDs encore présents dans les pages de liste, par catégorie. Seules les catégories dont toutes les pages
+    # sont en cache sont vérifiées : une page absente ferait passer tous ses items pour obsolètes
+    ids: dict[str, set[str]] = {}
+    if not html_dir.exists():
+        return ids
+    for category_dir in html_dir.iterdir():
+        if not category_dir.is_dir() or category_dir.name == "jobs":
+            continue
+        pages = [page for page in category_dir.glob("*_page_*.html") if LIST_PAGE.match(page.name)]
+        numbers = {int(LIST_PAGE.match(page.name).group("page")) for page in pages}
+        expected = (expected_pages or {}).get(category_dir.name, max(numbers, default=0))
+        if not numbers or not set(range(1, expected + 1)) <= numbers:
+            continue
+        for page in pages:
+            for match in LIST_LINK.finditer(page.read_text(encoding="utf-8", errors="ignore")):
+                if match.group("category") == category_dir.name:
+                    ids.setdefault(category_dir.name, set()).add(match.group("id"))
+    return ids
+
+
+def pinned_images(csv_paths: list[Path] = IMAGE_CSVS) -> set[Path]:
+    pinned = set()
+    for csv_path in csv_paths:
+        if not csv_path.exists():
+            continue
+        with csv_path.open(encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                local_url = row.get("local_url") or ""
+                if local_url.startswith("/images/"):
+                    pinned.add(IMAGES_DIR / local_url.removeprefix("/images/"))
+    return pinned
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def find_duplicates(entries: list[CacheEntry]) -> list[tuple[CacheEntry, CacheEntry]]:
+    # deep_html/items/<id>_<slug>.html recopie souvent deep_html/<catégorie>/ : même nom, même contenu
+    by_name: dict[str, list[CacheEntry]] = {}
+    for entry in entries:
+        if entry.cache == "deep_html" and entry.path.parent.name != "items":
+            by_name.setdefault(entry.path.name, []).append(entry)
+    duplicates = []
+    for entry in entries:
+        if entry.cache != "deep_html" or entry.path.parent.name != "items":
+            continue
+        for original in by_name.get(entry.path.name, []):
+            if original.inode == entry.inode:
+                break
+            if original.size == entry.size and file_digest(original.path) == file_digest(entry.path):
+                duplicates.append((entry, original))
+                break
+    return duplicates
+
+
+def plan_gc(
+    entries: list[CacheEntry],
+    max_bytes: int | None = None,
+    max_age: float | None = None,
+    now: float | None = None,
+) -> tuple[list[tuple[CacheEntry, str]], list[tuple[CacheEntry, CacheEntry]]]:
+    # Import local : database_scraper importe lui-même cache_manager (mark_used)
+    from database_scraper import CATEGORIES_MAP
+
+    now = now or time.time()
+    # Pages de liste (html/) : racines du crawl et référence du contrôle "stale", jamais évincées
+    pinned = pinned_images() | {entry.path for entry in entries if entry.cache == "html"}
+    listed = listed_ids(expected_pages=CATEGORIES_MAP)
+    removals: list[tuple[CacheEntry, str]] = []
+    removed: set[Path] = set()
+
+    def remove(entry: CacheEntry, reason: str) -> None:
+        if entry.path not in removed and entry.path not in pinned:
+            removed.add(entry.path)
+            removals.append((entry, reason))
+
+    # Même ID sous plusieurs slugs (renommage) : seule la copie la plus récente sert encore
+    by_id: dict[tuple[Path, str], list[CacheEntry]] = {}
+    for entry in entries:
+        match = CACHED_PAGE.match(entry.path.name)
+        if entry.cache == "deep_html" and match:
+            by_id.setdefault((entry.path.parent, match.group("id")), []).append(entry)
+            category = entry.path.parent.name
+            if category in listed and match.group("id") not in listed[category]:
+                remove(entry, "stale")
+    for copies in by_id.values():
+        for entry in sorted(copies, key=lambda copy: copy.modified)[:-1]:
+            remove(entry, "superseded")
+
+    if max_age is not None:
+        for entry in entries:
+            if now - entry.used > max_age:
+                remove(entry, "expired")
+
+    duplicates = [(entry, original) for entry, original in find_duplicates(entries) if entry.path not in removed]
+
+    if max_bytes is not None:
+        # Octets réels par inode : un fichier lié en dur n'est libéré qu'avec son dernier lien
+        links: dict[tuple[int, int], int] = {}
+        sizes: dict[tuple[int, int], int] = {}
+        for entry in entries:
+            links[entry.inode] = links.get(entry.inode, 0) + 1
+            sizes[entry.inode] = entry.size
+        for entry, _ in removals:
+            links[entry.inode] -= 1
+        for entry, _ in duplicates:
+            links[entry.inode] -= 1
+        total = sum(sizes[inode] for inode, count in links.items() if count > 0)
+        for entry in sorted(entries, key=lambda candidate: candidate.used):
+            if total <= max_bytes:
+                break
+            if entry.path in removed or entry.path in pinned or links[entry.inode] <= 0:
+                continue
+            remove(entry, "lru")
+            links[entry.inode] -= 1
+            if links[entry.inode] == 0:
+                total -= entry.size
+    return removals, duplicates
+
+
+def reclaimable(entries: list[CacheEntry], removals: list[tuple[CacheEntry, str]], duplicates: list) -> dict:
+    scanned: dict[tuple[int, int], int] = {}
+    for entry in entries:
+        scanned[entry.inode] = scanned.get(entry.inode, 0) + 1
+    remaining = dict(scanned)
+    report: dict[str, dict[str, int]] = {}
+    for entry, reason in [*removals, *((entry, "duplicate") for entry, _ in duplicates)]:
+        remaining[entry.inode] -= 1
+        # Libéré seulement si plus aucun lien ne pointe sur l'inode, y compris hors des caches scannés
+        freed = entry.size if remaining[entry.inode] == 0 and entry.links <= scanned[entry.inode] else 0
+        stats = report.setdefault(reason, {"files": 0, "bytes": 0})
+        stats["files"] += 1
+        stats["bytes"] += freed
+    return report
+
+
+def apply_gc(removals: list[tuple[CacheEntry, str]], duplicates: list[tuple[CacheEntry, CacheEntry]]) -> None:
+    for entry, original in duplicates:
+        # Lien dur à la place de la copie : les lecteurs de deep_html/items ne voient aucune différence
+        tmp_path = entry.path.with_name(f".{entry.path.name}.tmp")
+        os.link(original.path, tmp_path)
+        os.replace(tmp_path, entry.path)
+    for entry, _ in removals:
+        entry.path.unlink(missing_ok=True)
+
+
+def collect_garbage(
+    max_bytes: int | None = None,
+    max_age: float | None = None,
+    apply: bool = False,
+    caches: dict[str, Path] = CACHE_DIRS,
+) -> dict:
+    entries = scan_caches(caches)
+    removals, duplicates = plan_gc(entries, max_bytes, max_age)
+    report = reclaimable(entries, removals, duplicates)
+    if apply:
+        apply_gc(removals, duplicates)
+    return {
+        "files": len(entries),
+        "bytes": sum(size for size in {entry.inode: entry.size for entry in entries}.values()),
+        "reclaimable": report,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Gère la taille des caches html/, deep_html/ et images/.")
+    parser.add_argument("command", choices=["gc", "evict"], help="gc: rapport (à blanc), evict: applique l'éviction.")
+    parser.add_argument("--max-size", default=DEFAULT_MAX_SIZE, help="Budget disque total (ex: 500M, 2G).")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE_DAYS, help="Âge max depuis le dernier usage (jours).")
+    parser.add_argument("--cache", choices=sorted(CACHE_DIRS), action="append", help="Limite à certains caches.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    caches = {name: CACHE_DIRS[name] for name in args.cache} if args.cache else CACHE_DIRS
+    max_age = float(args.max_age) * 86400 if args.max_age is not None else None
+    result = collect_garbage(parse_size(args.max_size), max_age, apply=args.command == "evict", caches=caches)
+
+    print(f"📦 Caches: {result['files']} fichiers, {format_size(result['bytes'])}")
+    total = 0
+    for reason in REASONS:
+        stats = result["reclaimable"].get(reason)
+        if stats:
+            total += stats["bytes"]
+            print(f"  {reason:<11} {stats['files']:>7} fichiers  {format_size(stats['bytes']):>10}")
+    verb = "libérés" if args.command == "evict" else "récupérables"
+    print(f"🧹 {format_size(total)} {verb}")
+
+
+if __name__ == "__main__":
+    run_stage("cache_manager", main)
@@ -1,9 +1,12 @@
 import os
+import csv
 import pandas as pd
 from bs4 import BeautifulSoup
 import re
 import json
 from pathlib import Path
+from metrics import METRICS
+from profiling import run_stage, stage
 
 # Catégories à traiter
 CATEGORIES = ["armes", "equipements", "consommables", "ressources"]
@@ -140,16 +143,25 @@ def extract_recipe_from_html(html_content, item_id, item_name_slug):
         'ingredients': ingredients
     }
 
-def process_category_crafts(category):
-    """Traite tous les fichiers HTML d'une catégorie pour extraire les recettes"""
+# Colonnes de craft_detailed.csv, dans l'ordre historique du DataFrame
+CRAFT_COLUMNS = [
+    'item_id', 'item_name', 'item_slug', 'category', 'has_recipe', 'job', 'job_level',
+    'ingredient_id', 'ingredient_name', 'ingredient_type', 'quantity'
+]
+# Colonnes numériques avec trous : pandas les écrivait en float ("100.0")
+FLOAT_COLUMNS = {'job_level', 'quantity'}
+
+def iter_category_crafts(category):
+    """Parse une à une les pages HTML d'une catégorie et produit leurs recettes"""
     deep_html_dir = f"touch_database/deep_html/{category}"
     
     if not os.path.exists(deep_html_dir):
         print(f"⚠️ Dossier manquant: {deep_html_dir}")
-        return []
+        return
     
-    all_crafts_data = []
-    files = [f for f in os.listdir(deep_html_dir) if f.endswith('.html')]
+    # Tri : l'ordre de sortie ne dépend pas de quel worker (shard, file) a écrit chaque page
+    files = sorted(f for f in os.listdir(deep_html_dir) if f.endswith('.html'))
+    processed = 0
     
     print(f"🔄 Traitement de {len(files)} fichiers pour {category}...")
     
@@ -167,58 +179,63 @@ def process_category_crafts(category):
             with open(file_path, 'r', encoding='utf-8') as f:
                 html_content = f.read()
             
-            craft_data = extract_recipe_from_html(html_content, item_id, item_name_slug)
+            with METRICS.timer("parse", stage=category):
+                craft_data = extract_recipe_from_html(html_content, item_id, item_name_slug)
             craft_data['category'] = category
-            all_crafts_data.append(craft_data)
-            
-            if i % 100 == 0:
-                print(f"✓ Traité {i}/{len(files)} fichiers")
+            METRICS.inc("pages", stage=category)
+            METRICS.progress(i, len(files), category)
                 
         except Exception as e:
+            METRICS.inc("errors", stage=category)
             print(f"❌ Erreur lors du traitement de {filename}: {e}")
             continue
+        
+        processed += 1
+        yield craft_data
     
-    print(f"✅ {category}: {len(all_crafts_data)} items traités")
-    return all_crafts_data
+    print(f"✅ {category}: {processed} items traités")
 
-def flatten_craft_data(all_crafts_data):
-    """Aplati les données de craft pour les sauvegarder en CSV"""
-    flattened_data = []
+def process_category_crafts(category):
+    """Traite tous les fichiers HTML d'une catégorie pour extraire les recettes"""
+    return list(iter_category_crafts(category))
+
+def iter_craft_rows(craft_data):
+    """Produit les lignes aplaties (une par ingrédient) d'une recette"""
+    base_row = {
+        'item_id': craft_data['item_id'],
+        'item_name': craft_data['item_name'],
+        'item_slug': craft_data['item_slug'],
+        'category': craft_data['category'],
+        'has_recipe': craft_data['has_recipe'],
+        'job': craft_data['job'],
+        'job_level': craft_data['job_level']
+    }
     
-    for craft_data in all_crafts_data:
-        base_row = {
-            'item_id': craft_data['item_id'],
-            'item_name': craft_data['item_name'],
-            'item_slug': craft_data['item_slug'],
-            'category': craft_data['category'],
-            'has_recipe': craft_data['has_recipe'],
-            'job': craft_data['job'],
-            'job_level': craft_data['job_level']
-        }
-        
-        if craft_data['has_recipe'] and craft_data['ingredients']:
-            # Une ligne par ingrédient
-            for ingredient in craft_data['ingredients']:
-                row = base_row.copy()
-                row.update({
-                    'ingredient_id': ingredient['ingredient_id'],
-                    'ingredient_name': ingredient['ingredient_name'],
-                    'ingredient_type': ingredient['ingredient_type'],
-                    'quantity': ingredient['quantity']
-                })
-                flattened_data.append(row)
-        else:
-            # Item sans recette
+    if craft_data['has_recipe'] and craft_data['ingredients']:
+        # Une ligne par ingrédient
+        for ingredient in craft_data['ingredients']:
             row = base_row.copy()
             row.update({
-                'ingredient_id': None,
-                'ingredient_name': None,
-                'ingredient_type': None,
-                'quantity': None
+                'ingredient_id': ingredient['ingredient_id'],
+                'ingredient_name': ingredient['ingredient_name'],
+                'ingredient_type': ingredient['ingredient_type'],
+                'quantity': ingredient['quantity']
             })
-            flattened_data.append(row)
-    
-    return flattened_data
+            yield row
+    else:
+        # Item sans recette
+        row = base_row.copy()
+        row.update({
+            'ingredient_id': None,
+            'ingredient_name': None,
+            'ingredient_type': None,
+            'quantity': None
+        })
+        yield row
+
+def flatten_craft_data(all_crafts_data):
+    """Aplati les données de craft pour les sauvegarder en CSV"""
+    return [row for craft_data in all_crafts_data for row in iter_craft_rows(craft_data)]
 
 def save_craft_summary(all_crafts_data):
     """Sauvegarde un résumé des recettes (sans détail des ingrédients)"""
@@ -245,33 +262,39 @@ def save_craft_summary(all_crafts_data):
     
     return df_summary
 
+def craft_json_entry(craft_data):
+    """Construit l'entrée JSON d'une recette, ou None si l'item n'a pas de recette"""
+    if not (craft_data['has_recipe'] and craft_data['ingredients']):
+        return None
+    
+    # Créer la liste des ingrédients sous forme de tuples (id, nom, quantité)
+    ingredients_list = []
+    for ingredient in craft_data['ingredients']:
+        ingredients_list.append([
+            ingredient['ingredient_id'],
+            ingredient['ingredient_name'],
+            ingredient['quantity']
+        ])
+    
+    # Nettoie le nom du métier (enlève "Niveau" s'il y en a)
+    job_name = craft_data['job']
+    if job_name and job_name.endswith('Niveau'):
+        job_name = job_name.replace('Niveau', '').strip()
+    
+    return {
+        "job": job_name,
+        "job_level": craft_data['job_level'],
+        "ingredients": ingredients_list
+    }
+
 def save_craft_json(all_crafts_data):
     """Sauvegarde les recettes en format JSON"""
     craft_json = {}
     
     for craft_data in all_crafts_data:
-        item_name = craft_data['item_name']
-        
-        if craft_data['has_recipe'] and craft_data['ingredients']:
-            # Créer la liste des ingrédients sous forme de tuples (id, nom, quantité)
-            ingredients_list = []
-            for ingredient in craft_data['ingredients']:
-                ingredients_list.append([
-                    ingredient['ingredient_id'],
-                    ingredient['ingredient_name'],
-                    ingredient['quantity']
-                ])
-            
-            # Nettoie le nom du métier (enlève "Niveau" s'il y en a)
-            job_name = craft_data['job']
-            if job_name and job_name.endswith('Niveau'):
-                job_name = job_name.replace('Niveau', '').strip()
-            
-            craft_json[item_name] = {
-                "job": job_name,
-                "job_level": craft_data['job_level'],
-                "ingredients": ingredients_list
-            }
+        entry = craft_json_entry(craft_data)
+        if entry is not None:
+            craft_json[craft_data['item_name']] = entry
     
     # Sauvegarde le JSON
     json_file = "touch_database/data/craft_detailed.json"
@@ -283,6 +306,58 @@ def save_craft_json(all_crafts_data):
     
     return craft_json
 
+def csv_value(column, value):
+    """Formate une valeur comme DataFrame.to_csv le faisait"""
+    if value is None:
+        return ''
+    if column in FLOAT_COLUMNS:
+        return float(value)
+    return value
+
+def stream_crafts(crafts, csv_file, json_file):
+    """Écrit chaque recette dès qu'elle est parsée dans le CSV et le JSON, sans la garder en mémoire"""
+    stats = {'total': 0, 'with_recipe': 0, 'json_entries': 0, 'jobs': {}}
+    
+    # Fichiers temporaires : une extraction interrompue ne remplace pas les sorties précédentes
+    csv_tmp = f"{csv_file}.tmp"
+    json_tmp = f"{json_file}.tmp"
+    with open(csv_tmp, 'w', encoding='utf-8', newline='') as csv_handle, open(json_tmp, 'w', encoding='utf-8') as json_handle:
+        writer = csv.writer(csv_handle, lineterminator='\n')
+        writer.writerow(CRAFT_COLUMNS)
+        json_handle.write('{')
+        
+        for craft_data in crafts:
+            for row in iter_craft_rows(craft_data):
+                writer.writerow([csv_value(column, row[column]) for column in CRAFT_COLUMNS])
+            
+            entry = craft_json_entry(craft_data)
+            if entry is not None:
+                # Même rendu que json.dump(indent=2), une entrée à la fois
+                # (un nom en double réapparaît : json.load garde la dernière valeur, comme avant)
+                separator = ',' if stats['json_entries'] else ''
+                key = json.dumps(craft_data['item_name'], ensure_ascii=False)
+                value = json.dumps(entry, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                json_handle.write(f'{separator}\n  {key}: {value}')
+                stats['json_entries'] += 1
+            
+            stats['total'] += 1
+            if craft_data['has_recipe']:
+                stats['with_recipe'] += 1
+                if craft_data['job']:
+                    stats['jobs'][craft_data['job']] = stats['jobs'].get(craft_data['job'], 0) + 1
+        
+        json_handle.write('\n}' if stats['json_entries'] else '}')
+    
+    os.replace(csv_tmp, csv_file)
+    os.replace(json_tmp, json_file)
+    return stats
+
+def iter_all_crafts():
+    """Enchaîne les catégories sans matérialiser la liste complète des recettes"""
+    for category in CATEGORIES:
+        with stage(category):
+            yield from iter_category_crafts(category)
+
 def main():
     """Fonction principale pour extraire toutes les données de craft"""
     print("🚀 Début de l'extraction des données de craft...")
@@ -290,46 +365,27 @@ def main():
     # Crée le dossier de sortie
     os.makedirs("touch_database/data", exist_ok=True)
     
-    all_crafts_data = []
-    
-    # Traite chaque catégorie
-    for category in CATEGORIES:
-        category_data = process_category_crafts(category)
-        all_crafts_data.extend(category_data)
-    
-    print(f"\n📊 Total: {len(all_crafts_data)} items traités")
-    
-    # Compte les items avec et sans recette
-    with_recipe = sum(1 for item in all_crafts_data if item['has_recipe'])
-    without_recipe = len(all_crafts_data) - with_recipe
-    
-    print(f"🍳 Items avec recette: {with_recipe}")
-    print(f"📦 Items sans recette: {without_recipe}")
-    
-    # Sauvegarde les données détaillées
-    flattened_data = flatten_craft_data(all_crafts_data)
-    df_detailed = pd.DataFrame(flattened_data)
+    # Chaque page parsée part directement dans les fichiers : mémoire constante quelle que soit la taille du corpus
     detailed_file = "touch_database/data/craft_detailed.csv"
-    df_detailed.to_csv(detailed_file, index=False)
-    print(f"📄 Données détaillées sauvegardées: {detailed_file}")
+    json_file = "touch_database/data/craft_detailed.json"
+    stats = stream_crafts(iter_all_crafts(), detailed_file, json_file)
     
-    # Sauvegarde le JSON détaillé
-    save_craft_json(all_crafts_data)
+    print(f"\n📊 Total: {stats['total']} items traités")
+    print(f"🍳 Items avec recette: {stats['with_recipe']}")
+    print(f"📦 Items sans recette: {stats['total'] - stats['with_recipe']}")
+    print(f"📄 Données détaillées sauvegardées: {detailed_file}")
+    print(f"📄 JSON détaillé sauvegardé: {json_file}")
+    print(f"📊 {stats['json_entries']} recettes écrites dans le JSON")
     
     # Statistiques par métier
-    jobs_stats = {}
-    for item in all_crafts_data:
-        if item['has_recipe'] and item['job']:
-            job = item['job']
-            if job not in jobs_stats:
-                jobs_stats[job] = 0
-            jobs_stats[job] += 1
-    
     print(f"\n📈 Statistiques par métier:")
-    for job, count in sorted(jobs_stats.items()):
+    for job, count in sorted(stats['jobs'].items()):
         print(f"  {job}: {count} recettes")
     
     print(f"\n🎉 Extraction terminée!")
 
 if __name__ == "__main__":
-    main()
+    try:
+        run_stage("craft_data_extractor", main)
+    finally:
+        METRICS.report("craft_data_extractor")
@@ -0,0 +1,160 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from item_registry import ItemRegistry
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+CRAFT_GRAPH_DIR = DATA_DIR / "binary" / "craft"
+
+ARRAY_NAMES = ["item_ids", "indptr", "indices", "quantities", "reverse_indptr", "reverse_indices", "reverse_quantities"]
+MAX_BOM_DEPTH = 32
+
+
+def to_csr(rows: np.ndarray, columns: np.ndarray, values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(size + 1, dtype=np.int32)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, columns[order].astype(np.int32), values[order].astype(np.int32)
+
+
+def build_craft_graph(registry: ItemRegistry) -> dict[str, np.ndarray]:
+    # Nœuds = lignes du registre (mêmes indices que la table binaire d'items)
+    with (JSON_DIR / "craft_by_id.json").open(encoding="utf-8") as file:
+        craft_by_id = json.load(file)
+
+    crafted, ingredients, quantities = [], [], []
+    for item_id, recipe in craft_by_id.items():
+        if not recipe["has_recipe"] or int(item_id) not in registry:
+            continue
+        row = registry.row(int(item_id))
+        for ingredient_id, quantity in zip(recipe["ingredient_ids"], recipe["quantities"]):
+            if ingredient_id in registry:
+                crafted.append(row)
+                ingredients.append(registry.row(ingredient_id))
+                quantities.append(quantity)
+
+    crafted_rows = np.asarray(crafted, dtype=np.int32)
+    ingredient_rows = np.asarray(ingredients, dtype=np.int32)
+    quantity_values = np.asarray(quantities, dtype=np.int32)
+    indptr, indices, values = to_csr(crafted_rows, ingredient_rows, quantity_values, len(registry))
+    reverse_indptr, reverse_indices, reverse_values = to_csr(ingredient_rows, crafted_rows, quantity_values, len(registry))
+    return {
+        "item_ids": registry.ids.astype(np.int32),
+        "indptr": indptr,
+        "indices": indices,
+        "quantities": values,
+        "reverse_indptr": reverse_indptr,
+        "reverse_indices": reverse_indices,
+        "reverse_quantities": reverse_values,
+    }
+
+
+def save_craft_graph(graph: dict[str, np.ndarray], directory: Path = CRAFT_GRAPH_DIR) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(directory / f"{name}.npy", graph[name])
+    print(f"💾 Graphe de craft sauvegardé: {directory} ({len(graph['indices'])} arêtes)")
+
+
+class CraftGraph:
+    def __init__(self, directory: Path = CRAFT_GRAPH_DIR):
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        self.item_ids = arrays["item_ids"]
+        size = len(self.item_ids)
+        # Matrice recette -> ingrédients (ligne = item crafté) et sa transposée pour "utilisé dans"
+        self.recipes = sparse.csr_matrix((arrays["quantities"], arrays["indices"], arrays["indptr"]), shape=(size, size))
+        self.uses = sparse.csr_matrix(
+            (arrays["reverse_quantities"], arrays["reverse_indices"], arrays["reverse_indptr"]), shape=(size, size)
+        )
+        self.craftable = np.diff(arrays["indptr"]) > 0
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def row(self, item_id: int) -> int:
+        row = int(np.searchsorted(self.item_ids, item_id))
+        if row >= len(self.item_ids) or self.item_ids[row] != item_id:
+            raise KeyError(item_id)
+        return row
+
+    def vector(self, quantities: dict[int, float]) -> np.ndarray:
+        vector = np.zeros(len(self), dtype=np.float64)
+        for item_id, quantity in quantities.items():
+            vector[self.row(item_id)] += quantity
+        return vector
+
+    def ingredients(self, item_id: int) -> dict[int, int]:
+        recipe = self.recipes.getrow(self.row(item_id))
+        return {int(self.item_ids[column]): int(quantity) for column, quantity in zip(recipe.indices, recipe.data)}
+
+    def where_used(self, item_id: int) -> dict[int, int]:
+        uses = self.uses.getrow(self.row(item_id))
+        return {int(self.item_ids[column]): int(quantity) for column, quantity in zip(uses.indices, uses.data)}
+
+    def bill_of_materials(self, targets: np.ndarray) -> np.ndarray:
+        # Déplie les recettes niveau par niveau : un produit matrice-vecteur par profondeur
+        pending = targets.astype(np.float64)
+        base = np.zeros_like(pending)
+        for _ in range(MAX_BOM_DEPTH):
+            base += np.where(self.craftable, 0.0, pending)
+            pending = self.recipes.T @ np.where(self.craftable, pending, 0.0)
+            if not pending.any():
+                return base
+        raise ValueError(f"Recettes cycliques ou plus profondes que {MAX_BOM_DEPTH} niveaux")
+
+    def bom(self, quantities: dict[int, float]) -> dict[int, float]:
+        base = self.bill_of_materials(self.vector(quantities))
+        return {int(self.item_ids[row]): float(base[row]) for row in np.flatnonzero(base)}
+
+    def recipe_costs(self, prices: np.ndarray) -> np.ndarray:
+        # Coût d'un craft au prix des ingrédients directs, pour tous les items d'un coup
+        return self.recipes @ prices
+
+    def full_costs(self, prices: np.ndarray) -> np.ndarray:
+        # Coût en ressources de base : BOM de chaque item craftable exprimée en prix
+        costs = prices.astype(np.float64).copy()
+        for _ in range(MAX_BOM_DEPTH):
+            updated = np.where(self.craftable, self.recipes @ costs, prices)
+            if np.allclose(updated, costs):
+                return updated
+            costs = updated
+        raise ValueError(f"Recettes cycliques ou plus profondes que {MAX_BOM_DEPTH} niveaux")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge le graphe de craft binaire (CSR).")
+    parser.add_argument("--bom", type=int, help="Affiche les ressources de base nécessaires pour un ID d'item.")
+    parser.add_argument("--where-used", type=int, help="Affiche les recettes utilisant un ID d'item.")
+    parser.add_argument("--quantity", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.bom is None and args.where_used is None:
+        save_craft_graph(build_craft_graph(ItemRegistry.load()))
+        return
+
+    started = time.perf_counter()
+    graph = CraftGraph()
+    if args.bom is not None:
+        result = graph.bom({args.bom: args.quantity})
+    else:
+        result = graph.where_used(args.where_used)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for item_id, quantity in sorted(result.items(), key=lambda entry: -entry[1]):
+        print(f"{quantity:>10g}  {item_id}")
+    print(f"⏱️ {len(result)} items en {elapsed_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    run_stage("craft_graph", main)
@@ -0,0 +1,125 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from craft_graph import CraftGraph
+from item_registry import ItemRegistry
+from profiling import run_stage
+
+
+class CraftSolver:
+    # Combien de fois chaque recette peut être craftée avec un stock donné, toutes les recettes d'un coup
+    def __init__(self, graph: CraftGraph | None = None):
+        self.graph = graph or CraftGraph()
+        # Copie en int64 avec les ingrédients répétés dans une recette fusionnés (une arête par ingrédient)
+        self.recipes = self.graph.recipes.astype(np.int64)
+        self.recipes.sum_duplicates()
+        self.indptr = self.recipes.indptr.astype(np.int64)
+        self.indices = self.recipes.indices.astype(np.int64)
+        self.quantities = self.recipes.data
+        self.recipe_rows = np.flatnonzero(self.graph.craftable)
+
+    def stock_vector(self, inventory: dict[int, int]) -> np.ndarray:
+        stock = np.zeros(len(self.graph), dtype=np.int64)
+        for item_id, quantity in inventory.items():
+            stock[self.graph.row(item_id)] += quantity
+        return stock
+
+    def direct_counts(self, stock: np.ndarray) -> np.ndarray:
+        # min sur les ingrédients de floor(stock / quantité), par segment CSR (reduceat sur les lignes non vides)
+        ratios = stock[self.indices] // self.quantities
+        counts = np.zeros(len(self.graph), dtype=np.int64)
+        if len(self.recipe_rows):
+            counts[self.recipe_rows] = np.minimum.reduceat(ratios, self.indptr[self.recipe_rows])
+        return counts
+
+    def feasible(self, rows: np.ndarray, crafts: np.ndarray, stock: np.ndarray) -> np.ndarray:
+        # crafts[k] exemplaires de la recette rows[k] avec un niveau de craft intermédiaire :
+        # le manque sur un ingrédient est crafté depuis le stock, qui doit couvrir usage direct + sous-recettes
+        recipes = self.recipes[rows]
+        edge_rows = np.repeat(np.arange(len(rows)), np.diff(recipes.indptr))
+        needed = crafts[edge_rows] * recipes.data
+        used = np.minimum(needed, stock[recipes.indices])
+        missing = needed - used
+
+        ok = np.ones(len(rows), dtype=bool)
+        uncraftable = (missing > 0) & ~self.graph.craftable[recipes.indices]
+        ok[edge_rows[uncraftable]] = False
+
+        shape = (len(rows), len(self.graph))
+        direct = sparse.csr_matrix((used, recipes.indices, recipes.indptr), shape=shape)
+        deficit = sparse.csr_matrix((missing, recipes.indices, recipes.indptr), shape=shape)
+        demand = (direct + deficit @ self.recipes).tocoo()
+        over = demand.data > stock[demand.col]
+        ok[demand.row[over]] = False
+        return ok
+
+    def craftable_counts(self, stock: np.ndarray, intermediate: bool = False) -> np.ndarray:
+        counts = self.direct_counts(stock)
+        if not intermediate:
+            return counts
+
+        # Borne haute optimiste : chaque ingrédient compte son stock + ce qu'on peut en crafter seul
+        optimistic = (stock + counts)[self.indices] // self.quantities
+        upper = np.zeros_like(counts)
+        if len(self.recipe_rows):
+            upper[self.recipe_rows] = np.minimum.reduceat(optimistic, self.indptr[self.recipe_rows])
+
+        # Recherche dichotomique vectorisée entre le compte direct (faisable) et la borne optimiste
+        low, high = counts.copy(), upper
+        active = np.flatnonzero(high > low)
+        while len(active):
+            middle = (low[active] + high[active] + 1) // 2
+            ok = self.feasible(active, middle, stock)
+            low[active[ok]] = middle[ok]
+            high[active[~ok]] = middle[~ok] - 1
+            active = active[high[active] > low[active]]
+        return low
+
+    def craftable(self, inventory: dict[int, int], intermediate: bool = False) -> dict[int, int]:
+        counts = self.craftable_counts(self.stock_vector(inventory), intermediate)
+        return {int(self.graph.item_ids[row]): int(counts[row]) for row in np.flatnonzero(counts)}
+
+
+def load_inventory(path: Path, registry: ItemRegistry) -> dict[int, int]:
+    # Inventaire JSON {"ID ou nom": quantité}, format des exports de ressources de l'UI
+    with path.open(encoding="utf-8") as file:
+        raw = json.load(file)
+    inventory: dict[int, int] = {}
+    for key, quantity in raw.items():
+        item_id = int(key) if str(key).isdigit() else registry.resolve(key)
+        if item_id is None or item_id not in registry:
+            print(f"⚠️ Item inconnu ignoré: {key}")
+            continue
+        inventory[item_id] = inventory.get(item_id, 0) + int(quantity)
+    return inventory
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Liste les recettes réalisables avec un inventaire donné.")
+    parser.add_argument("inventory", type=Path, help="Fichier JSON {\"ID ou nom\": quantité}.")
+    parser.add_argument("--intermediate", action="store_true", help="Autorise un niveau de craft intermédiaire.")
+    parser.add_argument("--limit", type=int, default=30)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    registry = ItemRegistry.load()
+    inventory = load_inventory(args.inventory, registry)
+    solver = CraftSolver()
+
+    started = time.perf_counter()
+    result = solver.craftable(inventory, intermediate=args.intermediate)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for item_id, count in sorted(result.items(), key=lambda entry: -entry[1])[: args.limit]:
+        print(f"{count:>8}x  {registry.names[registry.row(item_id)]} ({item_id})")
+    print(f"⏱️ {len(result)} recettes réalisables en {elapsed_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    run_stage("craft_solver", main)
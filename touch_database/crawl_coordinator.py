@@ -0,0 +1,324 @@
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import urlparse
+
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+# Fichier local partagé par tous les workers de la machine (SQLite ne se partage pas sur un montage réseau)
+COORDINATOR_DB = Path(os.environ.get("DOFUS_CRAWL_DB", ROOT_DIR / "runs" / "crawl.sqlite"))
+
+# Une tâche réclamée par un worker mort redevient disponible après ce délai ; un worker vivant
+# renouvelle ses baux avant chaque tâche et chaque requête (heartbeat), même pendant une longue pause
+LEASE_SECONDS = 300.0
+RENEW_EVERY = LEASE_SECONDS / 4
+CLAIM_BATCH = 16
+
+SHARD_PATTERN = re.compile(r"(\d+)/(\d+)")
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    match = SHARD_PATTERN.fullmatch(value.strip())
+    if not match or not 0 <= int(match.group(1)) < int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"Shard invalide: {value} (ex: 0/4, de 0 à N-1)")
+    return int(match.group(1)), int(match.group(2))
+
+
+def in_shard(key: str, shard: tuple[int, int] | None) -> bool:
+    # crc32 et non hash() : même découpage dans tous les processus et sur toutes les machines
+    return shard is None or zlib.crc32(key.encode("utf-8")) % shard[1] == shard[0]
+
+
+def shard_label(shard: tuple[int, int]) -> str:
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+
+def url_host(url: str) -> str:
+    return urlparse(url).netloc
+
+
+class Coordinator:
+    # File de travail et budget de requêtes par hôte, partagés entre processus via SQLite (WAL)
+    def __init__(self, path: Path = COORDINATOR_DB, worker: str | None = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()
+        # Baux détenus par ce worker, par file : renouvelés par keep_alive
+        self.held: dict[str, set[str]] = {}
+        self.renewed_at = time.monotonic()
+        # Transactions explicites (BEGIN IMMEDIATE) : le verrou d'écriture est pris avant de lire l'état
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "queue TEXT NOT NULL, key TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', worker TEXT, lease_until REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (queue, key))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, interval REAL NOT NULL, next_slot REAL NOT NULL)"
+        )
+
+    def transaction(self, statements) -> list:
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(self.connection)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+        return result
+
+    def set_budget(self, host: str, requests_per_second: float | None) -> None:
+        def update(connection: sqlite3.Connection) -> None:
+            if not requests_per_second:
+                connection.execute("DELETE FROM hosts WHERE host = ?", (host,))
+                return
+            connection.execute(
+                "INSERT INTO hosts (host, interval, next_slot) VALUES (?, ?, 0) "
+                "ON CONFLICT(host) DO UPDATE SET interval = excluded.interval",
+                (host, 1.0 / requests_per_second),
+            )
+
+        self.transaction(update)
+
+    def throttle(self, url: str) -> float:
+        # Même principe que RequestLimiter (jobs_scraper) mais le prochain créneau vit dans la base :
+        # tous les workers de la machine se partagent un seul budget pour l'hôte
+        host = url_host(url)
+
+        def reserve(connection: sqlite3.Connection) -> float:
+            row = connection.execute("SELECT interval, next_slot FROM hosts WHERE host = ?", (host,)).fetchone()
+            if row is None:
+                return 0.0
+            now = time.time()
+            slot = max(now, row[1])
+            connection.execute("UPDATE hosts SET next_slot = ? WHERE host = ?", (slot + row[0], host))
+            return slot - now
+
+        wait = self.transaction(reserve)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def enqueue(self, queue: str, tasks: list[tuple[str, dict]], fresh: bool = False) -> int:
+        # Idempotent : chaque worker peut publier la même liste, seul le premier insère réellement.
+        # Les tâches terminées le restent d'un run à l'autre ; fresh les remet en file (nouvelle passe)
+        def insert(connection: sqlite3.Connection) -> int:
+            before = connection.total_changes
+            if fresh:
+                connection.execute(
+                    "UPDATE tasks SET status = 'pending', worker = NULL, lease_until = NULL "
+                    "WHERE queue = ? AND status IN ('done', 'failed')",
+                    (queue,),
+                )
+            connection.executemany(
+                "INSERT OR IGNORE INTO tasks (queue, key, payload) VALUES (?, ?, ?)",
+                [(queue, key, json.dumps(payload, ensure_ascii=False)) for key, payload in tasks],
+            )
+            return connection.total_changes - before
+
+        return self.transaction(insert)
+
+    def claim(self, queue: str, limit: int = CLAIM_BATCH, lease: float = LEASE_SECONDS) -> list[tuple[str, dict]]:
+        def take(connection: sqlite3.Connection) -> list[tuple[str, dict]]:
+            now = time.time()
+            rows = connection.execute(
+                "SELECT key, payload FROM tasks WHERE queue = ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_until < ?)) ORDER BY rowid LIMIT ?",
+                (queue, now, limit),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE queue = ? AND key = ?",
+                [(self.worker, now + lease, queue, key) for key, _ in rows],
+            )
+            return [(key, json.loads(payload)) for key, payload in rows]
+
+        tasks = self.transaction(take)
+        self.held.setdefault(queue, set()).update(key for key, _ in tasks)
+        return tasks
+
+    def update_owned(self, queue: str, keys: list[str], statement: str, values: tuple) -> list[str]:
+        # Applique la mise à jour aux tâches encore détenues ; renvoie les clés reprises par un autre worker
+        def update(connection: sqlite3.Connection) -> list[str]:
+            lost = []
+            for key in keys:
+                cursor = connection.execute(
+                    f"UPDATE tasks SET {statement} WHERE queue = ? AND key = ? AND worker = ? AND status = 'leased'",
+                    (*values, queue, key, self.worker),
+                )
+                if cursor.rowcount == 0:
+                    lost.append(key)
+            return lost
+
+        return self.transaction(update) if keys else []
+
+    def forget(self, queue: str, keys) -> None:
+        self.held.get(queue, set()).difference_update(keys)
+
+    def heartbeat(self, queue: str, keys: list[str] | None = None, lease: float = LEASE_SECONDS) -> list[str]:
+        # Prolonge le bail des tâches (toutes celles détenues par défaut) ; les tâches perdues ne sont plus à traiter
+        keys = sorted(self.held.get(queue, ())) if keys is None else keys
+        lost = self.update_owned(queue, keys, "lease_until = ?", (time.time() + lease,))
+        self.forget(queue, lost)
+        return lost
+
+    def keep_alive(self) -> None:
+        if time.monotonic() - self.renewed_at < RENEW_EVERY:
+            return
+        self.renewed_at = time.monotonic()
+        for queue in list(self.held):
+            self.heartbeat(queue)
+
+    def drain(self, queue: str, limit: int = CLAIM_BATCH):
+        claimed = 0
+        while True:
+            tasks = self.claim(queue, limit)
+            if not tasks:
+                counts = self.status().get(queue, {})
+                if not claimed and (counts.get("done") or counts.get("failed")):
+                    detail = ", ".join(f"{status}: {count}" for status, count in counts.items())
+                    print(f"ℹ️ File {queue} déjà traitée ({detail}) : relancer avec --fresh pour une nouvelle passe")
+                return
+            claimed += len(tasks)
+            yield tasks
+
+    def complete(self, queue: str, keys: list[str], status: str = "done") -> list[str]:
+        lost = self.update_owned(queue, keys, "status = ?, lease_until = NULL", (status,))
+        self.forget(queue, keys)
+        if lost:
+            # Bail expiré puis tâche réclamée ailleurs : le résultat de l'autre worker fait foi
+            print(f"⚠️ {len(lost)} tâches de {queue} reprises par un autre worker (bail expiré): {', '.join(map(str, lost[:5]))}")
+        return lost
+
+    def release(self, queue: str, keys: list[str]) -> None:
+        self.update_owned(queue, keys, "status = 'pending', worker = NULL, lease_until = NULL", ())
+        self.forget(queue, keys)
+
+    def reset(self, queue: str, statuses: tuple[str, ...] = ("failed",)) -> int:
+        def update(connection: sqlite3.Connection) -> int:
+            placeholders = ", ".join("?" for _ in statuses)
+            return connection.execute(
+                f"UPDATE tasks SET status = 'pending', worker = NULL, lease_until = NULL "
+                f"WHERE queue = ? AND status IN ({placeholders})",
+                (queue, *statuses),
+            ).rowcount
+
+        return self.transaction(update)
+
+    def status(self) -> dict[str, dict[str, int]]:
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT queue, status, COUNT(*) FROM tasks GROUP BY queue, status ORDER BY queue, status"
+            ).fetchall()
+        report: dict[str, dict[str, int]] = {}
+        for queue, status, count in rows:
+            report.setdefault(queue, {})[status] = count
+        return report
+
+    def budgets(self) -> dict[str, float]:
+        with self.lock:
+            rows = self.connection.execute("SELECT host, interval FROM hosts ORDER BY host").fetchall()
+        return {host: 1.0 / interval for host, interval in rows}
+
+
+# Coordinateur du processus courant, branché par les scrapers (--shard, --queue, --budget)
+COORDINATOR: Coordinator | None = None
+
+
+def attach(path: Path = COORDINATOR_DB, worker: str | None = None) -> Coordinator:
+    global COORDINATOR
+    if COORDINATOR is None or COORDINATOR.path != path:
+        COORDINATOR = Coordinator(path, worker)
+    return COORDINATOR
+
+
+def throttle(url: str) -> None:
+    # Sans coordinateur branché, aucun budget partagé : comportement historique
+    if COORDINATOR is not None:
+        COORDINATOR.throttle(url)
+        COORDINATOR.keep_alive()
+
+
+def pause(seconds: float) -> None:
+    # time.sleep qui garde les baux en vie : une pause de rate limit peut dépasser LEASE_SECONDS
+    deadline = time.monotonic() + seconds
+    while (remaining := deadline - time.monotonic()) > 0:
+        time.sleep(min(remaining, RENEW_EVERY))
+        if COORDINATOR is not None:
+            COORDINATOR.keep_alive()
+
+
+def add_worker_args(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--shard", type=parse_shard, help="Ne traite que la part i/N des URLs (découpage stable par ID).")
+    group.add_argument(
+        "--queue",
+        type=Path,
+        nargs="?",
+        const=COORDINATOR_DB,
+        help=f"Se branche sur la file SQLite partagée (défaut: {COORDINATOR_DB}). Les tâches terminées ne sont pas refaites.",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Avec --queue : remet en file les tâches déjà terminées (à passer à un seul worker).",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="Budget global de requêtes/seconde vers l'hôte, partagé par tous les workers de la machine.",
+    )
+    parser.add_argument("--worker", help="Nom du worker dans la file (défaut: hôte-pid).")
+
+
+def attach_from_args(args: argparse.Namespace, base_url: str) -> Coordinator | None:
+    if args.queue is None and args.shard is None and args.budget is None:
+        return None
+    coordinator = attach(args.queue or COORDINATOR_DB, args.worker)
+    if args.budget is not None:
+        coordinator.set_budget(url_host(base_url), args.budget)
+    return coordinator
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspecte la file de crawl partagée et les budgets par hôte.")
+    parser.add_argument("command", choices=["status", "budget", "reset"])
+    parser.add_argument("target", nargs="?", help="budget: hôte (ex: www.dofus-touch.com), reset: nom de la file.")
+    parser.add_argument("value", nargs="?", type=float, help="budget: requêtes/seconde (0 pour retirer la limite).")
+    parser.add_argument("--all", action="store_true", help="reset: remet aussi en file les tâches terminées.")
+    parser.add_argument("--db", type=Path, default=COORDINATOR_DB)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    coordinator = Coordinator(args.db)
+    if args.command == "budget" and args.target:
+        coordinator.set_budget(args.target, args.value)
+    elif args.command == "reset" and args.target:
+        statuses = ("failed", "done", "leased") if args.all else ("failed",)
+        print(f"🔁 {coordinator.reset(args.target, statuses)} tâches remises en file dans {args.target}")
+        return
+
+    for host, requests_per_second in coordinator.budgets().items():
+        print(f"🚦 {host}: {requests_per_second:g} requêtes/s")
+    for queue, counts in coordinator.status().items():
+        detail = ", ".join(f"{status}: {count}" for status, count in counts.items())
+        print(f"  {queue:<24} {detail}")
+
+
+if __name__ == "__main__":
+    run_stage("crawl_coordinator", main)
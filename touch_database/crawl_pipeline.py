@@ -0,0 +1,196 @@
+import argparse
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from cache_manager import mark_used
+from craft_data_extractor import CATEGORIES, extract_recipe_from_html, stream_crafts
+from deep_database_scraper import (
+    CATEGORIES_MAP,
+    DEEP_HTML_DIR,
+    HTML_DIR,
+    ROOT_DIR,
+    extract_item_urls_from_html,
+    fetch_item_page_if_missing,
+)
+from metrics import METRICS
+from profiling import run_stage
+
+
+# Mêmes dossiers que le fetcher (deep_database_scraper) : la page écrite est celle relue au parse
+DATA_DIR = ROOT_DIR / "data"
+
+DEFAULT_FETCH_WORKERS = 1
+DEFAULT_QUEUE_SIZE = 64
+PUT_TIMEOUT = 0.5
+
+# Marqueur de fin de flux entre deux étages
+DONE = object()
+
+
+class Pipeline:
+    # liste -> fetch_queue -> fetchers -> parse_queue -> pool de parse -> result_queue -> writers
+    # Files bornées : un étage rapide attend l'étage lent au lieu de tout charger en mémoire
+    def __init__(self, categories: list[str], fetch_workers: int, parse_workers: int, queue_size: int):
+        self.categories = categories
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.fetch_queue: queue.Queue = queue.Queue(queue_size)
+        self.parse_queue: queue.Queue = queue.Queue(queue_size)
+        self.result_queue: queue.Queue = queue.Queue(queue_size)
+        self.stop = threading.Event()
+        self.discovered = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def put(self, target: queue.Queue, item) -> bool:
+        while not self.stop.is_set():
+            try:
+                target.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, source: queue.Queue):
+        while not self.stop.is_set():
+            try:
+                return source.get(timeout=PUT_TIMEOUT)
+            except queue.Empty:
+                continue
+        return DONE
+
+    def list_pages(self) -> None:
+        seen: set[tuple[str, str]] = set()
+        try:
+            for category in self.categories:
+                for page in range(1, CATEGORIES_MAP[category] + 1):
+                    html_file = HTML_DIR / category / f"{category}_page_{page}.html"
+                    if not html_file.exists():
+                        print(f"⚠️ Fichier manquant: {html_file}")
+                        continue
+                    mark_used(html_file)
+                    with METRICS.timer("parse", stage="list"):
+                        items = extract_item_urls_from_html(html_file.read_text(encoding="utf-8"), category)
+                    for item in items:
+                        key = (category, item["item_id"])
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        with self.lock:
+                            self.discovered += 1
+                        if not self.put(self.fetch_queue, (category, item["item_id"], item["item_name_slug"])):
+                            return
+        finally:
+            for _ in range(self.fetch_workers):
+                self.put(self.fetch_queue, DONE)
+
+    def fetch(self) -> None:
+        try:
+            while not self.stop.is_set():
+                task = self.get(self.fetch_queue)
+                if task is DONE:
+                    return
+                category, item_id, item_slug = task
+                if not fetch_item_page_if_missing(category, item_id, item_slug):
+                    with self.lock:
+                        self.failed += 1
+                    continue
+                if not self.put(self.parse_queue, task):
+                    return
+        finally:
+            self.put(self.parse_queue, DONE)
+
+    def dispatch(self, executor: ProcessPoolExecutor) -> None:
+        # Soumet au pool dans l'ordre d'arrivée ; la taille de result_queue borne le travail en vol
+        remaining_fetchers = self.fetch_workers
+        try:
+            while remaining_fetchers and not self.stop.is_set():
+                task = self.get(self.parse_queue)
+                if task is DONE:
+                    remaining_fetchers -= 1
+                    continue
+                if not self.put(self.result_queue, executor.submit(parse_item_page, *task)):
+                    return
+        finally:
+            self.put(self.result_queue, DONE)
+
+    def results(self):
+        written = 0
+        while True:
+            future: Future = self.result_queue.get()
+            if future is DONE:
+                break
+            try:
+                craft_data = future.result()
+            except Exception as e:
+                METRICS.inc("errors", stage="pipeline")
+                print(f"❌ Erreur de parse: {e}")
+                continue
+            written += 1
+            METRICS.progress(written, max(self.discovered, written), "pipeline")
+            yield craft_data
+        METRICS.progress(written, written, "pipeline", force=True)
+
+    def run(self, csv_file: Path, json_file: Path) -> dict:
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+            threads = [threading.Thread(target=self.list_pages, name="list", daemon=True)]
+            threads.extend(
+                threading.Thread(target=self.fetch, name=f"fetch-{index}", daemon=True) for index in range(self.fetch_workers)
+            )
+            threads.append(threading.Thread(target=self.dispatch, args=(executor,), name="dispatch", daemon=True))
+            for thread in threads:
+                thread.start()
+            try:
+                # Le thread principal est l'étage d'écriture (CSV + JSON en flux)
+                return stream_crafts(self.results(), csv_file, json_file)
+            finally:
+                self.stop.set()
+                for thread in threads:
+                    thread.join()
+
+
+def parse_item_page(category: str, item_id: str, item_slug: str) -> dict:
+    html_file = DEEP_HTML_DIR / category / f"{item_id}_{item_slug}.html"
+    craft_data = extract_recipe_from_html(html_file.read_text(encoding="utf-8"), item_id, item_slug)
+    craft_data["category"] = category
+    return craft_data
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Crawl et extraction des recettes en pipeline : listes, téléchargements et parse en parallèle."
+    )
+    parser.add_argument("--category", action="append", dest="categories", choices=CATEGORIES)
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=DEFAULT_FETCH_WORKERS,
+        help="Téléchargements simultanés (1 = même politesse que deep_database_scraper).",
+    )
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1, help="Processus de parse HTML.")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="Taille des files entre étages.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    pipeline = Pipeline(args.categories or CATEGORIES, args.fetch_workers, args.parse_workers, args.queue_size)
+    csv_file = DATA_DIR / "craft_detailed.csv"
+    json_file = DATA_DIR / "craft_detailed.json"
+    stats = pipeline.run(csv_file, json_file)
+
+    print(f"\n📊 Total: {stats['total']} items traités ({pipeline.discovered} découverts, {pipeline.failed} échecs)")
+    print(f"🍳 Items avec recette: {stats['with_recipe']}")
+    print(f"📄 Données détaillées sauvegardées: {csv_file}")
+    print(f"📄 JSON détaillé sauvegardé: {json_file}")
+
+
+if __name__ == "__main__":
+    try:
+        run_stage("crawl_pipeline", main)
+    finally:
+        METRICS.report("crawl_pipeline")
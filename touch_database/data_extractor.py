@@ -1,6 +1,8 @@
 import pandas as pd
 import os
 from bs4 import BeautifulSoup
+from metrics import METRICS
+from profiling import run_stage, stage
 
 CATEGORIES_MAP = {
     "armes": 30,
@@ -57,9 +59,12 @@ def process_category(category: str, num_pages: int):
         with open(filename, 'r', encoding='utf-8') as f:
             html_content = f.read()
         
-        page_data = extract_table_data(html_content)
+        with METRICS.timer("parse", stage=category):
+            page_data = extract_table_data(html_content)
         all_data.extend(page_data)
-        print(f"✓ Page {page}: {len(page_data)} éléments extraits")
+        METRICS.inc("pages", stage=category)
+        METRICS.inc("rows", len(page_data), stage=category)
+        METRICS.progress(page, num_pages, category)
     
     # Sauvegarde en CSV
     if all_data:
@@ -81,11 +86,20 @@ def merge_data():
     merged_df = pd.concat([armes_df, consommables_df, equipements_df, ressources_df])
     merged_df.to_csv('touch_database/data/merged.csv', index=False)
 
-if __name__ == "__main__":
+def main():
     for category, num_pages in CATEGORIES_MAP.items():
         print(f"\n🔄 Extraction de {category} ({num_pages} pages)...")
-        process_category(category, num_pages)
+        with stage(category):
+            process_category(category, num_pages)
+
+    with stage("merge"):
+        merge_data()
 
-    merge_data()
+
+if __name__ == "__main__":
+    try:
+        run_stage("data_extractor", main)
+    finally:
+        METRICS.report("data_extractor")
 
 
@@ -1,6 +1,13 @@
 import os
 from pathlib import Path
 import requests
+from cache_integrity import validate_page
+from cache_manager import mark_used
+from metrics import METRICS
+from profiling import run_stage, stage
+
+# Surchargeable pour rejouer le cache via replay_server.py au lieu du site réel
+BASE_URL = os.environ.get("DOFUS_TOUCH_BASE_URL", "https://www.dofus-touch.com")
 
 CATEGORIES_MAP = {
     "armes": 30,
@@ -15,19 +22,31 @@ def fetch_page_if_missing(category: str, page: int) -> str:
     
     # Si le fichier existe, on le lit
     if os.path.exists(filename):
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage=category)
+        mark_used(filename)
         return True
     
     # Sinon on le télécharge
+    METRICS.inc("cache_misses", stage=category)
     print(f"📥 Téléchargement: {filename}")
-    url = f"https://www.dofus-touch.com/fr/mmorpg/encyclopedie/{category}?page={page}"
+    url = f"{BASE_URL}/fr/mmorpg/encyclopedie/{category}?page={page}"
     
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
     
-    response = requests.get(url, headers=headers)
+    METRICS.inc("requests", stage=category)
+    with METRICS.timer("request", stage=category):
+        response = requests.get(url, headers=headers)
+    METRICS.inc("bytes", len(response.content), stage=category)
+    if response.status_code == 403:
+        METRICS.inc("http_403", stage=category)
     response.raise_for_status()
+    # Page bloquée (CloudFront) ou coupée : jamais écrite dans le cache
+    problem = validate_page(filename.removeprefix("touch_database/"), response.text)
+    if problem:
+        METRICS.inc("invalid", stage=category)
+        raise RuntimeError(f"Page invalide ({problem}), non mise en cache: {url}")
     
     # Crée le dossier si nécessaire
     Path(f"touch_database/html/{category}").mkdir(parents=True, exist_ok=True)
@@ -43,14 +62,22 @@ def fetch_category(category: str, num_pages: int):
     for page in range(1, num_pages + 1):
         try:
             fetch_page_if_missing(category, page)
-            print(f"✓ Page {page} de {category} traitée")
+            METRICS.progress(page, num_pages, category)
         except Exception as e:
             print(f"❌ Erreur page {page}: {e}")
             break
 
-if __name__ == "__main__":
+def main():
     for category, num_pages in CATEGORIES_MAP.items():
         print(f"\n🔄 Scraping de {category} ({num_pages} pages)...")
-        fetch_category(category, num_pages)
+        with stage(category):
+            fetch_category(category, num_pages)
+
+
+if __name__ == "__main__":
+    try:
+        run_stage("database_scraper", main)
+    finally:
+        METRICS.report("database_scraper")
 
 
@@ -1,9 +1,22 @@
+import argparse
 import os
 import re
 import time
 from pathlib import Path
 from bs4 import BeautifulSoup
 import requests
+from cache_integrity import validate_page
+from cache_manager import mark_used
+from crawl_coordinator import add_worker_args, attach_from_args, in_shard, throttle
+from metrics import METRICS
+from profiling import run_stage
+
+ROOT_DIR = Path(__file__).resolve().parent
+HTML_DIR = ROOT_DIR / "html"
+DEEP_HTML_DIR = ROOT_DIR / "deep_html"
+
+# Surchargeable pour rejouer le cache via replay_server.py au lieu du site réel
+BASE_URL = os.environ.get("DOFUS_TOUCH_BASE_URL", "https://www.dofus-touch.com")
 
 # Correspondance avec database_scraper.py mais sans ressources (car pas d'items de craft pour les ressources)
 CATEGORIES_MAP = {
@@ -53,16 +66,19 @@ def extract_item_urls_from_html(html_content: str, category: str) -> list:
 def fetch_item_page_if_missing(category: str, item_id: str, item_name_slug: str) -> bool:
     """Télécharge la page d'un item si elle n'existe pas déjà"""
     # Structure: deep_html/category/item_id_item-name-slug.html
-    filename = f"touch_database/deep_html/{category}/{item_id}_{item_name_slug}.html"
+    # Chemin absolu : crawl_pipeline et cache_integrity relisent la page depuis ROOT_DIR, quel que soit le cwd
+    filename = DEEP_HTML_DIR / category / f"{item_id}_{item_name_slug}.html"
     
     # Si le fichier existe, on le lit
     if os.path.exists(filename):
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage=category)
+        mark_used(filename)
         return True
     
     # Sinon on le télécharge
+    METRICS.inc("cache_misses", stage=category)
     print(f"📥 Téléchargement: {filename}")
-    url = f"https://www.dofus-touch.com/fr/mmorpg/encyclopedie/{category}/{item_id}-{item_name_slug}"
+    url = f"{BASE_URL}/fr/mmorpg/encyclopedie/{category}/{item_id}-{item_name_slug}"
     
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
@@ -73,10 +89,16 @@ def fetch_item_page_if_missing(category: str, item_id: str, item_name_slug: str)
     
     while retry_count < max_retries:
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            throttle(url)
+            METRICS.inc("requests", stage=category)
+            with METRICS.timer("request", stage=category):
+                response = requests.get(url, headers=headers, timeout=10)
+            METRICS.inc("bytes", len(response.content), stage=category)
             
             # Si c'est une erreur 403, on fait une pause et on réessaye
             if response.status_code == 403:
+                METRICS.inc("http_403", stage=category)
+                METRICS.inc("retries", stage=category)
                 retry_count += 1
                 print(f"⚠️ Erreur 403 (tentative {retry_count}/{max_retries}) - Pause de 20 secondes...")
                 time.sleep(20)
@@ -84,9 +106,19 @@ def fetch_item_page_if_missing(category: str, item_id: str, item_name_slug: str)
             
             # Pour les autres erreurs HTTP, on lève l'exception
             response.raise_for_status()
+
+            # Page bloquée ou coupée : même traitement qu'un 403, pause puis nouvel essai
+            problem = validate_page(filename.relative_to(ROOT_DIR).as_posix(), response.text)
+            if problem:
+                METRICS.inc("invalid", stage=category)
+                METRICS.inc("retries", stage=category)
+                retry_count += 1
+                print(f"⚠️ Page invalide ({problem}) (tentative {retry_count}/{max_retries}) - Pause de 20 secondes...")
+                time.sleep(20)
+                continue
             
             # Crée le dossier si nécessaire
-            Path(f"touch_database/deep_html/{category}").mkdir(parents=True, exist_ok=True)
+            filename.parent.mkdir(parents=True, exist_ok=True)
             
             # Sauvegarde
             with open(filename, 'w', encoding='utf-8') as f:
@@ -115,7 +147,7 @@ def get_all_items_from_category(category: str, num_pages: int) -> list:
     all_items = []
     
     for page in range(1, num_pages + 1):
-        html_file = f"touch_database/html/{category}/{category}_page_{page}.html"
+        html_file = HTML_DIR / category / f"{category}_page_{page}.html"
         
         if not os.path.exists(html_file):
             print(f"⚠️ Fichier manquant: {html_file}")
@@ -126,6 +158,7 @@ def get_all_items_from_category(category: str, num_pages: int) -> list:
         try:
             with open(html_file, 'r', encoding='utf-8') as f:
                 html_content = f.read()
+            mark_used(html_file)
             
             items = extract_item_urls_from_html(html_content, category)
             all_items.extend(items)
@@ -138,50 +171,79 @@ def get_all_items_from_category(category: str, num_pages: int) -> list:
     print(f"📊 Total: {len(all_items)} items uniques trouvés pour {category}")
     return all_items
 
-def scrape_category_items(category: str, num_pages: int):
-    """Scrape tous les items d'une catégorie"""
+def scrape_category_items(category: str, num_pages: int, shard=None, work_queue=None, fresh=False):
+    """Scrape tous les items d'une catégorie (ou la part du shard / les tâches réclamées dans la file)"""
     print(f"\n🔄 Début du scraping des items de {category}...")
     
-    # Récupère la liste de tous les items
-    all_items = get_all_items_from_category(category, num_pages)
+    # Récupère la liste de tous les items, puis ne garde que ceux du shard (clé stable catégorie/ID)
+    all_items = [
+        item for item in get_all_items_from_category(category, num_pages)
+        if in_shard(f"{category}/{item['item_id']}", shard)
+    ]
     
     if not all_items:
         print(f"⚠️ Aucun item trouvé pour {category}")
         return
     
+    # En mode file, chaque worker publie la liste (idempotent) puis réclame des lots jusqu'à épuisement
+    queue = f"deep/{category}"
+    if work_queue is not None:
+        work_queue.enqueue(queue, [(item['item_id'], item) for item in all_items], fresh)
+        batches = ([item for _, item in batch] for batch in work_queue.drain(queue))
+    else:
+        batches = [all_items]
+    
     # Télécharge chaque page d'item
     successful_downloads = 0
     failed_downloads = 0
     
-    for i, item in enumerate(all_items, 1):
-        print(f"📥 [{i}/{len(all_items)}] {item['item_name_slug']} (ID: {item['item_id']})")
-        
-        success = fetch_item_page_if_missing(
-            category, 
-            item['item_id'], 
-            item['item_name_slug']
-        )
-        
-        if success:
-            successful_downloads += 1
-        else:
-            failed_downloads += 1
-        
-        # Pause progressive pour éviter de surcharger le serveur
-        if i % 10 == 0:
-            print(f"⏸️ Pause (traité {i}/{len(all_items)})")
-            time.sleep(0.1)
+    i = 0
+    for batch in batches:
+        for item in batch:
+            i += 1
+            METRICS.progress(i, len(all_items), category)
+            # Bail renouvelé avant chaque item ; perdu (pause trop longue), l'item appartient à un autre worker
+            if work_queue is not None and work_queue.heartbeat(queue, [item['item_id']]):
+                continue
+            
+            success = fetch_item_page_if_missing(
+                category, 
+                item['item_id'], 
+                item['item_name_slug']
+            )
+            
+            if success:
+                successful_downloads += 1
+            else:
+                failed_downloads += 1
+            if work_queue is not None:
+                work_queue.complete(queue, [item['item_id']], "done" if success else "failed")
+            
+            # Pause progressive pour éviter de surcharger le serveur
+            if i % 10 == 0:
+                time.sleep(0.1)
     
     print(f"\n✅ Scraping de {category} terminé!")
     print(f"📊 Succès: {successful_downloads}, Échecs: {failed_downloads}")
 
+def parse_args():
+    """Options de découpage entre workers (shard fixe ou file partagée) et budget de requêtes"""
+    parser = argparse.ArgumentParser(description="Télécharge les pages détail des items de chaque catégorie.")
+    parser.add_argument("--category", choices=list(CATEGORIES_MAP), action="append", help="Limite à certaines catégories.")
+    add_worker_args(parser)
+    return parser.parse_args()
+
 def main():
     """Fonction principale pour scraper tous les items de toutes les catégories"""
+    args = parse_args()
+    coordinator = attach_from_args(args, BASE_URL)
     print("🚀 Début du scraping détaillé des items...")
     
     for category, num_pages in CATEGORIES_MAP.items():
+        if args.category and category not in args.category:
+            continue
         try:
-            scrape_category_items(category, num_pages)
+            scrape_category_items(category, num_pages, args.shard, coordinator if args.queue else None, args.fresh)
             
         except KeyboardInterrupt:
             print("\n⏹️ Scraping interrompu par l'utilisateur")
@@ -193,4 +255,7 @@ def main():
     print("\n🎉 Scraping détaillé terminé!")
 
 if __name__ == "__main__":
-    main()
+    try:
+        run_stage("deep_database_scraper", main)
+    finally:
+        METRICS.report("deep_database_scraper")
@@ -0,0 +1,238 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+DELTAS_DIR = JSON_DIR / "deltas"
+SNAPSHOT_DIR = DELTAS_DIR / "snapshot"
+MANIFEST_PATH = DELTAS_DIR / "manifest.json"
+DROPS_CSV = DATA_DIR / "monster_drops.csv"
+
+# Profondeur de comparaison par jeu de données : images.json est groupé par catégorie
+DATASETS = {
+    "items_details": ("items_details.json", 1),
+    "craft": ("craft.json", 1),
+    "images": ("images.json", 2),
+    "jobs_map": ("jobs_map.json", 1),
+    "drops": (None, 1),
+}
+MAX_PATCHES = 50
+SUMMARY_NAMES = 10
+
+
+def canonical(value) -> str:
+    # Comparaison sur la forme sérialisée : NaN et l'ordre des clés ne créent pas de faux changements
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def drops_snapshot() -> dict:
+    if not DROPS_CSV.exists():
+        return {}
+    drops_df = pd.read_csv(DROPS_CSV)
+    snapshot: dict[str, dict] = {}
+    for row in drops_df.itertuples(index=False):
+        monster = snapshot.setdefault(str(row.monster_id), {"name": row.monster_name, "drops": {}})
+        probability = None if pd.isna(row.probability) else float(row.probability)
+        # Un même item peut tomber en butin normal et conditionné : une entrée par (type, item)
+        monster["drops"][f"{row.drop_kind}:{row.item_id}"] = probability
+    return snapshot
+
+
+def load_dataset(name: str) -> dict:
+    filename, _ = DATASETS[name]
+    if filename is None:
+        return drops_snapshot()
+    path = JSON_DIR / filename
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_snapshot(name: str) -> dict | None:
+    path = SNAPSHOT_DIR / f"{name}.json"
+    if not path.exists():
+        return None
+    with path.open(encoding="utf-8") as file:
+        return json.load(file)
+
+
+def diff_dataset(old: dict, new: dict, depth: int, prefix: list[str] | None = None) -> dict:
+    # Chemins de clés explicites (["armes", "Marteau Goule"]) : application triviale côté client
+    prefix = prefix or []
+    delta = {"added": [], "changed": [], "removed": []}
+    for key, value in new.items():
+        path = [*prefix, key]
+        if key not in old:
+            delta["added"].append([path, value])
+        elif depth > 1 and isinstance(value, dict) and isinstance(old[key], dict):
+            nested = diff_dataset(old[key], value, depth - 1, path)
+            for kind in delta:
+                delta[kind].extend(nested[kind])
+        elif canonical(value) != canonical(old[key]):
+            delta["changed"].append([path, value])
+    delta["removed"].extend([*prefix, key] for key in old if key not in new)
+    return delta
+
+
+def apply_delta(data: dict, delta: dict) -> dict:
+    for path in delta["removed"]:
+        parent = data
+        for key in path[:-1]:
+            parent = parent[key]
+        parent.pop(path[-1], None)
+    for path, value in [*delta["added"], *delta["changed"]]:
+        parent = data
+        for key in path[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[path[-1]] = value
+    return data
+
+
+def summarize(delta: dict) -> dict:
+    return {
+        kind: {
+            "count": len(entries),
+            "sample": [" / ".join(entry[0] if kind != "removed" else entry) for entry in entries[:SUMMARY_NAMES]],
+        }
+        for kind, entries in delta.items()
+    }
+
+
+def write_json(path: Path, data, compact: bool = True) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        if compact:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(data, file, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+def load_manifest() -> dict:
+    if not MANIFEST_PATH.exists():
+        return {"version": 0, "datasets": {}, "patches": []}
+    with MANIFEST_PATH.open(encoding="utf-8") as file:
+        return json.load(file)
+
+
+def dataset_digest(data: dict) -> str:
+    return hashlib.sha256(canonical(data).encode("utf-8")).hexdigest()
+
+
+def publish_deltas() -> dict | None:
+    manifest = load_manifest()
+    current = {name: load_dataset(name) for name in DATASETS}
+    patch_datasets = {}
+    # Snapshots absents (gitignorés : clone neuf, autre hôte) : on les réamorce toujours, sinon plus aucun delta.
+    # Un jeu qui a changé depuis le manifest sans snapshot pour le diff est à recharger en entier côté client
+    reseeded, reload = [], []
+    for name, data in current.items():
+        previous = load_snapshot(name)
+        if previous is None:
+            reseeded.append(name)
+            if name in manifest["datasets"] and manifest["datasets"][name]["sha256"] != dataset_digest(data):
+                reload.append(name)
+            continue
+        delta = diff_dataset(previous, data, DATASETS[name][1])
+        if any(delta.values()):
+            patch_datasets[name] = delta
+
+    version = manifest["version"]
+    first_publish = version == 0 or any(name not in manifest["datasets"] for name in current)
+    if not patch_datasets and not reload and not first_publish:
+        for name in reseeded:
+            write_json(SNAPSHOT_DIR / f"{name}.json", current[name])
+        if reseeded:
+            print(f"🌱 Snapshots réamorcés sans changement de version: {', '.join(reseeded)}")
+        print(f"✅ Aucun changement depuis la version {version}")
+        return None
+
+    version += 1
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    if patch_datasets or reload:
+        patch_file = f"patch_{version:05d}.json"
+        write_json(
+            DELTAS_DIR / patch_file,
+            {"from": version - 1, "to": version, "datasets": patch_datasets, "reload": reload},
+        )
+        manifest["patches"].append(
+            {
+                "from": version - 1,
+                "to": version,
+                "file": patch_file,
+                "created": now,
+                "size": (DELTAS_DIR / patch_file).stat().st_size,
+                "summary": {name: summarize(delta) for name, delta in patch_datasets.items()},
+                "reload": reload,
+            }
+        )
+
+    # On ne garde que les derniers patchs : au-delà, le client recharge les fichiers complets
+    for patch in manifest["patches"][:-MAX_PATCHES]:
+        (DELTAS_DIR / patch["file"]).unlink(missing_ok=True)
+    manifest["patches"] = manifest["patches"][-MAX_PATCHES:]
+
+    manifest["version"] = version
+    manifest["created"] = now
+    manifest["datasets"] = {}
+    for name, data in current.items():
+        manifest["datasets"][name] = {
+            "file": DATASETS[name][0],
+            "entries": len(data),
+            "sha256": dataset_digest(data),
+        }
+        write_json(SNAPSHOT_DIR / f"{name}.json", data)
+    write_json(MANIFEST_PATH, manifest, compact=False)
+
+    print(f"💾 Version {version} publiée: {MANIFEST_PATH}")
+    for name, delta in patch_datasets.items():
+        counts = ", ".join(f"{len(entries)} {kind}" for kind, entries in delta.items())
+        print(f"  {name}: {counts}")
+    for name in reload:
+        print(f"  {name}: snapshot absent, rechargement complet")
+    return manifest
+
+
+def print_patch_summary(version: int) -> None:
+    manifest = load_manifest()
+    patch = next((patch for patch in manifest["patches"] if patch["to"] == version), None)
+    if patch is None:
+        print(f"⚠️ Pas de patch vers la version {version}")
+        return
+    print(f"🔎 Patch {patch['from']} -> {patch['to']} ({patch['created']}, {patch['size']} octets)")
+    for name in patch.get("reload", []):
+        print(f"  {name}: rechargement complet")
+    for name, summary in patch["summary"].items():
+        for kind, details in summary.items():
+            if details["count"]:
+                print(f"  {name} {kind}: {details['count']} ({', '.join(details['sample'])})")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Publie les deltas des JSON entre deux builds.")
+    parser.add_argument("--show", type=int, help="Affiche le résumé du patch menant à cette version.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.show is not None:
+        print_patch_summary(args.show)
+        return
+    publish_deltas()
+
+
+if __name__ == "__main__":
+    run_stage("delta_feed", main)
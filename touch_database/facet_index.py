@@ -0,0 +1,181 @@
+import argparse
+import base64
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from item_registry import normalize_job_name
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+JSON_DIR = ROOT_DIR / "data" / "json"
+FACETS_PATH = JSON_DIR / "facets.json"
+
+FACETS = ["category", "type", "level", "job", "recipe_job", "craftable"]
+LEVEL_BRACKET = 20
+# Nombre de bits à 1 pour chaque octet : popcount vectorisé sans dépendre de np.bitwise_count
+POPCOUNT = np.asarray([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def level_bracket(level) -> str | None:
+    match = re.search(r"\d+", level) if isinstance(level, str) else None
+    if not match:
+        return None
+    start = (max(int(match.group()), 1) - 1) // LEVEL_BRACKET * LEVEL_BRACKET + 1
+    return f"{start}-{start + LEVEL_BRACKET - 1}"
+
+
+def pack_rows(rows: list[int], size: int) -> np.ndarray:
+    bits = np.zeros(size, dtype=bool)
+    bits[rows] = True
+    # bitorder little : le bit de la ligne i est l'octet i >> 3, bit i & 7 (même lecture côté UI)
+    return np.packbits(bits, bitorder="little")
+
+
+def build_facet_index() -> dict:
+    # Lignes = items de items_details.json, l'univers que filtrent les pages items et daily-plan
+    with (JSON_DIR / "items_details.json").open(encoding="utf-8") as file:
+        items_details = json.load(file)
+    with (JSON_DIR / "craft.json").open(encoding="utf-8") as file:
+        craft = json.load(file)
+    with (JSON_DIR / "jobs_map.json").open(encoding="utf-8") as file:
+        jobs_map = json.load(file)
+
+    names = list(items_details)
+    rows_by_name = {name: row for row, name in enumerate(names)}
+    postings: dict[str, dict[str, list[int]]] = {facet: {} for facet in FACETS}
+
+    def post(facet: str, value, row: int) -> None:
+        if value:
+            postings[facet].setdefault(str(value), []).append(row)
+
+    for row, name in enumerate(names):
+        details = items_details[name]
+        post("category", details.get("category"), row)
+        post("type", details.get("type"), row)
+        post("level", level_bracket(details.get("level")), row)
+        recipe = craft.get(name)
+        if recipe and recipe["has_recipe"] and recipe["job"]:
+            # Même nom que la facette job ("TailleurNiveau" -> "Tailleur", "Forgeur" -> "Forgeur d'Epées")
+            post("recipe_job", normalize_job_name(recipe["job"], details.get("type"), jobs_map), row)
+            post("craftable", "true", row)
+    for job, job_items in jobs_map.items():
+        for name in job_items:
+            if name in rows_by_name:
+                post("job", job, rows_by_name[name])
+
+    return {
+        "size": len(names),
+        "items": names,
+        "facets": {
+            facet: {
+                value: base64.b64encode(pack_rows(rows, len(names)).tobytes()).decode("ascii")
+                for value, rows in sorted(values.items())
+            }
+            for facet, values in postings.items()
+        },
+    }
+
+
+def save_facet_index(index: dict, path: Path = FACETS_PATH) -> None:
+    with path.open("w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False, separators=(",", ":"))
+    values = sum(len(values) for values in index["facets"].values())
+    print(f"💾 Index de facettes sauvegardé: {path} ({index['size']} items, {values} valeurs)")
+
+
+class FacetIndex:
+    def __init__(self, path: Path = FACETS_PATH):
+        with path.open(encoding="utf-8") as file:
+            index = json.load(file)
+        self.size = index["size"]
+        self.items = index["items"]
+        # Toutes les posting lists dans une seule matrice (une ligne par valeur de facette)
+        self.values: dict[str, list[str]] = {facet: list(values) for facet, values in index["facets"].items()}
+        self.positions: dict[tuple[str, str], int] = {}
+        encoded = []
+        for facet, values in index["facets"].items():
+            for value, bitset in values.items():
+                self.positions[(facet, value)] = len(encoded)
+                encoded.append(np.frombuffer(base64.b64decode(bitset), dtype=np.uint8))
+        self.bitsets = np.vstack(encoded)
+        self.all = pack_rows(list(range(self.size)), self.size)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def bitset(self, facet: str, value: str) -> np.ndarray:
+        position = self.positions.get((facet, value))
+        return np.zeros_like(self.all) if position is None else self.bitsets[position]
+
+    def match(self, filters: dict[str, list[str] | str], exclude: str | None = None) -> np.ndarray:
+        # OU entre les valeurs d'une même facette, ET entre facettes
+        selection = self.all.copy()
+        for facet, values in filters.items():
+            if facet == exclude or not values:
+                continue
+            values = [values] if isinstance(values, str) else values
+            selection &= np.bitwise_or.reduce([self.bitset(facet, value) for value in values])
+        return selection
+
+    def rows(self, bitset: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitset, count=self.size, bitorder="little"))
+
+    def names(self, bitset: np.ndarray) -> list[str]:
+        return [self.items[row] for row in self.rows(bitset)]
+
+    def count(self, bitset: np.ndarray) -> int:
+        return int(POPCOUNT[bitset].sum())
+
+    def counts(self, filters: dict[str, list[str] | str]) -> dict[str, dict[str, int]]:
+        # Compte de chaque valeur sous les filtres des autres facettes : un ET + popcount par ligne de la matrice
+        counts = {}
+        for facet, values in self.values.items():
+            start = self.positions[(facet, values[0])] if values else 0
+            selection = self.match(filters, exclude=facet)
+            block = self.bitsets[start : start + len(values)] & selection
+            counts[facet] = dict(zip(values, POPCOUNT[block].sum(axis=1, dtype=np.int64).tolist()))
+        return counts
+
+
+def parse_filters(arguments: list[str]) -> dict[str, list[str]]:
+    filters: dict[str, list[str]] = {}
+    for argument in arguments:
+        facet, _, value = argument.partition("=")
+        filters.setdefault(facet, []).append(value)
+    return filters
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge l'index de facettes (bitsets) des items.")
+    parser.add_argument("filters", nargs="*", help="Filtres facette=valeur (ex: category=ressources level=1-20).")
+    parser.add_argument("--counts", action="store_true", help="Affiche les comptes par valeur de facette.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.filters and not args.counts:
+        save_facet_index(build_facet_index())
+        return
+
+    index = FacetIndex()
+    filters = parse_filters(args.filters)
+    started = time.perf_counter()
+    selection = index.match(filters)
+    counts = index.counts(filters) if args.counts else None
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    names = index.names(selection)
+    print(f"{len(names)} items: {', '.join(names[:20])}{' ...' if len(names) > 20 else ''}")
+    for facet, values in (counts or {}).items():
+        non_zero = ", ".join(f"{value} ({count})" for value, count in values.items() if count)
+        print(f"  {facet}: {non_zero}")
+    print(f"⏱️ Filtres résolus en {elapsed_us:.0f} µs")
+
+
+if __name__ == "__main__":
+    run_stage("facet_index", main)
@@ -0,0 +1,340 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from monsters_scraper import parse_first_int
+from search_index import fold_name
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+REGISTRY_PATH = JSON_DIR / "registry.json"
+
+CRAFT_CSV = DATA_DIR / "craft_detailed.csv"
+DROPS_CSV = DATA_DIR / "monster_drops.csv"
+ITEMS_CSV = DATA_DIR / "merged_with_local_images.csv"
+JOBS_CSV = DATA_DIR / "jobs_list.csv"
+JOBS_ITEMS_CSV = DATA_DIR / "jobs_items_mapping.csv"
+MONSTERS_CSV = DATA_DIR / "monstres_data.csv"
+
+# Les pages détail tronquent les métiers en plusieurs mots ("Forgeur") : le type d'item donne la spécialité
+JOB_SPECIALTIES = {
+    "Épée": "Epées",
+    "Dague": "Dagues",
+    "Hache": "Haches",
+    "Marteau": "Marteaux",
+    "Pelle": "Pelles",
+    "Arc": "Arcs",
+    "Baguette": "Baguettes",
+    "Bâton": "Bâtons",
+}
+
+
+def image_id_from_url(url) -> str | None:
+    if not isinstance(url, str) or not url:
+        return None
+    return url.split("/")[-1].split(".")[0]
+
+
+def normalize_job_name(raw, item_type: str | None = None, job_names=()) -> str | None:
+    # craft.json garde le texte brut du bandeau ("TailleurNiveau", "Forgeur") : nom de jobs_list.csv si possible
+    if not isinstance(raw, str) or not raw.strip():
+        return None
+    job = raw.strip().removesuffix("Niveau").strip()
+    specialty = JOB_SPECIALTIES.get(item_type)
+    if specialty:
+        for name in job_names:
+            if name.startswith(f"{job} ") and name.endswith(specialty):
+                return name
+    return job
+
+
+def recipe_entry(item_name: str, rows: pd.DataFrame) -> dict:
+    # Lignes craft_detailed.csv d'un item (une par ingrédient) -> entrée de craft.json / craft_by_id.json
+    first_row = rows.iloc[0]
+    has_recipe = bool(first_row["has_recipe"])
+    job = first_row["job"]
+    job_level = first_row["job_level"]
+    has_job = not pd.isna(job)
+
+    # Pages sans bandeau de métier : métier déduit du nom
+    if not has_job and "Graine" in item_name:
+        has_job, job, job_level = True, "Paysan", 1
+    if not has_job and ("Farine" in item_name or "gely" in item_name):
+        has_job, job, job_level = True, "Boulanger", 1
+    if not has_job and ("Potion" in item_name or "Soin" in item_name):
+        has_job, job, job_level = True, "Alchimiste", 1
+    if not has_job and "vidé" in item_name:
+        has_job, job, job_level = True, "Pêcheur", 1
+    if not has_job and ("Rune " in item_name or "Fantôme" in item_name or "Pierre d" in item_name):
+        has_recipe = False
+
+    if not (has_recipe and has_job):
+        return {
+            "category": first_row["category"],
+            "has_recipe": has_recipe,
+            "job": None,
+            "job_level": None,
+            "ingredient_names": [],
+            "ingredient_ids": [],
+            "quantities": [],
+        }
+    return {
+        "category": first_row["category"],
+        "has_recipe": has_recipe,
+        "job": job,
+        "job_level": float(job_level),
+        "ingredient_names": rows["ingredient_name"].dropna().tolist(),
+        "ingredient_ids": [int(ingredient_id) for ingredient_id in rows["ingredient_id"].dropna().tolist()],
+        "quantities": [int(quantity) for quantity in rows["quantity"].dropna().tolist()],
+    }
+
+
+def collect_item_rows() -> dict[int, dict]:
+    items: dict[int, dict] = {}
+
+    def register(item_id, name, category=None, slug=None) -> None:
+        if pd.isna(item_id) or not isinstance(name, str):
+            return
+        entry = items.setdefault(int(item_id), {"name": name, "category": None, "slug": None})
+        entry["category"] = entry["category"] or (category if isinstance(category, str) else None)
+        entry["slug"] = entry["slug"] or (slug if isinstance(slug, str) else None)
+
+    # Les pages détail (craft_detailed.csv) portent les vrais IDs d'encyclopédie
+    craft_df = pd.read_csv(CRAFT_CSV)
+    for row in craft_df[["item_id", "item_name", "category", "item_slug"]].drop_duplicates("item_id").itertuples(index=False):
+        register(row.item_id, row.item_name, row.category, row.item_slug)
+    for row in craft_df[["ingredient_id", "ingredient_name"]].dropna().drop_duplicates("ingredient_id").itertuples(index=False):
+        register(row.ingredient_id, row.ingredient_name)
+
+    if DROPS_CSV.exists():
+        drops_df = pd.read_csv(DROPS_CSV)
+        for row in drops_df[["item_id", "item_name", "item_category"]].drop_duplicates("item_id").itertuples(index=False):
+            register(row.item_id, row.item_name, row.item_category)
+    return items
+
+
+def index_names(names: list[str], categories: list[str | None], values: list[int]) -> dict[tuple[str | None, str], list[int]]:
+    # Clés (catégorie, nom replié) et (None, nom replié) -> toutes les valeurs qui les portent
+    name_values: dict[tuple[str | None, str], list[int]] = {}
+    for name, category, value in zip(names, categories, values):
+        folded = fold_name(name)
+        # Sans catégorie, les deux clés sont identiques : l'item ne doit pas se déclarer homonyme de lui-même
+        for key in dict.fromkeys([(category, folded), (None, folded)]):
+            name_values.setdefault(key, []).append(value)
+    return name_values
+
+
+def name_candidates(name_values: dict[tuple[str | None, str], list[int]], name, category=None) -> list[int]:
+    folded = fold_name(name) if isinstance(name, str) else ""
+    return name_values.get((category, folded)) or name_values.get((None, folded)) or []
+
+
+def build_registry() -> dict:
+    items = collect_item_rows()
+    item_ids = sorted(items)
+
+    name_ids = index_names([items[item_id]["name"] for item_id in item_ids], [items[item_id]["category"] for item_id in item_ids], item_ids)
+
+    # Deux orthographes distinctes repliées sur la même clé : aucun nom ne doit désigner le mauvais item
+    ambiguous: dict[str, list[int]] = {}
+    homonyms: dict[str, list[int]] = {}
+    for (category, folded), ids in name_ids.items():
+        if category is not None or len(ids) < 2:
+            continue
+        names = {items[item_id]["name"] for item_id in ids}
+        if len(names) > 1:
+            ambiguous[folded] = ids
+        else:
+            # Même nom affiché pour plusieurs IDs (parchemins, équipements d'Albuera) : jamais résolu par nom
+            homonyms[names.pop()] = ids
+    if ambiguous:
+        examples = "; ".join(f"{folded}: {ids}" for folded, ids in list(ambiguous.items())[:5])
+        raise RuntimeError(f"{len(ambiguous)} noms repliés partagés par des items différents ({examples})")
+
+    details = {item_id: {"type": None, "level": None, "image_id": None} for item_id in item_ids}
+    unresolved: list[str] = []
+    items_df = pd.read_csv(ITEMS_CSV)
+    for row in items_df.itertuples(index=False):
+        candidates = name_candidates(name_ids, row.nom, row.category)
+        if not candidates:
+            unresolved.append(row.nom)
+            continue
+        # Les homonymes partagent la même ligne de liste (type, niveau, image) : chacun la reçoit
+        for item_id in candidates:
+            detail = details[item_id]
+            if detail["image_id"] is None:
+                detail["type"] = row.type if isinstance(row.type, str) else None
+                detail["level"] = parse_first_int(str(row.niveau))
+                detail["image_id"] = image_id_from_url(row.local_url)
+
+    jobs_df = pd.read_csv(JOBS_CSV)
+    monsters_df = pd.read_csv(MONSTERS_CSV) if MONSTERS_CSV.exists() else pd.DataFrame(columns=["monster_id", "name", "level"])
+
+    return {
+        "items": {
+            "ids": item_ids,
+            "names": [items[item_id]["name"] for item_id in item_ids],
+            "slugs": [items[item_id]["slug"] for item_id in item_ids],
+            "categories": [items[item_id]["category"] for item_id in item_ids],
+            "types": [details[item_id]["type"] for item_id in item_ids],
+            "levels": [details[item_id]["level"] for item_id in item_ids],
+            "image_ids": [details[item_id]["image_id"] for item_id in item_ids],
+        },
+        "monsters": {
+            "ids": monsters_df["monster_id"].astype(int).tolist(),
+            "names": monsters_df["name"].tolist(),
+            "levels": monsters_df["level"].fillna(-1).astype(int).tolist(),
+        },
+        "jobs": {
+            "ids": jobs_df["job_id"].astype(int).tolist(),
+            "names": jobs_df["job_name"].tolist(),
+        },
+        "ambiguous_names": ambiguous,
+        "homonyms": homonyms,
+        "unresolved_names": sorted(set(unresolved)),
+    }
+
+
+class ItemRegistry:
+    def __init__(self, registry: dict):
+        items = registry["items"]
+        self.ids = np.asarray(items["ids"], dtype=np.int64)
+        self.names = items["names"]
+        self.slugs = items["slugs"]
+        self.categories = items["categories"]
+        self.types = items["types"]
+        self.levels = items["levels"]
+        self.image_ids = items["image_ids"]
+        self.rows = {int(item_id): row for row, item_id in enumerate(self.ids)}
+        self.name_rows = index_names(self.names, self.categories, list(range(len(self.names))))
+
+        monsters = registry["monsters"]
+        self.monster_ids = np.asarray(monsters["ids"], dtype=np.int64)
+        self.monster_rows = {int(monster_id): row for row, monster_id in enumerate(self.monster_ids)}
+        self.monster_names = monsters["names"]
+        self.monster_levels = monsters["levels"]
+
+        jobs = registry["jobs"]
+        self.job_ids = {name: int(job_id) for job_id, name in zip(jobs["ids"], jobs["names"])}
+
+    @classmethod
+    def load(cls, path: Path = REGISTRY_PATH) -> "ItemRegistry":
+        with path.open(encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: int) -> bool:
+        return int(item_id) in self.rows
+
+    def row(self, item_id: int) -> int:
+        return self.rows[int(item_id)]
+
+    def candidates(self, name: str, category: str | None = None) -> list[int]:
+        return [int(self.ids[row]) for row in name_candidates(self.name_rows, name, category)]
+
+    def resolve(self, name: str, category: str | None = None) -> int | None:
+        # Un nom partagé par plusieurs IDs ne se résout pas : None plutôt que le mauvais item
+        candidates = self.candidates(name, category)
+        return candidates[0] if len(candidates) == 1 else None
+
+    def job_name(self, raw, item_id: int | None = None) -> str | None:
+        item_type = self.types[self.row(item_id)] if item_id is not None and item_id in self else None
+        return normalize_job_name(raw, item_type, self.job_ids)
+
+    def item(self, item_id: int) -> dict:
+        row = self.row(item_id)
+        return {
+            "id": int(self.ids[row]),
+            "name": self.names[row],
+            "slug": self.slugs[row],
+            "category": self.categories[row],
+            "type": self.types[row],
+            "level": self.levels[row],
+            "image_id": self.image_ids[row],
+        }
+
+
+def build_id_keyed_jsons(registry: ItemRegistry) -> None:
+    items_by_id = {str(item_id): registry.item(item_id) for item_id in registry.ids}
+
+    # Recettes indexées par l'ID réel de la page détail, jamais par résolution de nom
+    craft_df = pd.read_csv(CRAFT_CSV)
+    craft_by_id = {}
+    for item_id, rows in craft_df.groupby("item_id", sort=True):
+        recipe = recipe_entry(rows["item_name"].iloc[0], rows)
+        job = registry.job_name(recipe["job"], int(item_id))
+        craft_by_id[str(int(item_id))] = {
+            "category": recipe["category"],
+            "has_recipe": recipe["has_recipe"],
+            "job": job,
+            "job_id": registry.job_ids.get(job),
+            "job_level": recipe["job_level"],
+            "ingredient_ids": recipe["ingredient_ids"],
+            "quantities": recipe["quantities"],
+        }
+
+    jobs_df = pd.read_csv(JOBS_ITEMS_CSV)
+    jobs_map_by_id: dict[str, list[int]] = {}
+    for row in jobs_df.itertuples(index=False):
+        job_id = registry.job_ids.get(row.job_name)
+        item_id = registry.resolve(row.item_name)
+        if job_id is None or item_id is None:
+            continue
+        job_items = jobs_map_by_id.setdefault(str(job_id), [])
+        if item_id not in job_items:
+            job_items.append(item_id)
+
+    outputs = {
+        "items_by_id.json": items_by_id,
+        "craft_by_id.json": craft_by_id,
+        "jobs_map_by_id.json": jobs_map_by_id,
+    }
+    for filename, data in outputs.items():
+        with (JSON_DIR / filename).open("w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+        print(f"💾 JSON sauvegardé: {JSON_DIR / filename} ({len(data)} entrées)")
+
+
+def save_registry(registry: dict) -> None:
+    JSON_DIR.mkdir(parents=True, exist_ok=True)
+    with REGISTRY_PATH.open("w", encoding="utf-8") as file:
+        json.dump(registry, file, ensure_ascii=False, separators=(",", ":"))
+    print(f"💾 Registre sauvegardé: {REGISTRY_PATH} ({len(registry['items']['ids'])} items)")
+    if registry["unresolved_names"]:
+        print(f"⚠️ {len(registry['unresolved_names'])} noms sans ID d'encyclopédie")
+    if registry["homonyms"]:
+        print(f"⚠️ {len(registry['homonyms'])} noms partagés par plusieurs IDs (non résolus par nom)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit le registre canonique des IDs d'encyclopédie.")
+    parser.add_argument("--lookup", help="Affiche l'entrée du registre pour un ID ou un nom.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.lookup:
+        registry = ItemRegistry.load()
+        item_id = int(args.lookup) if args.lookup.isdigit() else registry.resolve(args.lookup)
+        if item_id is None or item_id not in registry:
+            print(f"⚠️ Introuvable: {args.lookup}")
+            return
+        print(json.dumps(registry.item(item_id), ensure_ascii=False, indent=4))
+        return
+
+    registry_data = build_registry()
+    save_registry(registry_data)
+    build_id_keyed_jsons(ItemRegistry(registry_data))
+
+
+if __name__ == "__main__":
+    run_stage("item_registry", main)
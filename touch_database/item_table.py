@@ -0,0 +1,178 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from item_registry import ItemRegistry
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+BINARY_DIR = DATA_DIR / "binary"
+ITEM_TABLE_DIR = BINARY_DIR / "items"
+
+ITEM_DTYPE = np.dtype([("id", "<i4"), ("level", "<i2"), ("category", "u1"), ("type", "<u2")])
+MISSING_LEVEL = -1
+# Code 0 réservé aux valeurs absentes dans les vocabulaires
+MISSING_CODE = 0
+
+
+def encode_vocabulary(values: list[str | None]) -> tuple[list[str | None], np.ndarray]:
+    vocabulary: list[str | None] = [None, *sorted({value for value in values if value})]
+    codes = {value: code for code, value in enumerate(vocabulary)}
+    return vocabulary, np.asarray([codes.get(value, MISSING_CODE) for value in values])
+
+
+def build_item_table(registry: ItemRegistry) -> dict[str, np.ndarray | list]:
+    # Le registre est trié par ID : la recherche par ID est un searchsorted, sans dict à reconstruire
+    categories, category_codes = encode_vocabulary(registry.categories)
+    types, type_codes = encode_vocabulary(registry.types)
+
+    records = np.zeros(len(registry), dtype=ITEM_DTYPE)
+    records["id"] = registry.ids
+    records["level"] = [MISSING_LEVEL if level is None else level for level in registry.levels]
+    records["category"] = category_codes
+    records["type"] = type_codes
+
+    encoded_names = [name.encode("utf-8") for name in registry.names]
+    offsets = np.zeros(len(encoded_names) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in encoded_names], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded_names), dtype=np.uint8)
+    # Permutation triée sur les octets UTF-8 : recherche par nom exact en O(log n) sans index en mémoire
+    name_order = np.asarray(sorted(range(len(encoded_names)), key=encoded_names.__getitem__), dtype=np.int32)
+
+    return {
+        "records": records,
+        "name_blob": blob,
+        "name_offsets": offsets,
+        "name_order": name_order,
+        "categories": categories,
+        "types": types,
+    }
+
+
+def save_item_table(table: dict[str, np.ndarray | list], directory: Path = ITEM_TABLE_DIR) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ["records", "name_blob", "name_offsets", "name_order"]:
+        np.save(directory / f"{name}.npy", table[name])
+    with (directory / "vocabulary.json").open("w", encoding="utf-8") as file:
+        json.dump({"categories": table["categories"], "types": table["types"]}, file, ensure_ascii=False)
+    print(f"💾 Table d'items sauvegardée: {directory} ({len(table['records'])} items)")
+
+
+class ItemRecord:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: "ItemTable", row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def id(self) -> int:
+        return int(self.table.records["id"][self.row])
+
+    @property
+    def name(self) -> str:
+        return self.table.name(self.row)
+
+    @property
+    def level(self) -> int | None:
+        level = int(self.table.records["level"][self.row])
+        return None if level == MISSING_LEVEL else level
+
+    @property
+    def category(self) -> str | None:
+        return self.table.categories[self.table.records["category"][self.row]]
+
+    @property
+    def type(self) -> str | None:
+        return self.table.types[self.table.records["type"][self.row]]
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "level": self.level, "category": self.category, "type": self.type}
+
+    def __repr__(self) -> str:
+        return f"ItemRecord({self.id}, {self.name!r})"
+
+
+class ItemTable:
+    # Tableaux ouverts en mmap : aucun parse au chargement, pages partagées entre processus
+    __slots__ = ("records", "name_blob", "name_offsets", "name_order", "categories", "types")
+
+    def __init__(self, directory: Path = ITEM_TABLE_DIR):
+        self.records = np.load(directory / "records.npy", mmap_mode="r")
+        self.name_blob = np.load(directory / "name_blob.npy", mmap_mode="r")
+        self.name_offsets = np.load(directory / "name_offsets.npy", mmap_mode="r")
+        self.name_order = np.load(directory / "name_order.npy", mmap_mode="r")
+        with (directory / "vocabulary.json").open(encoding="utf-8") as file:
+            vocabulary = json.load(file)
+        self.categories = vocabulary["categories"]
+        self.types = vocabulary["types"]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, row: int) -> ItemRecord:
+        return ItemRecord(self, row)
+
+    def name_bytes(self, row: int) -> bytes:
+        return self.name_blob[self.name_offsets[row] : self.name_offsets[row + 1]].tobytes()
+
+    def name(self, row: int) -> str:
+        return self.name_bytes(row).decode("utf-8")
+
+    def row_for_id(self, item_id: int) -> int | None:
+        ids = self.records["id"]
+        row = int(np.searchsorted(ids, item_id))
+        return row if row < len(ids) and ids[row] == item_id else None
+
+    def get(self, item_id: int) -> ItemRecord | None:
+        row = self.row_for_id(item_id)
+        return None if row is None else ItemRecord(self, row)
+
+    def find(self, name: str) -> ItemRecord | None:
+        # Recherche dichotomique sur la permutation triée (homonymes : plus petit ID)
+        target = name.encode("utf-8")
+        low, high = 0, len(self.name_order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.name_bytes(int(self.name_order[middle])) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.name_order) and self.name_bytes(int(self.name_order[low])) == target:
+            return ItemRecord(self, int(self.name_order[low]))
+        return None
+
+    def rows_in_category(self, category: str) -> np.ndarray:
+        return np.flatnonzero(self.records["category"] == self.categories.index(category))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge la table binaire des items (mmap).")
+    parser.add_argument("--lookup", help="Affiche un item par ID ou par nom exact.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.lookup:
+        save_item_table(build_item_table(ItemRegistry.load()))
+        return
+
+    started = time.perf_counter()
+    table = ItemTable()
+    record = table.get(int(args.lookup)) if args.lookup.isdigit() else table.find(args.lookup)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if record is None:
+        print(f"⚠️ Introuvable: {args.lookup}")
+        return
+    print(json.dumps(record.as_dict(), ensure_ascii=False, indent=4))
+    print(f"⏱️ Chargement + recherche en {elapsed_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    run_stage("item_table", main)
@@ -3,8 +3,41 @@ import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from pathlib import Path
+import re
+import threading
 import time
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from cache_integrity import validate_page
+from cache_manager import mark_used
+from crawl_coordinator import COORDINATOR_DB, attach, throttle
+from metrics import METRICS
+from profiling import run_stage
+
+# Surchargeable pour rejouer le cache via replay_server.py au lieu du site réel
+BASE_URL = os.environ.get("DOFUS_TOUCH_BASE_URL", "https://www.dofus-touch.com")
+
+# Pages de métiers téléchargées en parallèle, mais au plus une requête par intervalle pour tout le processus :
+# une seconde comme l'ancienne pause fixe, le parallélisme ne recouvre que le parsing et la latence réseau
+JOB_FETCH_WORKERS = 4
+MIN_REQUEST_INTERVAL = 1.0
+
+class RequestLimiter:
+    """Espace les départs de requêtes d'au moins `interval` secondes, tous threads confondus"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+REQUEST_LIMITER = RequestLimiter(MIN_REQUEST_INTERVAL)
 
 def fetch_jobs_page(page_num):
     """Récupère une page de métiers si elle n'existe pas déjà"""
@@ -12,13 +45,14 @@ def fetch_jobs_page(page_num):
     
     # Si le fichier existe, on le lit
     if os.path.exists(filename):
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage="jobs_list")
         with open(filename, 'r', encoding='utf-8') as f:
             return f.read()
     
     # Sinon on le télécharge
+    METRICS.inc("cache_misses", stage="jobs_list")
     print(f"📥 Téléchargement: {filename}")
-    url = f"https://www.dofus-touch.com/fr/mmorpg/encyclopedie/metiers"
+    url = f"{BASE_URL}/fr/mmorpg/encyclopedie/metiers"
     if page_num > 1:
         url += f"?page={page_num}"
     
@@ -26,8 +60,19 @@ def fetch_jobs_page(page_num):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
     
-    response = requests.get(url, headers=headers)
+    REQUEST_LIMITER.wait()
+    throttle(url)
+    METRICS.inc("requests", stage="jobs_list")
+    with METRICS.timer("request", stage="jobs_list"):
+        response = requests.get(url, headers=headers)
+    METRICS.inc("bytes", len(response.content), stage="jobs_list")
+    if response.status_code == 403:
+        METRICS.inc("http_403", stage="jobs_list")
     response.raise_for_status()
+    problem = validate_page(filename.removeprefix("touch_database/"), response.text)
+    if problem:
+        METRICS.inc("invalid", stage="jobs_list")
+        raise RuntimeError(f"Page invalide ({problem}), non mise en cache: {url}")
     
     # Crée le dossier si nécessaire
     Path(f"touch_database/html/jobs").mkdir(parents=True, exist_ok=True)
@@ -77,44 +122,76 @@ def extract_jobs_from_html(html_content):
     
     return jobs
 
-def fetch_job_details(job_id, job_slug):
-    """Récupère les détails d'un métier spécifique"""
-    filename = f"touch_database/html/jobs/job_{job_id}_{job_slug}.html"
+def job_page_filename(job_id, job_slug, page=1):
+    """Chemin du cache d'une page de métier (la page 1 garde le nom historique)"""
+    if page == 1:
+        return f"touch_database/html/jobs/job_{job_id}_{job_slug}.html"
+    return f"touch_database/html/jobs/job_{job_id}_{job_slug}_page_{page}.html"
+
+def fetch_job_page(job_id, job_slug, page=1):
+    """Récupère une page de la liste d'items d'un métier"""
+    filename = job_page_filename(job_id, job_slug, page)
     
     # Si le fichier existe, on le lit
     if os.path.exists(filename):
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage="job_detail")
+        mark_used(filename)
         with open(filename, 'r', encoding='utf-8') as f:
             return f.read()
     
     # Sinon on le télécharge
+    METRICS.inc("cache_misses", stage="job_detail")
     print(f"📥 Téléchargement détails métier: {filename}")
-    url = f"https://www.dofus-touch.com/fr/mmorpg/encyclopedie/metiers/{job_id}-{job_slug}"
+    url = f"{BASE_URL}/fr/mmorpg/encyclopedie/metiers/{job_id}-{job_slug}"
+    if page > 1:
+        url += f"?page={page}"
     
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
     
-    response = requests.get(url, headers=headers)
+    # Limite partagée entre threads : remplace la pause fixe d'une seconde après chaque page
+    REQUEST_LIMITER.wait()
+    throttle(url)
+    METRICS.inc("requests", stage="job_detail")
+    with METRICS.timer("request", stage="job_detail"):
+        response = requests.get(url, headers=headers)
+    METRICS.inc("bytes", len(response.content), stage="job_detail")
+    if response.status_code == 403:
+        METRICS.inc("http_403", stage="job_detail")
     response.raise_for_status()
+    problem = validate_page(filename.removeprefix("touch_database/"), response.text)
+    if problem:
+        METRICS.inc("invalid", stage="job_detail")
+        raise RuntimeError(f"Page invalide ({problem}), non mise en cache: {url}")
     
     # Sauvegarde
+    Path("touch_database/html/jobs").mkdir(parents=True, exist_ok=True)
     with open(filename, 'w', encoding='utf-8') as f:
         f.write(response.text)
     
-    # Pause pour éviter de surcharger le serveur
-    time.sleep(1)
-    
     return response.text
 
+def fetch_job_details(job_id, job_slug):
+    """Récupère les détails d'un métier spécifique"""
+    return fetch_job_page(job_id, job_slug, 1)
+
+def extract_page_count(html_content):
+    """Nombre de pages de la liste d'items d'un métier, d'après la pagination"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    pagination = soup.find('ul', class_='ak-pagination')
+    if not pagination:
+        return 1
+    pages = [int(match) for link in pagination.find_all('a', href=True) for match in re.findall(r'[?&]page=(\d+)', link['href'])]
+    return max(pages, default=1)
+
 def extract_job_items(html_content, job_name):
     """Extrait les items associés à un métier"""
     soup = BeautifulSoup(html_content, 'html.parser')
     items = []
     
-    # Trouve le tableau des items
-    table = soup.find('table', class_='ak-table')
-    if table:
+    # Trouve les tableaux des items (récoltes et recettes)
+    for table in soup.find_all('table', class_='ak-table'):
         tbody = table.find('tbody')
         if tbody:
             rows = tbody.find_all('tr')
@@ -180,6 +257,50 @@ def extract_job_items(html_content, job_name):
     
     return items
 
+def scrape_jobs_items(jobs):
+    """Télécharge et parse toutes les pages de tous les métiers en parallèle"""
+    job_pages = {index: {} for index in range(len(jobs))}
+    failed = set()
+    
+    def fetch_and_parse(index, page):
+        job = jobs[index]
+        html_content = fetch_job_page(job['job_id'], job['job_slug'], page)
+        with METRICS.timer("parse", stage="job_detail"):
+            items = extract_job_items(html_content, job['job_name'])
+        page_count = extract_page_count(html_content) if page == 1 else None
+        return items, page_count
+    
+    with ThreadPoolExecutor(max_workers=JOB_FETCH_WORKERS) as executor:
+        pending = {executor.submit(fetch_and_parse, index, 1): (index, 1) for index in range(len(jobs))}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, page = pending.pop(future)
+                try:
+                    items, page_count = future.result()
+                except Exception as e:
+                    print(f"❌ Erreur pour {jobs[index]['job_name']} (page {page}): {e}")
+                    failed.add(index)
+                    continue
+                job_pages[index][page] = items
+                # Les pages suivantes ne sont connues qu'après la première : on les enchaîne dès qu'elle arrive
+                for next_page in range(2, (page_count or 1) + 1):
+                    pending[executor.submit(fetch_and_parse, index, next_page)] = (index, next_page)
+    
+    # Fusion dans l'ordre des métiers et des pages, sans doublons
+    all_job_items = []
+    for index, job in enumerate(jobs):
+        seen = set()
+        for page in sorted(job_pages[index]):
+            for item in job_pages[index][page]:
+                if item['item_name'] not in seen:
+                    seen.add(item['item_name'])
+                    all_job_items.append(item)
+        status = " (incomplet)" if index in failed else ""
+        print(f"✓ {len(seen)} items sur {len(job_pages[index])} page(s) pour {job['job_name']}{status}")
+    
+    return all_job_items
+
 def scrape_all_jobs():
     """Script principal pour scraper tous les métiers"""
     print("🔄 Début du scraping des métiers...")
@@ -201,21 +322,8 @@ def scrape_all_jobs():
     jobs_df.to_csv('touch_database/data/jobs_list.csv', index=False)
     print(f"💾 Liste des métiers sauvegardée: touch_database/data/jobs_list.csv")
     
-    # Récupère les détails de chaque métier
-    all_job_items = []
-    
-    for job in all_jobs:
-        print(f"\n🔍 Traitement du métier: {job['job_name']}")
-        
-        try:
-            job_html = fetch_job_details(job['job_id'], job['job_slug'])
-            items = extract_job_items(job_html, job['job_name'])
-            all_job_items.extend(items)
-            print(f"✓ {len(items)} items trouvés pour {job['job_name']}")
-            
-        except Exception as e:
-            print(f"❌ Erreur pour {job['job_name']}: {e}")
-            continue
+    # Récupère les détails de chaque métier, pagination comprise
+    all_job_items = scrape_jobs_items(all_jobs)
     
     # Sauvegarde le mapping métier -> items
     if all_job_items:
@@ -234,5 +342,11 @@ def scrape_all_jobs():
     return all_jobs, all_job_items
 
 if __name__ == "__main__":
-    jobs, job_items = scrape_all_jobs()
-    print("\n✅ Scraping terminé!")
+    # Budget par hôte de la file partagée (crawl_coordinator budget ...) respecté s'il a été configuré
+    if COORDINATOR_DB.exists():
+        attach()
+    try:
+        run_stage("jobs_scraper", scrape_all_jobs)
+        print("\n✅ Scraping terminé!")
+    finally:
+        METRICS.report("jobs_scraper")
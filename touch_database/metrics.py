@@ -0,0 +1,167 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+RUNS_DIR = ROOT_DIR / "runs"
+METRICS_DIR = RUNS_DIR / "metrics"
+
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+PROGRESS_INTERVAL = 0.5
+PROGRESS_INTERVAL_NO_TTY = 10.0
+
+
+class Histogram:
+    def __init__(self, buckets: list[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> float | None:
+        # Approximation par la borne haute du bucket contenant le quantile
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.buckets[index] if index < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.counters: dict[tuple[str, str], float] = {}
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+        self.last_progress = 0.0
+
+    def inc(self, name: str, amount: float = 1, stage: str = "default") -> None:
+        with self.lock:
+            key = (name, stage)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, stage: str = "default") -> None:
+        with self.lock:
+            key = (name, stage)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, stage: str = "default"):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, stage)
+
+    def total(self, name: str) -> float:
+        with self.lock:
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def progress(self, done: int, total: int, label: str = "", force: bool = False) -> None:
+        # Ligne de progression compacte, rafraîchie au plus toutes les 0,5 s au lieu d'un print par fichier
+        now = time.perf_counter()
+        is_tty = sys.stderr.isatty()
+        interval = PROGRESS_INTERVAL if is_tty else PROGRESS_INTERVAL_NO_TTY
+        if not force and done < total and now - self.last_progress < interval:
+            return
+        self.last_progress = now
+        elapsed = max(now - self.started, 1e-9)
+        hits = self.total("cache_hits")
+        misses = self.total("cache_misses")
+        hit_rate = f"{hits / (hits + misses):.0%}" if hits + misses else "-"
+        line = (
+            f"⏳ {label} {done}/{total} | {done / elapsed:.1f}/s | cache {hit_rate} | "
+            f"req {self.total('requests'):.0f} | 403 {self.total('http_403'):.0f} | "
+            f"retries {self.total('retries'):.0f} | {self.total('bytes') / 1e6:.1f} Mo"
+        )
+        if is_tty:
+            sys.stderr.write(f"\r{line}\033[K")
+            if done >= total:
+                sys.stderr.write("\n")
+        else:
+            sys.stderr.write(f"{line}\n")
+        sys.stderr.flush()
+
+    def summary(self) -> dict:
+        with self.lock:
+            counters: dict[str, dict[str, float]] = {}
+            for (name, stage), value in sorted(self.counters.items()):
+                counters.setdefault(stage, {})[name] = value
+            histograms: dict[str, dict[str, dict]] = {}
+            for (name, stage), histogram in sorted(self.histograms.items()):
+                histograms.setdefault(stage, {})[name] = histogram.summary()
+        return {
+            "elapsed_seconds": round(time.perf_counter() - self.started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self, prefix: str = "dofus_tracker") -> str:
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for (counter, stage), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f'{prefix}_{name}_total{{stage="{stage}"}} {value:g}')
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {prefix}_{name}_seconds histogram")
+                for (histogram_name, stage), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip([*histogram.buckets, "+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f'{prefix}_{name}_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{prefix}_{name}_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                    lines.append(f'{prefix}_{name}_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def report(self, run_name: str) -> None:
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        summary = self.summary()
+        (METRICS_DIR / f"{run_name}.json").write_text(json.dumps(summary, ensure_ascii=False, indent=4), encoding="utf-8")
+        (METRICS_DIR / f"{run_name}.prom").write_text(self.to_prometheus(), encoding="utf-8")
+
+        print(f"\n📊 Métriques {run_name} ({summary['elapsed_seconds']:.1f}s)")
+        for stage, counters in summary["counters"].items():
+            values = ", ".join(f"{name}={value:g}" for name, value in counters.items())
+            print(f"  {stage}: {values}")
+        for stage, histograms in summary["histograms"].items():
+            for name, histogram in histograms.items():
+                print(
+                    f"  {stage}.{name}: n={histogram['count']} moy={histogram['mean'] or 0:.4f}s "
+                    f"p50<={histogram['p50']}s p99<={histogram['p99']}s"
+                )
+        print(f"💾 Métriques sauvegardées: {METRICS_DIR / run_name}.json / .prom")
+
+
+METRICS = Metrics()
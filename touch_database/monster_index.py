@@ -0,0 +1,142 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+MONSTERS_CSV = DATA_DIR / "monstres_data.csv"
+MONSTER_INDEX_DIR = DATA_DIR / "binary" / "monsters"
+
+ELEMENTS = ["neutral", "earth", "fire", "water", "air"]
+ARRAY_NAMES = ["ids", "levels", "pv", "resistances", "resistance_ranges", "level_order"]
+
+
+def build_monster_index() -> dict[str, np.ndarray | list]:
+    monsters_df = pd.read_csv(MONSTERS_CSV)
+    ranges = np.stack(
+        [monsters_df[[f"res_{element}_min", f"res_{element}_max"]].fillna(0).to_numpy(np.float32) for element in ELEMENTS],
+        axis=1,
+    )
+    levels = monsters_df["level"].fillna(0).to_numpy(np.int16)
+    return {
+        "ids": monsters_df["monster_id"].to_numpy(np.int32),
+        "levels": levels,
+        "pv": monsters_df[["pv_min", "pv_max"]].fillna(0).to_numpy(np.float32),
+        # Profil de résistances = milieu de chaque fourchette, une colonne par élément
+        "resistances": ranges.mean(axis=2),
+        "resistance_ranges": ranges,
+        # Permutation triée par niveau : une plage de niveaux est une tranche contiguë
+        "level_order": np.argsort(levels, kind="stable").astype(np.int32),
+        "names": monsters_df["name"].tolist(),
+    }
+
+
+def save_monster_index(index: dict[str, np.ndarray | list], directory: Path = MONSTER_INDEX_DIR) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ARRAY_NAMES:
+        np.save(directory / f"{name}.npy", index[name])
+    with (directory / "names.json").open("w", encoding="utf-8") as file:
+        json.dump(index["names"], file, ensure_ascii=False, separators=(",", ":"))
+    print(f"💾 Index des monstres sauvegardé: {directory} ({len(index['ids'])} monstres)")
+
+
+class MonsterIndex:
+    def __init__(self, directory: Path = MONSTER_INDEX_DIR):
+        # np.asarray garde les pages mmap mais évite le coût de la sous-classe memmap à chaque indexation
+        arrays = {name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode="r")) for name in ARRAY_NAMES}
+        self.ids = arrays["ids"]
+        self.levels = arrays["levels"]
+        self.pv = arrays["pv"]
+        self.resistances = arrays["resistances"]
+        self.resistance_ranges = arrays["resistance_ranges"]
+        self.level_order = arrays["level_order"]
+        self.sorted_levels = self.levels[self.level_order]
+        with (directory / "names.json").open(encoding="utf-8") as file:
+            self.names = json.load(file)
+        self.tree = cKDTree(self.resistances)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def level_rows(self, min_level: int | None = None, max_level: int | None = None) -> np.ndarray:
+        start = 0 if min_level is None else np.searchsorted(self.sorted_levels, min_level, side="left")
+        end = len(self.sorted_levels) if max_level is None else np.searchsorted(self.sorted_levels, max_level, side="right")
+        return self.level_order[start:end]
+
+    def monster(self, row: int, **extra) -> dict:
+        return {
+            "monster_id": int(self.ids[row]),
+            "name": self.names[row],
+            "level": int(self.levels[row]),
+            "pv": self.pv[row].tolist(),
+            "resistances": dict(zip(ELEMENTS, self.resistance_ranges[row].tolist())),
+            **extra,
+        }
+
+    def weakest_to(
+        self, element: str, min_level: int | None = None, max_level: int | None = None, limit: int = 10
+    ) -> list[dict]:
+        rows = self.level_rows(min_level, max_level)
+        values = self.resistances[rows, ELEMENTS.index(element)]
+        if len(rows) > limit:
+            keep = np.argpartition(values, limit)[:limit]
+            rows, values = rows[keep], values[keep]
+        order = np.argsort(values, kind="stable")
+        return [self.monster(int(rows[position])) for position in order]
+
+    def nearest(
+        self, profile: dict[str, float], k: int = 10, min_level: int | None = None, max_level: int | None = None
+    ) -> list[dict]:
+        target = np.asarray([profile.get(element, 0.0) for element in ELEMENTS], dtype=np.float32)
+        if min_level is None and max_level is None:
+            distances, rows = self.tree.query(target, k=min(k, len(self)))
+            pairs = zip(np.atleast_1d(rows), np.atleast_1d(distances))
+        else:
+            # Une plage de niveaux réduit déjà l'ensemble : distance calculée directement sur la tranche
+            rows = self.level_rows(min_level, max_level)
+            distances = np.linalg.norm(self.resistances[rows] - target, axis=1)
+            keep = np.argsort(distances, kind="stable")[:k]
+            pairs = zip(rows[keep], distances[keep])
+        return [self.monster(int(row), distance=round(float(distance), 3)) for row, distance in pairs]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge l'index des monstres par niveau et résistances.")
+    parser.add_argument("--weakest", choices=ELEMENTS, help="Monstres les plus faibles à cet élément.")
+    parser.add_argument("--nearest", help="Profil de résistances 'neutre,terre,feu,eau,air' (ex: 0,-20,10,10,10).")
+    parser.add_argument("--min-level", type=int)
+    parser.add_argument("--max-level", type=int)
+    parser.add_argument("--limit", type=int, default=10)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.weakest and not args.nearest:
+        save_monster_index(build_monster_index())
+        return
+
+    index = MonsterIndex()
+    started = time.perf_counter()
+    if args.weakest:
+        results = index.weakest_to(args.weakest, args.min_level, args.max_level, args.limit)
+    else:
+        profile = dict(zip(ELEMENTS, (float(value) for value in args.nearest.split(","))))
+        results = index.nearest(profile, args.limit, args.min_level, args.max_level)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    for result in results:
+        resistances = " ".join(f"{element[:3]} {sum(values) / 2:+.0f}" for element, values in result["resistances"].items())
+        print(f"[{result['level']:>3}] {result['name']}: {resistances}")
+    print(f"⏱️ {len(results)} résultats en {elapsed_us:.0f} µs")
+
+
+if __name__ == "__main__":
+    run_stage("monster_index", main)
@@ -1,24 +1,35 @@
 import argparse
 import csv
+import hashlib
 import json
 import os
 import random
 import re
+import sqlite3
 import time
 from pathlib import Path
 from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
+
+from cache_manager import mark_used
+from crawl_coordinator import add_worker_args, attach_from_args, in_shard, pause, shard_label, throttle
+from metrics import METRICS
+from profiling import run_stage
 
 
 BASE_URL = "https://www.dofus-touch.com"
+# Les URLs stockées restent canoniques, seules les requêtes partent vers cet hôte (cf. replay_server.py)
+FETCH_BASE_URL = os.environ.get("DOFUS_TOUCH_BASE_URL", BASE_URL)
 ROOT_DIR = Path(__file__).resolve().parent
 HTML_DIR = ROOT_DIR / "html" / "monstres"
 DEEP_HTML_DIR = ROOT_DIR / "deep_html" / "monstres"
 ITEMS_HTML_DIR = ROOT_DIR / "deep_html" / "items"
+ITEM_CONDITIONS_DB = ROOT_DIR / "deep_html" / "item_conditions.sqlite"
 DATA_DIR = ROOT_DIR / "data"
 JSON_DIR = DATA_DIR / "json"
+MONSTERS_LOG = JSON_DIR / "monsters.jsonl"
 
 DEFAULT_LIST_PAGES = list(range(1, 57))
 DEFAULT_MONSTER_URLS = [
@@ -41,6 +52,9 @@ HEADERS = {
 SESSION = requests.Session()
 SESSION.headers.update(HEADERS)
 
+ITEM_CONDITION_MEMO: dict[str, str | None] = {}
+_ITEM_CONDITIONS_CONNECTION: sqlite3.Connection | None = None
+
 RESISTANCE_LABELS = {
     "neutral": "neutral",
     "neutre": "neutral",
@@ -120,22 +134,37 @@ def is_blocked_html(html_content: str) -> bool:
     return any(marker in html_content for marker in markers)
 
 
-def request_html(url: str, retries: int = 3, delay: float = 2.0) -> str:
+def fetch_url(url: str) -> str:
+    if FETCH_BASE_URL != BASE_URL and url.startswith(BASE_URL):
+        return FETCH_BASE_URL + url[len(BASE_URL):]
+    return url
+
+
+def request_html(url: str, retries: int = 3, delay: float = 2.0, stage: str = "http") -> str:
     last_error: Exception | None = None
+    target_url = fetch_url(url)
     for attempt in range(1, retries + 1):
         try:
-            response = SESSION.get(url, timeout=20)
+            throttle(target_url)
+            METRICS.inc("requests", stage=stage)
+            with METRICS.timer("request", stage=stage):
+                response = SESSION.get(target_url, timeout=20)
+            METRICS.inc("bytes", len(response.content), stage=stage)
             if response.status_code == 403:
+                METRICS.inc("http_403", stage=stage)
                 raise RateLimitedError(f"403 Client Error: Forbidden for url: {url}")
             response.raise_for_status()
             if is_blocked_html(response.text):
+                METRICS.inc("blocked", stage=stage)
                 raise RateLimitedError("Page bloquée par anti-bot/CloudFront")
             return response.text
         except RateLimitedError:
             raise
         except Exception as exc:
             last_error = exc
+            METRICS.inc("errors", stage=stage)
             if attempt < retries:
+                METRICS.inc("retries", stage=stage)
                 print(f"⚠️ {url} indisponible ({exc}) - tentative {attempt}/{retries}")
                 time.sleep(delay * attempt)
     raise RuntimeError(f"Impossible de télécharger {url}: {last_error}")
@@ -160,13 +189,15 @@ def fetch_list_page_if_missing(page: int) -> str | None:
     HTML_DIR.mkdir(parents=True, exist_ok=True)
     filename = HTML_DIR / f"monstres_page_{page}.html"
     if filename.exists():
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage="monster_list")
+        mark_used(filename)
         return filename.read_text(encoding="utf-8")
 
+    METRICS.inc("cache_misses", stage="monster_list")
     url = f"{BASE_URL}/fr/mmorpg/encyclopedie/monstres?page={page}"
     print(f"📥 Téléchargement: {url}")
     try:
-        html_content = request_html(url, retries=3)
+        html_content = request_html(url, retries=3, stage="monster_list")
     except RateLimitedError:
         raise
     except Exception as exc:
@@ -185,7 +216,7 @@ def wait_until_reopened(
 ) -> str:
     while True:
         print(f"⏸️ Rate limit détecté. Pause {rate_limit_pause:.0f}s avant retry...")
-        time.sleep(rate_limit_pause)
+        pause(rate_limit_pause)
         try:
             html_content = fetch_monster_page_if_missing(
                 source["url"],
@@ -213,9 +244,11 @@ def fetch_monster_page_if_missing(
     DEEP_HTML_DIR.mkdir(parents=True, exist_ok=True)
     filename = monster_cache_path(monster_url)
     if filename.exists():
-        print(f"✓ Fichier existant: {filename}")
+        METRICS.inc("cache_hits", stage="monster_detail")
+        mark_used(filename)
         return filename.read_text(encoding="utf-8")
 
+    METRICS.inc("cache_misses", stage="monster_detail")
     if cache_only:
         print(f"⚠️ Cache manquant: {filename}")
         return None
@@ -223,7 +256,7 @@ def fetch_monster_page_if_missing(
     time.sleep(request_delay + random.uniform(0, request_delay * 0.35))
     print(f"📥 Téléchargement: {monster_url}")
     try:
-        html_content = request_html(monster_url, retries=retries)
+        html_content = request_html(monster_url, retries=retries, stage="monster_detail")
     except Exception as exc:
         print(f"❌ {exc}")
         return None
@@ -232,6 +265,61 @@ def fetch_monster_page_if_missing(
     return html_content
 
 
+def item_conditions_connection() -> sqlite3.Connection:
+    global _ITEM_CONDITIONS_CONNECTION
+    if _ITEM_CONDITIONS_CONNECTION is None:
+        ITEM_CONDITIONS_DB.parent.mkdir(parents=True, exist_ok=True)
+        # SQLite en WAL : le cache est partagé entre les runs et les processus workers
+        connection = sqlite3.connect(ITEM_CONDITIONS_DB, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS item_conditions ("
+            "item_id TEXT PRIMARY KEY, page_hash TEXT NOT NULL, condition TEXT)"
+        )
+        connection.commit()
+        _ITEM_CONDITIONS_CONNECTION = connection
+    return _ITEM_CONDITIONS_CONNECTION
+
+
+def cached_item_condition(item_id: str, page_hash: str) -> tuple[bool, str | None]:
+    row = item_conditions_connection().execute(
+        "SELECT condition FROM item_conditions WHERE item_id = ? AND page_hash = ?",
+        (item_id, page_hash),
+    ).fetchone()
+    return (True, row[0]) if row else (False, None)
+
+
+def store_item_condition(item_id: str, page_hash: str, condition: str | None) -> None:
+    connection = item_conditions_connection()
+    connection.execute(
+        "INSERT OR REPLACE INTO item_conditions (item_id, page_hash, condition) VALUES (?, ?, ?)",
+        (item_id, page_hash, condition),
+    )
+    connection.commit()
+
+
+def parse_item_condition(html_content: str) -> str | None:
+    soup = BeautifulSoup(html_content, "html.parser")
+    for panel in soup.find_all(lambda tag: tag.name == "div" and has_css_class(tag, "ak-panel")):
+        title = panel.find("div", class_="ak-panel-title")
+        if title and "Description" in title.get_text():
+            content = panel.find("div", class_="ak-panel-content")
+            if content:
+                desc = clean_text(content.get_text(" ", strip=True))
+                match = re.search(r"\(([^)]+)\)$", desc)
+                if match:
+                    cond = match.group(1).strip()
+                    lower_cond = cond.lower()
+                    if lower_cond.startswith("+") or lower_cond.startswith("-") or lower_cond.replace(' ', '').isdigit():
+                        return None
+                    if "apparat" in lower_cond or "apparence" in lower_cond:
+                        return None
+                    if "existe aussi" in lower_cond or "jeter la clef" in lower_cond or "sous-zone :" in lower_cond:
+                        return None
+                    return cond
+    return None
+
+
 def fetch_item_condition(
     item_url: str,
     retries: int = 1,
@@ -245,44 +333,42 @@ def fetch_item_condition(
         item_id, item_slug = split_id_slug(item_url)
     except ValueError:
         return None
-    
+
+    if item_id in ITEM_CONDITION_MEMO:
+        METRICS.inc("memo_hits", stage="item_condition")
+        return ITEM_CONDITION_MEMO[item_id]
+
     filename = ITEMS_HTML_DIR / f"{item_id}_{item_slug}.html"
-    
+
     if filename.exists():
+        METRICS.inc("cache_hits", stage="item_condition")
+        mark_used(filename)
         html_content = filename.read_text(encoding="utf-8")
     elif cache_only:
+        METRICS.inc("cache_misses", stage="item_condition")
         return None
     else:
+        METRICS.inc("cache_misses", stage="item_condition")
         time.sleep(request_delay + random.uniform(0, request_delay * 0.35))
         print(f"📥 Téléchargement item condition: {item_url}")
         try:
-            html_content = request_html(item_url, retries=retries)
+            html_content = request_html(item_url, retries=retries, stage="item_condition")
             filename.write_text(html_content, encoding="utf-8")
         except RateLimitedError:
             raise
         except Exception as exc:
             print(f"❌ Erreur sur l'item {item_url}: {exc}")
             return None
-            
-    soup = BeautifulSoup(html_content, "html.parser")
-    for panel in soup.find_all(lambda tag: tag.name == "div" and has_css_class(tag, "ak-panel")):
-        title = panel.find("div", class_="ak-panel-title")
-        if title and "Description" in title.get_text():
-            content = panel.find("div", class_="ak-panel-content")
-            if content:
-                desc = clean_text(content.get_text(" ", strip=True))
-                match = re.search(r"\(([^)]+)\)$", desc)
-                if match:
-                    cond = match.group(1).strip()
-                    lower_cond = cond.lower()
-                    if lower_cond.startswith("+") or lower_cond.startswith("-") or lower_cond.replace(' ', '').isdigit():
-                        return None
-                    if "apparat" in lower_cond or "apparence" in lower_cond:
-                        return None
-                    if "existe aussi" in lower_cond or "jeter la clef" in lower_cond or "sous-zone :" in lower_cond:
-                        return None
-                    return cond
-    return None
+
+    # Une page n'est reparsée que si son contenu a changé depuis la dernière extraction
+    page_hash = hashlib.sha1(html_content.encode("utf-8")).hexdigest()
+    found, condition = cached_item_condition(item_id, page_hash)
+    if not found:
+        with METRICS.timer("parse", stage="item_condition"):
+            condition = parse_item_condition(html_content)
+        store_item_condition(item_id, page_hash, condition)
+    ITEM_CONDITION_MEMO[item_id] = condition
+    return condition
 
 
 def extract_monster_urls_from_html(html_content: str) -> list[dict]:
@@ -328,9 +414,15 @@ def find_panels(soup: BeautifulSoup, title_pattern: str):
     ]
 
 
-def extract_link_entity(element, expected_category: str | None = None) -> dict:
-    href_pattern = r"/fr/mmorpg/encyclopedie/([^/]+)/(\d+)-([^\"#?]+)"
-    links = element.find_all("a", href=re.compile(href_pattern))
+ENTITY_HREF_PATTERN = r"/fr/mmorpg/encyclopedie/([^/]+)/(\d+)-([^\"#?]+)"
+
+
+def extract_link_entity(element, expected_category: str | None = None, parts: dict | None = None) -> dict:
+    href_pattern = ENTITY_HREF_PATTERN
+    if parts is None:
+        links = element.find_all("a", href=re.compile(href_pattern))
+    else:
+        links = [link for link in parts["links"] if re.search(href_pattern, link["href"])]
     link = next((candidate for candidate in links if clean_text(candidate.get_text(" ", strip=True))), None)
     if not link and links:
         link = links[0]
@@ -346,7 +438,7 @@ def extract_link_entity(element, expected_category: str | None = None) -> dict:
     if expected_category and category != expected_category:
         return {}
 
-    image = element.find("img")
+    image = element.find("img") if parts is None else parts["image"]
     return {
         "id": entity_id,
         "name": clean_text(link.get_text(" ", strip=True)),
@@ -357,52 +449,137 @@ def extract_link_entity(element, expected_category: str | None = None) -> dict:
     }
 
 
-def extract_monster_name(soup: BeautifulSoup) -> str:
-    title = soup.find("h1", class_="ak-return-link") or soup.find("h1")
+def list_element_parts(element) -> dict:
+    # Un seul parcours des descendants d'un ak-list-element au lieu d'un find() par sous-élément
+    parts = {
+        "title": None,
+        "aside": None,
+        "front": None,
+        "drop_percent": None,
+        "image": None,
+        "scripts": [],
+        "texts": [],
+        "links": [],
+    }
+    for tag in element.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        if tag.name == "div":
+            classes = tag.get("class") or []
+            for key, class_name in [
+                ("title", "ak-title"),
+                ("aside", "ak-aside"),
+                ("front", "ak-front"),
+                ("drop_percent", "ak-drop-percent"),
+            ]:
+                if parts[key] is None and class_name in classes:
+                    parts[key] = tag
+            if "ak-text" in classes:
+                parts["texts"].append(tag)
+        elif tag.name == "script" and tag.get("type") == "application/json":
+            parts["scripts"].append(tag)
+        elif tag.name == "img" and parts["image"] is None:
+            parts["image"] = tag
+        elif tag.name == "a" and tag.get("href") is not None:
+            parts["links"].append(tag)
+    return parts
+
+
+def scan_monster_page(soup: BeautifulSoup) -> dict:
+    # Parcours préfixe unique du document (même ordre que find_all) : collecte les panneaux avec
+    # leur titre, les éléments de liste avec leur panneau le plus proche et les éléments d'en-tête.
+    scan = {
+        "panels": [],
+        "list_elements": [],
+        "return_link_h1": None,
+        "first_h1": None,
+        "image": None,
+        "type_element": None,
+        "level_element": None,
+    }
+    stack = [(child, None, False, False) for child in reversed(soup.contents) if isinstance(child, Tag)]
+    while stack:
+        tag, nearest_panel, in_illu, in_type = stack.pop()
+        classes = tag.get("class") or []
+        child_panel = nearest_panel
+        if tag.name == "div":
+            if "ak-list-element" in classes:
+                scan["list_elements"].append((tag, nearest_panel, list_element_parts(tag)))
+            if "ak-panel" in classes:
+                scan["panels"].append((tag, panel_title(tag)))
+                child_panel = tag
+        elif tag.name == "h1":
+            if scan["first_h1"] is None:
+                scan["first_h1"] = tag
+            if scan["return_link_h1"] is None and "ak-return-link" in classes:
+                scan["return_link_h1"] = tag
+        elif tag.name == "img" and in_illu and scan["image"] is None:
+            scan["image"] = tag
+        elif tag.name == "span" and in_type and scan["type_element"] is None:
+            scan["type_element"] = tag
+        if scan["level_element"] is None and "ak-encyclo-detail-level" in classes:
+            scan["level_element"] = tag
+
+        child_in_illu = in_illu or "ak-encyclo-detail-illu" in classes
+        child_in_type = in_type or "ak-encyclo-detail-type" in classes
+        stack.extend(
+            (child, child_panel, child_in_illu, child_in_type)
+            for child in reversed(tag.contents)
+            if isinstance(child, Tag)
+        )
+    return scan
+
+
+def extract_monster_name(soup: BeautifulSoup, scan: dict | None = None) -> str:
+    scan = scan or scan_monster_page(soup)
+    title = scan["return_link_h1"] or scan["first_h1"]
     return clean_text(title.get_text(" ", strip=True)) if title else ""
 
 
-def extract_monster_basics(soup: BeautifulSoup) -> dict:
+def extract_monster_basics(soup: BeautifulSoup, scan: dict | None = None) -> dict:
+    scan = scan or scan_monster_page(soup)
     info = {
-        "name": extract_monster_name(soup),
+        "name": extract_monster_name(soup, scan),
         "type": None,
         "level": None,
         "image_url": None,
     }
 
-    image = soup.select_one(".ak-encyclo-detail-illu img")
+    image = scan["image"]
     if image:
         info["image_url"] = image.get("src") or image.get("data-src")
 
-    type_element = soup.select_one(".ak-encyclo-detail-type span")
+    type_element = scan["type_element"]
     if type_element:
         info["type"] = clean_text(type_element.get_text(" ", strip=True))
 
-    level_element = soup.select_one(".ak-encyclo-detail-level")
+    level_element = scan["level_element"]
     if level_element:
         info["level"] = parse_first_int(level_element.get_text(" ", strip=True))
 
     return info
 
 
-def stat_label_from_element(element) -> str:
+def stat_label_from_element(element, parts: dict | None = None) -> str:
+    parts = parts or list_element_parts(element)
     pieces = []
-    for script in element.find_all("script", type="application/json"):
+    for script in parts["scripts"]:
         pieces.append(script.get_text(" ", strip=True))
 
-    aside = element.find("div", class_="ak-aside")
+    aside = parts["aside"]
     if aside:
         pieces.append(" ".join(aside.get("class", [])))
         pieces.append(aside.get_text(" ", strip=True))
 
-    title = element.find("div", class_="ak-title")
+    title = parts["title"]
     if title:
         pieces.append(title.get_text(" ", strip=True))
 
     return normalize_label(" ".join(pieces))
 
 
-def extract_stats(soup: BeautifulSoup) -> dict:
+def extract_stats(soup: BeautifulSoup, scan: dict | None = None) -> dict:
+    scan = scan or scan_monster_page(soup)
     stats = {
         "pv_min": None,
         "pv_max": None,
@@ -415,10 +592,10 @@ def extract_stats(soup: BeautifulSoup) -> dict:
         },
     }
 
-    for element in soup.find_all(lambda tag: tag.name == "div" and has_css_class(tag, "ak-list-element")):
-        title = element.find("div", class_="ak-title")
+    for element, _, parts in scan["list_elements"]:
+        title = parts["title"]
         title_text = clean_text(title.get_text(" ", strip=True)) if title else ""
-        label = stat_label_from_element(element)
+        label = stat_label_from_element(element, parts)
 
         if any(marker in label for marker in ["point de vie", "points de vie", "vitalite", "pv"]):
             stats["pv_min"], stats["pv_max"] = parse_number_range(title_text)
@@ -434,8 +611,9 @@ def extract_stats(soup: BeautifulSoup) -> dict:
                     }
                 break
 
-    page_text = clean_text(soup.get_text(" ", strip=True))
+    # Le texte complet de la page n'est calculé que si les PV n'ont pas été trouvés
     if stats["pv_min"] is None:
+        page_text = clean_text(soup.get_text(" ", strip=True))
         pv_match = re.search(r"(\d[\d ]*)\s*(?:a|à|-)\s*(\d[\d ]*)\s*(?:PV|points de vie)", page_text, re.IGNORECASE)
         if pv_match:
             stats["pv_min"], stats["pv_max"] = parse_number_range(pv_match.group(0))
@@ -443,9 +621,15 @@ def extract_stats(soup: BeautifulSoup) -> dict:
     return stats
 
 
-def extract_zones(soup: BeautifulSoup) -> list[str]:
+def scanned_panels(scan: dict, title_pattern: str) -> list:
+    regex = re.compile(title_pattern, re.IGNORECASE)
+    return [panel for panel, title in scan["panels"] if regex.search(title)]
+
+
+def extract_zones(soup: BeautifulSoup, scan: dict | None = None) -> list[str]:
+    scan = scan or scan_monster_page(soup)
     zones = []
-    for panel in find_panels(soup, r"^zones?$"):
+    for panel in scanned_panels(scan, r"^zones?$"):
         content = panel.find("div", class_="ak-panel-content", recursive=False)
         if not content:
             continue
@@ -462,26 +646,27 @@ def extract_zones(soup: BeautifulSoup) -> list[str]:
     return unique_zones
 
 
-def extract_drops_from_panel(panel, drop_kind: str, fetch_condition_fn=None) -> list[dict]:
+def extract_drops_from_panel(panel, drop_kind: str, fetch_condition_fn=None, list_elements: list | None = None) -> list[dict]:
     drops = []
-    list_elements = panel.find_all(lambda tag: tag.name == "div" and has_css_class(tag, "ak-list-element"))
-    for element in list_elements:
-        nearest_panel = element.find_parent(lambda tag: tag.name == "div" and has_css_class(tag, "ak-panel"))
-        if nearest_panel is not panel:
-            continue
-
-        item = extract_link_entity(element)
+    if list_elements is None:
+        list_elements = [
+            (element, list_element_parts(element))
+            for element in panel.find_all(lambda tag: tag.name == "div" and has_css_class(tag, "ak-list-element"))
+            if element.find_parent(lambda tag: tag.name == "div" and has_css_class(tag, "ak-panel")) is panel
+        ]
+    for element, parts in list_elements:
+        item = extract_link_entity(element, parts=parts)
         if not item or item["category"] == "monstres":
             continue
 
-        aside = element.find("div", class_="ak-aside")
+        aside = parts["aside"]
         item_level = parse_first_int(aside.get_text(" ", strip=True)) if aside else None
-        probability_element = element.find("div", class_="ak-drop-percent")
+        probability_element = parts["drop_percent"]
         probability_text = clean_text(probability_element.get_text(" ", strip=True)) if probability_element else ""
         if not probability_text:
             probability_text = clean_text(element.get_text(" ", strip=True))
-        text_elements = [clean_text(text.get_text(" ", strip=True)) for text in element.find_all("div", class_="ak-text")]
-        front = element.find("div", class_="ak-front")
+        text_elements = [clean_text(text.get_text(" ", strip=True)) for text in parts["texts"]]
+        front = parts["front"]
         front_text = clean_text(front.get_text(" ", strip=True)) if front else ""
 
         condition = ""
@@ -510,16 +695,29 @@ def extract_drops_from_panel(panel, drop_kind: str, fetch_condition_fn=None) ->
     return drops
 
 
-def extract_drops(soup: BeautifulSoup, fetch_condition_fn=None) -> dict:
+def extract_drops(soup: BeautifulSoup, fetch_condition_fn=None, scan: dict | None = None) -> dict:
+    scan = scan or scan_monster_page(soup)
     normal_drops = []
     conditioned_drops = []
 
-    for panel in find_panels(soup, r"butin|drop"):
+    elements_by_panel: dict[int, list] = {}
+    for element, nearest_panel, parts in scan["list_elements"]:
+        if nearest_panel is not None:
+            elements_by_panel.setdefault(id(nearest_panel), []).append((element, parts))
+
+    for panel in scanned_panels(scan, r"butin|drop"):
         title = normalize_label(panel_title(panel))
-        if "condition" in title:
-            conditioned_drops.extend(extract_drops_from_panel(panel, "conditioned", fetch_condition_fn=fetch_condition_fn))
+        drop_kind = "conditioned" if "condition" in title else "normal"
+        panel_drops = extract_drops_from_panel(
+            panel,
+            drop_kind,
+            fetch_condition_fn=fetch_condition_fn,
+            list_elements=elements_by_panel.get(id(panel), []),
+        )
+        if drop_kind == "conditioned":
+            conditioned_drops.extend(panel_drops)
         else:
-            normal_drops.extend(extract_drops_from_panel(panel, "normal", fetch_condition_fn=fetch_condition_fn))
+            normal_drops.extend(panel_drops)
 
     return {
         "drops": normal_drops,
@@ -529,10 +727,11 @@ def extract_drops(soup: BeautifulSoup, fetch_condition_fn=None) -> dict:
 
 def extract_monster_details(html_content: str, source_url: str | None = None, fetch_condition_fn=None) -> dict:
     soup = BeautifulSoup(html_content, "html.parser")
-    basics = extract_monster_basics(soup)
-    stats = extract_stats(soup)
-    zones = extract_zones(soup)
-    drops = extract_drops(soup, fetch_condition_fn=fetch_condition_fn)
+    scan = scan_monster_page(soup)
+    basics = extract_monster_basics(soup, scan)
+    stats = extract_stats(soup, scan)
+    zones = extract_zones(soup, scan)
+    drops = extract_drops(soup, fetch_condition_fn=fetch_condition_fn, scan=scan)
 
     monster_id = None
     monster_slug = None
@@ -615,10 +814,64 @@ def write_csv(path: Path, rows: list[dict]) -> None:
     if not rows:
         return
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="") as file:
+    # Écriture dans un fichier temporaire puis remplacement atomique : jamais de CSV à moitié écrit
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8", newline="") as file:
         writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
         writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+class MonsterCheckpoint:
+    def __init__(self, path: Path = MONSTERS_LOG, fsync_every: int = 25, resume: bool = False):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.pending = 0
+        self.file = path.open("a" if resume else "w", encoding="utf-8")
+        if resume and path.stat().st_size:
+            with path.open("rb") as log:
+                log.seek(-1, os.SEEK_END)
+                if log.read(1) != b"\n":
+                    # Termine une ligne tronquée pour ne pas coller le prochain record dessus
+                    self.file.write("\n")
+
+    def append(self, monster: dict) -> None:
+        self.file.write(json.dumps(monster, ensure_ascii=False) + "\n")
+        self.pending += 1
+        if self.fsync_every > 0 and self.pending >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def worker_path(path: Path, label: str | None) -> Path:
+    # Un fichier par shard/worker : plusieurs processus n'écrivent jamais dans le même journal ou CSV
+    return path.with_name(f"{path.stem}.{label}{path.suffix}") if label else path
+
+
+def read_checkpoint(path: Path = MONSTERS_LOG) -> list[dict]:
+    if not path.exists():
+        return []
+    monsters = {}
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            try:
+                monster = json.loads(line)
+            except json.JSONDecodeError:
+                # Dernière ligne tronquée par un crash : on l'ignore, le monstre sera ré-extrait
+                continue
+            monsters[monster["monster_id"]] = monster
+    return list(monsters.values())
 
 
 def save_monster_sources(sources: list[dict]) -> None:
@@ -626,19 +879,63 @@ def save_monster_sources(sources: list[dict]) -> None:
     print(f"💾 URLs sauvegardées: {DATA_DIR / 'monster_sources.csv'}")
 
 
-def save_failed_sources(failed_sources: list[dict]) -> None:
+def save_failed_sources(failed_sources: list[dict], label: str | None = None) -> None:
     if not failed_sources:
         return
-    write_csv(DATA_DIR / "monster_failed_sources.csv", failed_sources)
-    print(f"⚠️ Échecs sauvegardés: {DATA_DIR / 'monster_failed_sources.csv'}")
+    path = worker_path(DATA_DIR / "monster_failed_sources.csv", label)
+    write_csv(path, failed_sources)
+    print(f"⚠️ Échecs sauvegardés: {path}")
+
+
+def worker_journals() -> list[Path]:
+    return list(JSON_DIR.glob(f"{MONSTERS_LOG.stem}.*{MONSTERS_LOG.suffix}"))
+
+
+def journal_paths() -> list[Path]:
+    # Du plus ancien au plus récent : pour un même monstre, le dernier journal écrit l'emporte
+    paths = [path for path in [MONSTERS_LOG, *worker_journals()] if path.exists()]
+    return sorted(paths, key=lambda path: (path.stat().st_mtime_ns, path.name))
+
+
+def merge_journals() -> list[dict]:
+    # Extraction la plus récente de chaque monstre, rangée dans l'ordre des sources : même résultat
+    # qu'un crawl mono-processus, quel que soit le découpage entre shards ou workers
+    merged: dict[str, dict] = {}
+    for path in journal_paths():
+        for monster in read_checkpoint(path):
+            merged[monster["monster_id"]] = monster
+    order: dict[str, int] = {}
+    sources_path = DATA_DIR / "monster_sources.csv"
+    if sources_path.exists():
+        with sources_path.open(encoding="utf-8", newline="") as file:
+            for index, row in enumerate(csv.DictReader(file)):
+                order.setdefault(row["monster_id"], index)
+    return sorted(
+        merged.values(),
+        key=lambda monster: (order.get(monster["monster_id"], len(order)), int(monster["monster_id"])),
+    )
+
+
+def consolidate_journals(monsters: list[dict]) -> None:
+    # Le résultat fusionné devient monsters.jsonl ; les journaux des workers, absorbés, sont supprimés
+    # pour qu'un ancien journal ne revienne jamais dans une fusion ultérieure
+    tmp_path = MONSTERS_LOG.with_name(f"{MONSTERS_LOG.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        for monster in monsters:
+            file.write(json.dumps(monster, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, MONSTERS_LOG)
+    for path in worker_journals():
+        path.unlink()
 
 
 def save_monsters(monsters: list[dict]) -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     JSON_DIR.mkdir(parents=True, exist_ok=True)
 
-    with (JSON_DIR / "monsters.json").open("w", encoding="utf-8") as file:
+    tmp_path = JSON_DIR / "monsters.json.tmp"
+    with tmp_path.open("w", encoding="utf-8") as file:
         json.dump(monsters, file, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, JSON_DIR / "monsters.json")
 
     write_csv(DATA_DIR / "monstres_data.csv", flatten_monsters(monsters))
     write_csv(DATA_DIR / "monster_drops.csv", flatten_drops(monsters))
@@ -684,18 +981,100 @@ def scrape_monsters(
     save_every: int,
     cache_only: bool,
     rate_limit_pause: float,
+    resume: bool = False,
+    shard: tuple[int, int] | None = None,
+    work_queue=None,
+    label: str | None = None,
+    fresh: bool = False,
 ) -> tuple[list[dict], list[dict]]:
     sources = collect_monster_sources(pages, monster_urls, include_list_details)
-    save_monster_sources(sources)
+    # Chaque worker lit toutes les listes (cache) ; un seul écrit monster_sources.csv, ordre de référence de la fusion
+    published = (
+        work_queue.enqueue("monstres", [(source["monster_id"], source) for source in sources], fresh) if work_queue else 0
+    )
+    if (shard is None and work_queue is None) or (shard and shard[0] == 0) or published:
+        save_monster_sources(sources)
     if not include_list_details:
         return [], []
 
-    monsters = []
+    # En file, les tâches terminées vivent dans la base : le journal du worker est toujours complété, jamais tronqué
+    resume = resume or work_queue is not None
+    log_path = worker_path(MONSTERS_LOG, label)
+    monsters = read_checkpoint(log_path) if resume else []
+    if monsters:
+        print(f"↩️ Reprise: {len(monsters)} monstres déjà extraits dans {log_path}")
+    done_ids = {monster["monster_id"] for monster in monsters}
     failed_sources = []
+    checkpoint = MonsterCheckpoint(log_path, fsync_every=save_every, resume=resume)
+    crawl_options = {
+        "monsters": monsters,
+        "failed_sources": failed_sources,
+        "checkpoint": checkpoint,
+        "detail_retries": detail_retries,
+        "detail_delay": detail_delay,
+        "stop_after_consecutive_failures": stop_after_consecutive_failures,
+        "cache_only": cache_only,
+        "rate_limit_pause": rate_limit_pause,
+        "label": label,
+    }
+    try:
+        if work_queue is None:
+            crawl_monster_sources(
+                sources=[
+                    source
+                    for source in sources
+                    if source["monster_id"] not in done_ids and in_shard(source["monster_id"], shard)
+                ],
+                **crawl_options,
+            )
+        else:
+            lost: set[str] = set()
+
+            def still_leased(source: dict) -> bool:
+                # Bail renouvelé avant chaque monstre ; perdu, le monstre est laissé au worker qui l'a repris
+                if work_queue.heartbeat("monstres", [source["monster_id"]]):
+                    lost.add(source["monster_id"])
+                    return False
+                return True
+
+            for batch in work_queue.drain("monstres"):
+                extracted, failed = len(monsters), len(failed_sources)
+                crawl_monster_sources(sources=[source for _, source in batch], still_leased=still_leased, **crawl_options)
+                done = [monster["monster_id"] for monster in monsters[extracted:]]
+                failed_ids = [source["monster_id"] for source in failed_sources[failed:]]
+                checkpoint.sync()
+                work_queue.complete("monstres", done)
+                work_queue.complete("monstres", failed_ids, "failed")
+                # Crawl arrêté avant la fin du lot (échecs consécutifs) : le reste retourne en file pour les autres
+                handled = set(done) | set(failed_ids) | lost
+                remaining = [key for key, _ in batch if key not in handled]
+                if remaining:
+                    work_queue.release("monstres", remaining)
+                    break
+    finally:
+        checkpoint.close()
+    return monsters, failed_sources
+
+
+def crawl_monster_sources(
+    sources: list[dict],
+    monsters: list[dict],
+    failed_sources: list[dict],
+    checkpoint: MonsterCheckpoint,
+    detail_retries: int,
+    detail_delay: float,
+    stop_after_consecutive_failures: int,
+    cache_only: bool,
+    rate_limit_pause: float,
+    label: str | None = None,
+    still_leased=None,
+) -> None:
     consecutive_failures = 0
 
     for index, source in enumerate(sources, 1):
-        print(f"🔍 [{index}/{len(sources)}] {source['url']}")
+        METRICS.progress(index, len(sources), "monstres")
+        if still_leased is not None and not still_leased(source):
+            continue
         try:
             html_content = fetch_monster_page_if_missing(
                 source["url"],
@@ -705,9 +1084,8 @@ def scrape_monsters(
             )
         except RateLimitedError as exc:
             print(f"⚠️ {exc}")
-            save_failed_sources(failed_sources)
-            if monsters:
-                save_monsters(monsters)
+            save_failed_sources(failed_sources, label)
+            checkpoint.sync()
             html_content = wait_until_reopened(
                 source=source,
                 detail_retries=detail_retries,
@@ -740,15 +1118,12 @@ def scrape_monsters(
                 cache_only=cache_only,
             )
             
-        monster = extract_monster_details(html_content, source["url"], fetch_condition_fn=fetch_condition)
+        with METRICS.timer("parse", stage="monster_detail"):
+            monster = extract_monster_details(html_content, source["url"], fetch_condition_fn=fetch_condition)
         monster["monster_id"] = source["monster_id"]
         monster["monster_slug"] = source["monster_slug"]
         monsters.append(monster)
-        if save_every > 0 and len(monsters) % save_every == 0:
-            save_failed_sources(failed_sources)
-            save_monsters(monsters)
-
-    return monsters, failed_sources
+        checkpoint.append(monster)
 
 
 def parse_args() -> argparse.Namespace:
@@ -788,18 +1163,51 @@ def parse_args() -> argparse.Namespace:
         "--save-every",
         type=int,
         default=25,
-        help="Sauvegarde les CSV/JSON partiels tous les N monstres extraits.",
+        help="Force l'écriture disque (fsync) du journal monsters.jsonl tous les N monstres extraits.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprend depuis le journal monsters.jsonl sans ré-extraire les monstres déjà présents.",
+    )
+    parser.add_argument(
+        "--materialize",
+        action="store_true",
+        help="Reconstruit monsters.json et les CSV depuis le journal monsters.jsonl, sans crawl.",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Fusionne monsters.jsonl et les journaux des shards/workers (monsters.*.jsonl) puis matérialise.",
     )
     parser.add_argument(
         "--cache-only",
         action="store_true",
         help="N'effectue aucun téléchargement de fiche détail, extrait seulement le cache local.",
     )
+    add_worker_args(parser)
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    if args.materialize or args.merge:
+        journals = len(journal_paths())
+        monsters = merge_journals() if args.merge else read_checkpoint()
+        if not monsters:
+            print(f"⚠️ Journal vide ou absent: {MONSTERS_LOG}")
+            return
+        save_monsters(monsters)
+        if args.merge:
+            consolidate_journals(monsters)
+        source = f"{journals} journaux (fusionnés dans {MONSTERS_LOG})" if args.merge else MONSTERS_LOG
+        print(f"✅ {len(monsters)} monstres matérialisés depuis {source}")
+        return
+
+    coordinator = attach_from_args(args, FETCH_BASE_URL)
+    work_queue = coordinator if args.queue else None
+    label = shard_label(args.shard) if args.shard else (coordinator.worker if work_queue else None)
+
     monster_urls = args.monster_urls or DEFAULT_MONSTER_URLS
     monsters, failed_sources = scrape_monsters(
         pages=args.pages,
@@ -811,16 +1219,28 @@ def main() -> None:
         save_every=args.save_every,
         cache_only=args.cache_only,
         rate_limit_pause=args.rate_limit_pause,
+        resume=args.resume,
+        shard=args.shard,
+        work_queue=work_queue,
+        label=label,
+        fresh=args.fresh,
     )
-    save_failed_sources(failed_sources)
+    save_failed_sources(failed_sources, label)
 
     if not monsters:
         print("⚠️ Aucun monstre extrait. Vérifie le cache HTML ou le blocage réseau.")
         return
 
+    if label:
+        # Résultat partiel : monsters.json n'est écrit qu'à la fusion, une fois tous les workers terminés
+        print(f"✅ {len(monsters)} monstres extraits dans {worker_path(MONSTERS_LOG, label)} (fusion: --merge)")
+        return
     save_monsters(monsters)
     print(f"✅ {len(monsters)} monstres extraits")
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        run_stage("monsters_scraper", main)
+    finally:
+        METRICS.report("monsters_scraper")
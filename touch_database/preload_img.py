@@ -4,11 +4,19 @@ import os
 from urllib.parse import urlparse
 import time
 from pathlib import Path
+from cache_manager import mark_used
+from metrics import METRICS
+from profiling import run_stage
 
 def download_image(url, local_path):
     """Télécharge une image depuis une URL et la sauvegarde localement"""
     try:
-        response = requests.get(url, timeout=10)
+        METRICS.inc("requests", stage="images")
+        with METRICS.timer("request", stage="images"):
+            response = requests.get(url, timeout=10)
+        METRICS.inc("bytes", len(response.content), stage="images")
+        if response.status_code == 403:
+            METRICS.inc("http_403", stage="images")
         response.raise_for_status()
         
         # Créer le dossier parent s'il n'existe pas
@@ -61,14 +69,17 @@ def process_csv_with_images():
         
         # Télécharger l'image si elle n'existe pas déjà
         if not os.path.exists(local_path):
+            METRICS.inc("cache_misses", stage="images")
             if download_image(original_url, local_path):
                 successful_downloads += 1
-                print(f"✓ Téléchargé: {filename} ({index + 1}/{total_rows})")
             else:
+                METRICS.inc("errors", stage="images")
                 print(f"✗ Échec: {filename} ({index + 1}/{total_rows})")
         else:
+            METRICS.inc("cache_hits", stage="images")
+            mark_used(local_path)
             successful_downloads += 1
-            print(f"✓ Déjà existant: {filename} ({index + 1}/{total_rows})")
+        METRICS.progress(index + 1, total_rows, "images")
         
         # Mettre à jour la colonne local_url
         df.at[index, 'local_url'] = local_url
@@ -110,14 +121,17 @@ def process_jobs_images():
         
         # Télécharger l'image si elle n'existe pas déjà
         if not os.path.exists(local_path):
+            METRICS.inc("cache_misses", stage="images")
             if download_image(original_url, local_path):
                 successful_downloads += 1
-                print(f"✓ Téléchargé: {filename} ({index + 1}/{total_rows})")
             else:
+                METRICS.inc("errors", stage="images")
                 print(f"✗ Échec: {filename} ({index + 1}/{total_rows})")
         else:
+            METRICS.inc("cache_hits", stage="images")
+            mark_used(local_path)
             successful_downloads += 1
-            print(f"✓ Déjà existant: {filename} ({index + 1}/{total_rows})")
+        METRICS.progress(index + 1, total_rows, "images")
         
         # Mettre à jour la colonne local_url
         df.at[index, 'local_url'] = local_url
@@ -131,5 +145,8 @@ def process_jobs_images():
     print(f"CSV mis à jour sauvegardé dans: {output_path}")
 
 if __name__ == "__main__":
-    # process_csv_with_images() 
-    process_jobs_images()
\ No newline at end of file
+    try:
+        # run_stage("preload_img", process_csv_with_images)
+        run_stage("preload_img", process_jobs_images)
+    finally:
+        METRICS.report("preload_img")
\ No newline at end of file
@@ -0,0 +1,205 @@
+import cProfile
+import io
+import json
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from metrics import RUNS_DIR
+
+
+PROFILES_DIR = RUNS_DIR / "profiles"
+
+PROFILE_MODES = ["cprofile", "sample"]
+DEFAULT_SAMPLE_INTERVAL = 0.01
+TRACEMALLOC_FRAMES = 10
+TOP_ENTRIES = 40
+
+
+class StackSampler:
+    # Échantillonne la pile du thread principal depuis un thread annexe :
+    # aucun hook par appel, le coût ne dépend que de l'intervalle
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.target = threading.main_thread().ident
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def top(self, limit: int = TOP_ENTRIES) -> tuple[list[tuple[str, int]], list[tuple[str, int]]]:
+        own: Counter[str] = Counter()
+        inclusive: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            names = stack.split(";")
+            own[names[-1]] += count
+            for name in set(names):
+                inclusive[name] += count
+        return own.most_common(limit), inclusive.most_common(limit)
+
+    def write(self, run_dir: Path) -> None:
+        # Format "folded" : directement exploitable par flamegraph.pl ou speedscope
+        with (run_dir / "stacks.folded").open("w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        own, inclusive = self.top()
+        lines = [f"{self.samples} échantillons, intervalle {self.interval * 1000:.1f} ms", "", "Temps propre:"]
+        lines.extend(f"  {count / max(self.samples, 1):6.1%}  {name}" for name, count in own)
+        lines.extend(["", "Temps inclusif:"])
+        lines.extend(f"  {count / max(self.samples, 1):6.1%}  {name}" for name, count in inclusive)
+        (run_dir / "samples.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class ProfileSession:
+    def __init__(self, name: str, mode: str, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.name = name
+        self.mode = mode
+        self.interval = interval
+        self.stages: dict[str, dict[str, float]] = {}
+        self.run_dir = PROFILES_DIR / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    @contextmanager
+    def stage(self, name: str):
+        wall_started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+            entry["calls"] += 1
+            entry["wall_seconds"] += time.perf_counter() - wall_started
+            entry["cpu_seconds"] += time.process_time() - cpu_started
+
+    def run(self, func: Callable[[], object]) -> object:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        profiler = cProfile.Profile() if self.mode == "cprofile" else None
+        sampler = StackSampler(self.interval) if self.mode == "sample" else None
+        if profiler:
+            # tracemalloc ralentit fortement les allocations : réservé au mode cprofile
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            profiler.enable()
+        if sampler:
+            sampler.start()
+        try:
+            with self.stage(self.name):
+                return func()
+        finally:
+            if sampler:
+                sampler.stop()
+                sampler.write(self.run_dir)
+            if profiler:
+                profiler.disable()
+                self.write_cprofile(profiler)
+                self.write_allocations()
+            self.write_timing()
+            print(f"🔬 Profil {self.mode} sauvegardé: {self.run_dir}")
+
+    def write_cprofile(self, profiler: cProfile.Profile) -> None:
+        profiler.dump_stats(self.run_dir / "profile.pstats")
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer).strip_dirs()
+        stats.sort_stats("cumulative").print_stats(TOP_ENTRIES)
+        stats.sort_stats("tottime").print_stats(TOP_ENTRIES)
+        (self.run_dir / "profile.txt").write_text(buffer.getvalue(), encoding="utf-8")
+
+    def write_allocations(self) -> None:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        lines = [f"Mémoire tracée: {current / 1e6:.1f} Mo (pic {peak / 1e6:.1f} Mo)", ""]
+        for stat in snapshot.statistics("traceback")[:TOP_ENTRIES]:
+            lines.append(f"{stat.size / 1e6:.2f} Mo en {stat.count} blocs")
+            lines.extend(f"    {line}" for line in stat.traceback.format(limit=TRACEMALLOC_FRAMES))
+        (self.run_dir / "allocations.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self.stages[self.name]["tracemalloc_peak_mb"] = round(peak / 1e6, 3)
+
+    def write_timing(self) -> None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss est en Ko sous Linux, en octets sous macOS
+        peak_rss_mb = usage.ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else usage.ru_maxrss / 1024
+        timing = {
+            "name": self.name,
+            "mode": self.mode,
+            "argv": sys.argv,
+            "user_cpu_seconds": round(usage.ru_utime, 3),
+            "system_cpu_seconds": round(usage.ru_stime, 3),
+            "peak_rss_mb": round(peak_rss_mb, 1),
+            "stages": {
+                name: {key: round(value, 6) if isinstance(value, float) else value for key, value in entry.items()}
+                for name, entry in self.stages.items()
+            },
+        }
+        (self.run_dir / "timing.json").write_text(json.dumps(timing, ensure_ascii=False, indent=4), encoding="utf-8")
+
+
+ACTIVE_SESSION: ProfileSession | None = None
+
+
+@contextmanager
+def stage(name: str):
+    # Sans --profile, aucun coût : les sous-étapes ne sont mesurées que dans une session active
+    if ACTIVE_SESSION is None:
+        yield
+        return
+    with ACTIVE_SESSION.stage(name):
+        yield
+
+
+def pop_profile_options(argv: list[str]) -> tuple[str | None, float]:
+    # Retire --profile[=cprofile|sample] et --profile-interval=<s> avant l'argparse du script
+    mode = None
+    interval = DEFAULT_SAMPLE_INTERVAL
+    remaining = [argv[0]]
+    for argument in argv[1:]:
+        if argument == "--profile":
+            mode = "cprofile"
+        elif argument.startswith("--profile="):
+            mode = argument.split("=", 1)[1]
+            if mode not in PROFILE_MODES:
+                raise SystemExit(f"--profile: mode inconnu '{mode}' (choix: {', '.join(PROFILE_MODES)})")
+        elif argument.startswith("--profile-interval="):
+            interval = float(argument.split("=", 1)[1])
+        else:
+            remaining.append(argument)
+    argv[:] = remaining
+    return mode, interval
+
+
+def run_stage(name: str, func: Callable[[], object]) -> object:
+    global ACTIVE_SESSION
+    mode, interval = pop_profile_options(sys.argv)
+    if mode is None:
+        return func()
+    ACTIVE_SESSION = ProfileSession(name, mode, interval)
+    try:
+        return ACTIVE_SESSION.run(func)
+    finally:
+        ACTIVE_SESSION = None
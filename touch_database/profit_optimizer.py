@@ -0,0 +1,224 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, OptimizeResult, milp
+
+from craft_graph import CraftGraph
+from item_registry import ItemRegistry, normalize_job_name
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+JSON_DIR = ROOT_DIR / "data" / "json"
+
+# Sans profondeur de marché connue, un item vendu est plafonné : sinon tout craft rentable rend le LP non borné
+DEFAULT_MAX_SALES = 100
+MIP_GAP = 1e-3
+
+
+class ProfitOptimizer:
+    def __init__(self, graph: CraftGraph | None = None, registry: ItemRegistry | None = None):
+        self.graph = graph or CraftGraph()
+        self.registry = registry or ItemRegistry.load()
+        size = len(self.graph)
+        self.recipes = self.graph.recipes.astype(np.float64)
+        self.recipes.sum_duplicates()
+
+        # Métier et niveau de chaque recette, alignés sur les lignes du graphe (noms de jobs_list.csv,
+        # déjà normalisés par item_registry pour chaque ID)
+        with (JSON_DIR / "craft_by_id.json").open(encoding="utf-8") as file:
+            craft_by_id = json.load(file)
+        self.jobs: list[str | None] = [None] * size
+        self.job_levels = np.zeros(size, dtype=np.float64)
+        for item_id, recipe in craft_by_id.items():
+            if not recipe["has_recipe"] or not recipe["job"] or int(item_id) not in self.registry:
+                continue
+            row = self.graph.row(int(item_id))
+            self.jobs[row] = recipe["job"]
+            self.job_levels[row] = recipe["job_level"] or 0
+
+    def candidate_rows(self, job_caps: dict[str, int] | None) -> np.ndarray:
+        rows = np.flatnonzero(self.graph.craftable)
+        if job_caps is None:
+            return rows
+        # Config normalisée comme les recettes ("BoulangerNiveau" = "Boulanger") ; une famille ("Forgeur")
+        # couvre toutes ses spécialités ("Forgeur de Haches", ...)
+        caps_by_job = {normalize_job_name(job): level for job, level in job_caps.items()}
+        known = {job for job in self.jobs if job}
+        for job in caps_by_job:
+            if job not in known and not any(name.startswith(f"{job} ") for name in known):
+                print(f"⚠️ Métier inconnu ignoré: {job}")
+
+        def cap(job: str | None) -> int:
+            if not job:
+                return -1
+            if job in caps_by_job:
+                return caps_by_job[job]
+            family = next((name for name in caps_by_job if job.startswith(f"{name} ")), None)
+            return caps_by_job[family] if family else -1
+
+        caps = np.asarray([cap(self.jobs[row]) for row in rows])
+        return rows[self.job_levels[rows] <= caps]
+
+    def solve(
+        self,
+        crafted: np.ndarray,
+        sold: np.ndarray,
+        bought: np.ndarray,
+        prices: tuple[np.ndarray, np.ndarray, np.ndarray],
+        sales_cap: np.ndarray,
+        budget: float | None,
+        integral: bool,
+        time_limit: float,
+    ):
+        sell, buy, stock = prices
+        size = len(self.graph)
+        if not len(crafted) + len(sold) + len(bought):
+            # Support LP vide (rien de rentable) : HiGHS refuse un problème sans variable, le plan vide est optimal
+            return OptimizeResult(x=np.zeros(0), fun=0.0, message="Aucune opération rentable"), 0
+        # Variables [crafts | ventes | achats] ; bilan par item :
+        # stock + achats + crafts - ventes - consommation des recettes >= 0
+        identity = sparse.identity(size, format="csr")
+        balance = sparse.hstack(
+            [
+                identity[:, crafted] - self.recipes[crafted].T,
+                -identity[:, sold],
+                identity[:, bought],
+            ],
+            format="csr",
+        )
+        # Seuls les items touchés par une variable contraignent le problème
+        touched = np.flatnonzero(np.diff(balance.indptr) > 0)
+        constraints = [LinearConstraint(balance[touched], lb=-stock[touched], ub=np.inf)]
+
+        cost = np.concatenate([np.zeros(len(crafted)), -sell[sold], buy[bought]])
+        if budget is not None:
+            constraints.append(LinearConstraint(np.concatenate([np.zeros(len(crafted) + len(sold)), buy[bought]]), ub=budget))
+        upper = np.concatenate([np.full(len(crafted), np.inf), sales_cap, np.full(len(bought), np.inf)])
+        # Achats continus : à crafts et ventes entiers, l'achat optimal comble un manque entier
+        integrality = np.concatenate([np.full(len(crafted) + len(sold), 1 if integral else 0), np.zeros(len(bought))])
+        result = milp(
+            cost,
+            constraints=constraints,
+            bounds=Bounds(0, upper),
+            integrality=integrality,
+            options={"time_limit": time_limit, "mip_rel_gap": MIP_GAP},
+        )
+        if result.x is None:
+            raise ValueError(f"Optimisation impossible: {result.message}")
+        return result, len(touched)
+
+    def optimize(
+        self,
+        sell_prices: dict[int, float],
+        buy_prices: dict[int, float],
+        stock: dict[int, int],
+        job_caps: dict[str, int] | None = None,
+        max_sales: dict[int, int] | None = None,
+        budget: float | None = None,
+        integral: bool = True,
+        time_limit: float = 10.0,
+    ) -> dict:
+        prices = (self.graph.vector(sell_prices), self.graph.vector(buy_prices), self.graph.vector(stock))
+        crafted = self.candidate_rows(job_caps)
+        sold = np.flatnonzero(prices[0] > 0)
+        bought = np.flatnonzero(prices[1] > 0)
+        sales_cap = np.asarray(
+            [(max_sales or {}).get(int(self.graph.item_ids[row]), DEFAULT_MAX_SALES) for row in sold], dtype=np.float64
+        )
+
+        started = time.perf_counter()
+        result, constraints = self.solve(crafted, sold, bought, prices, sales_cap, budget, False, time_limit)
+        if integral:
+            # La relaxation LP (rapide) désigne les recettes et ventes utiles ; l'ILP ne porte que sur ce support,
+            # un sac à dos sur des milliers d'entiers avec budget ne converge pas en temps raisonnable sinon
+            crafts, sales = np.split(result.x[: len(crafted) + len(sold)], [len(crafted)])
+            crafted_support, sold_support = crafted[crafts > 1e-9], sold[sales > 1e-9]
+            cap_support = sales_cap[sales > 1e-9]
+            used = np.zeros(len(self.graph), dtype=bool)
+            used[self.recipes[crafted_support].indices] = True
+            used[sold_support] = True
+            bought_support = bought[used[bought]]
+            result, constraints = self.solve(
+                crafted_support, sold_support, bought_support, prices, cap_support, budget, True, time_limit
+            )
+            crafted, sold, bought = crafted_support, sold_support, bought_support
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        solution = np.round(result.x, 6)
+        crafts, sales, purchases = np.split(solution, [len(crafted), len(crafted) + len(sold)])
+
+        def nonzero(rows: np.ndarray, values: np.ndarray) -> dict[int, float]:
+            return {int(self.graph.item_ids[row]): float(value) for row, value in zip(rows, values) if value > 0}
+
+        return {
+            "profit": 0.0 - float(result.fun),
+            "status": result.message,
+            "variables": len(result.x),
+            "constraints": constraints,
+            "solve_ms": elapsed_ms,
+            "crafts": nonzero(crafted, crafts),
+            "sales": nonzero(sold, sales),
+            "purchases": nonzero(bought, purchases),
+        }
+
+
+def resolve_keys(values: dict, registry: ItemRegistry) -> dict[int, float]:
+    resolved: dict[int, float] = {}
+    for key, value in values.items():
+        item_id = int(key) if str(key).isdigit() else registry.resolve(key)
+        if item_id is None or item_id not in registry:
+            print(f"⚠️ Item inconnu ignoré: {key}")
+            continue
+        resolved[item_id] = float(value)
+    return resolved
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Optimise les quantités de craft journalières pour maximiser le profit (HiGHS).")
+    parser.add_argument(
+        "config",
+        type=Path,
+        help="JSON {sell, buy, stock, max_sales: {ID ou nom: valeur}, jobs: {métier: niveau}, budget}.",
+    )
+    parser.add_argument("--relaxed", action="store_true", help="Résout la relaxation continue (LP) au lieu de l'ILP.")
+    parser.add_argument("--time-limit", type=float, default=10.0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with args.config.open(encoding="utf-8") as file:
+        config = json.load(file)
+
+    optimizer = ProfitOptimizer()
+    registry = optimizer.registry
+    result = optimizer.optimize(
+        sell_prices=resolve_keys(config.get("sell", {}), registry),
+        buy_prices=resolve_keys(config.get("buy", {}), registry),
+        stock=resolve_keys(config.get("stock", {}), registry),
+        job_caps=config.get("jobs"),
+        max_sales={item_id: int(value) for item_id, value in resolve_keys(config.get("max_sales", {}), registry).items()},
+        budget=config.get("budget"),
+        integral=not args.relaxed,
+        time_limit=args.time_limit,
+    )
+
+    def name(item_id: int) -> str:
+        return registry.names[registry.row(item_id)]
+
+    print(f"💰 Profit: {result['profit']:,.0f} K ({result['status']})")
+    for title, key in [("Crafts", "crafts"), ("Ventes", "sales"), ("Achats", "purchases")]:
+        if result[key]:
+            print(f"{title}:")
+            for item_id, quantity in sorted(result[key].items(), key=lambda entry: -entry[1]):
+                print(f"  {quantity:>8g}x  {name(item_id)} ({item_id})")
+    print(f"⏱️ {result['variables']} variables, {result['constraints']} contraintes résolues en {result['solve_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    run_stage("profit_optimizer", main)
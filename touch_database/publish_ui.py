@@ -0,0 +1,146 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from profiling import run_stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+JSON_DIR = ROOT_DIR / "data" / "json"
+PUBLIC_DATA_DIR = ROOT_DIR.parent / "dofus-tracker-ui" / "public" / "data"
+MANIFEST_NAME = "manifest.json"
+# Flux de deltas de delta_feed.py, servi sous /data/deltas/ (patchs nommés par version, donc immuables)
+DELTAS_NAME = "deltas"
+
+# Fichiers lus par l'UI (src/lib/data-files.ts résout leur nom haché via le manifest)
+PUBLISHED_FILES = ["craft.json", "items_details.json", "images.json", "jobs_map.json", "facets.json", "search_index.json"]
+HASH_LENGTH = 12
+# Générations de manifest dont les fichiers restent servis : un client en cours de chargement ne casse pas
+KEEP_GENERATIONS = 2
+
+
+def write_atomic(path: Path, content: bytes) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def minified(path: Path) -> bytes:
+    with path.open(encoding="utf-8") as file:
+        data = json.load(file)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def publish_file(source: Path, target_dir: Path) -> dict:
+    content = minified(source)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    hashed_name = f"{source.stem}.{digest}{source.suffix}"
+    target = target_dir / hashed_name
+    variants = {"identity": len(content)}
+
+    # Nom = contenu : un fichier déjà publié est immuable, on ne le réécrit pas
+    if not target.exists():
+        # mtime=0 : archive gzip reproductible pour un même contenu
+        write_atomic(target.with_name(f"{hashed_name}.gz"), gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            write_atomic(target.with_name(f"{hashed_name}.br"), brotli.compress(content, quality=11))
+        write_atomic(target, content)
+    for encoding, suffix in [("gzip", ".gz"), ("br", ".br")]:
+        variant = target.with_name(f"{hashed_name}{suffix}")
+        if variant.exists():
+            variants[encoding] = variant.stat().st_size
+    return {"file": hashed_name, "sha256": digest, "sizes": variants}
+
+
+def load_manifest(target_dir: Path) -> dict | None:
+    path = target_dir / MANIFEST_NAME
+    if not path.exists():
+        return None
+    with path.open(encoding="utf-8") as file:
+        return json.load(file)
+
+
+def prune_old_files(target_dir: Path, manifests: list[dict]) -> int:
+    referenced = {entry["file"] for manifest in manifests for entry in manifest["files"].values()}
+    removed = 0
+    for name in PUBLISHED_FILES:
+        stem, suffix = name.rsplit(".", 1)
+        for path in target_dir.glob(f"{stem}.*.{suffix}*"):
+            base_name = path.name.removesuffix(".gz").removesuffix(".br")
+            if base_name not in referenced:
+                path.unlink()
+                removed += 1
+    return removed
+
+
+def publish_delta_feed(source_dir: Path, target_dir: Path) -> int:
+    manifest = load_manifest(source_dir)
+    if manifest is None:
+        return 0
+    target_dir.mkdir(parents=True, exist_ok=True)
+    patch_files = {patch["file"] for patch in manifest["patches"]}
+    copied = 0
+    for name in sorted(patch_files):
+        if not (target_dir / name).exists():
+            write_atomic(target_dir / name, minified(source_dir / name))
+            copied += 1
+    # Manifest des deltas en dernier : il ne référence jamais un patch pas encore copié
+    write_atomic(target_dir / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=4).encode("utf-8"))
+    for path in target_dir.glob("patch_*.json"):
+        if path.name not in patch_files:
+            path.unlink()
+    return copied
+
+
+def publish_ui_data(source_dir: Path = JSON_DIR, target_dir: Path = PUBLIC_DATA_DIR) -> dict:
+    target_dir.mkdir(parents=True, exist_ok=True)
+    if brotli is None:
+        print("⚠️ Module brotli absent: seuls les .gz sont générés (pip install brotli)")
+
+    previous = load_manifest(target_dir)
+    manifest = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": {name: publish_file(source_dir / name, target_dir) for name in PUBLISHED_FILES},
+    }
+    manifest["previous"] = previous["files"] if previous else None
+
+    # Le manifest est basculé en dernier, d'un seul os.replace : jamais de référence vers un fichier incomplet
+    write_atomic(target_dir / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=4).encode("utf-8"))
+    generations = [manifest] + ([previous] if previous else [])
+    removed = prune_old_files(target_dir, generations[:KEEP_GENERATIONS])
+    patches = publish_delta_feed(source_dir / DELTAS_NAME, target_dir / DELTAS_NAME)
+
+    print(f"💾 Données UI publiées: {target_dir / MANIFEST_NAME}")
+    for name, entry in manifest["files"].items():
+        sizes = ", ".join(f"{encoding} {size / 1024:.0f} Ko" for encoding, size in entry["sizes"].items())
+        print(f"  {name} -> {entry['file']} ({sizes})")
+    if patches:
+        print(f"  {DELTAS_NAME}/ -> {patches} nouveaux patchs")
+    if removed:
+        print(f"🧹 {removed} fichiers d'anciennes générations supprimés")
+    return manifest
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Publie les JSON minifiés, hachés et précompressés pour l'UI.")
+    parser.add_argument("--source", type=Path, default=JSON_DIR)
+    parser.add_argument("--target", type=Path, default=PUBLIC_DATA_DIR)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    publish_ui_data(args.source, args.target)
+
+
+if __name__ == "__main__":
+    run_stage("publish_ui", main)
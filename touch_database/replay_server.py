@@ -0,0 +1,201 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+
+ENCYCLOPEDIA_PREFIX = "/fr/mmorpg/encyclopedie"
+DETAIL_PATTERN = re.compile(rf"^{ENCYCLOPEDIA_PREFIX}/([^/]+)/(\d+)-([^/?#]+)$")
+LIST_PATTERN = re.compile(rf"^{ENCYCLOPEDIA_PREFIX}/([^/]+)/?$")
+
+# Reprend les marqueurs de monsters_scraper.is_blocked_html
+BLOCK_PAGE = """<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
+<html><head><title>ERROR: The request could not be satisfied</title></head>
+<body><h1>403 ERROR</h1><h2>The request could not be satisfied.</h2>
+<p>Request blocked. We can't connect to the server for this app or website at this time.</p>
+<p>Please verify that you're not a robot. JavaScript is disabled in your browser.</p>
+<hr><address>Generated by cloudfront (CloudFront)</address></body></html>
+"""
+
+
+def resolve_cached_page(cache_root: Path, path: str, query: dict[str, list[str]]) -> Path | None:
+    html_dir = cache_root / "html"
+    deep_html_dir = cache_root / "deep_html"
+    page = int(query.get("page", ["1"])[0] or 1)
+
+    match = DETAIL_PATTERN.match(path)
+    if match:
+        category, entity_id, slug = match.groups()
+        if category == "metiers":
+            # Même nommage que jobs_scraper.job_page_filename
+            suffix = f"_page_{page}" if page > 1 else ""
+            return html_dir / "jobs" / f"job_{entity_id}_{slug}{suffix}.html"
+        candidate = deep_html_dir / category / f"{entity_id}_{slug}.html"
+        if candidate.exists():
+            return candidate
+        # monsters_scraper met les fiches d'items conditionnés dans deep_html/items
+        return deep_html_dir / "items" / f"{entity_id}_{slug}.html"
+
+    match = LIST_PATTERN.match(path)
+    if match:
+        category = match.group(1)
+        if category == "metiers":
+            return html_dir / "jobs" / f"jobs_page_{page}.html"
+        return html_dir / category / f"{category}_page_{page}.html"
+    return None
+
+
+class FaultInjector:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 0,
+        block_rate: float = 0.0,
+        bandwidth: float = 0.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.block_rate = block_rate
+        self.bandwidth = bandwidth
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.stats = {"requests": 0, "served": 0, "not_found": 0, "forbidden": 0, "blocked": 0, "bytes": 0}
+
+    def decide(self) -> tuple[str, float]:
+        # Décision sous verrou : la séquence de fautes est déterministe pour une graine donnée
+        with self.lock:
+            self.requests += 1
+            self.stats["requests"] += 1
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.burst_every and self.burst_length:
+                position = (self.requests - 1) % (self.burst_every + self.burst_length)
+                if position >= self.burst_every:
+                    self.stats["forbidden"] += 1
+                    return "forbidden", delay
+            if self.block_rate and self.random.random() < self.block_rate:
+                self.stats["blocked"] += 1
+                return "blocked", delay
+            return "serve", delay
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += amount
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server_version = "DofusReplay/1.0"
+    faults: FaultInjector = FaultInjector()
+    cache_root: Path = ROOT_DIR
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path == "/__stats":
+            self.send_body(200, json.dumps(self.faults.stats).encode("utf-8"), "application/json")
+            return
+
+        decision, delay = self.faults.decide()
+        if delay:
+            time.sleep(delay)
+        if decision == "forbidden":
+            self.send_body(403, BLOCK_PAGE.encode("utf-8"))
+            return
+        if decision == "blocked":
+            self.send_body(200, BLOCK_PAGE.encode("utf-8"))
+            return
+
+        cached_page = resolve_cached_page(self.cache_root, parsed.path, parse_qs(parsed.query))
+        if not cached_page or not cached_page.exists():
+            self.faults.count("not_found")
+            self.send_body(404, b"Not Found")
+            return
+        self.faults.count("served")
+        self.send_body(200, cached_page.read_bytes())
+
+    def send_body(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.faults.count("bytes", len(body))
+        if not self.faults.bandwidth:
+            self.wfile.write(body)
+            return
+        # Débit plafonné par connexion : envoi par tranches de 100 ms
+        chunk_size = max(1, int(self.faults.bandwidth * 1024 / 10))
+        for start in range(0, len(body), chunk_size):
+            self.wfile.write(body[start : start + chunk_size])
+            self.wfile.flush()
+            time.sleep(0.1)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Rejoue le cache html/ et deep_html/ sous le schéma d'URL de l'encyclopédie. "
+            "Lancer les scrapers avec DOFUS_TOUCH_BASE_URL=http://127.0.0.1:<port>."
+        )
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--cache-root",
+        type=Path,
+        default=ROOT_DIR,
+        help="Dossier contenant html/ et deep_html/ à rejouer (copie figée pour ne pas servir le cache en cours d'écriture).",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence ajoutée par requête, en secondes.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latence aléatoire supplémentaire maximale, en secondes.")
+    parser.add_argument("--burst-every", type=int, default=0, help="Nombre de requêtes servies entre deux rafales de 403.")
+    parser.add_argument("--burst-length", type=int, default=0, help="Nombre de 403 consécutifs par rafale.")
+    parser.add_argument(
+        "--block-rate",
+        type=float,
+        default=0.0,
+        help="Probabilité de servir une page de blocage CloudFront avec un statut 200.",
+    )
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Débit maximal par connexion en Ko/s (0 = illimité).")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    ReplayHandler.faults = FaultInjector(
+        latency=args.latency,
+        jitter=args.jitter,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        block_rate=args.block_rate,
+        bandwidth=args.bandwidth,
+        seed=args.seed,
+    )
+    ReplayHandler.cache_root = args.cache_root
+    server = ThreadingHTTPServer((args.host, args.port), ReplayHandler)
+    print(f"🔁 Replay du cache sur http://{args.host}:{args.port} (stats: /__stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Arrêt du serveur de replay")
+    finally:
+        server.server_close()
+        print(f"📊 {json.dumps(ReplayHandler.faults.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import bisect
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from monsters_scraper import clean_text, normalize_label
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+SEARCH_INDEX_PATH = JSON_DIR / "search_index.json"
+
+KINDS = ["item", "monster", "job"]
+PREFIX_BONUS = 1.0
+WORD_PREFIX_BONUS = 0.5
+
+
+def fold_name(text: str) -> str:
+    # Mêmes règles d'accents que monsters_scraper, puis ponctuation ignorée :
+    # "Izusu, la pelle Endormie" et "Izusu la pelle Endormie" partagent la même clé.
+    # Les étoiles de rareté restent un mot à part : "Sardine à l'huile **" et "****" sont deux items
+    folded = normalize_label(clean_text(text))
+    return clean_text(re.sub(r"[^0-9a-z*]+", " ", re.sub(r"\*+", r" \g<0> ", folded)))
+
+
+def trigrams(folded: str) -> set[str]:
+    padded = f" {folded} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def collect_names() -> list[tuple[str, str]]:
+    names = []
+    for filename in ["items_details.json", "craft.json"]:
+        path = JSON_DIR / filename
+        if path.exists():
+            with path.open(encoding="utf-8") as file:
+                names.extend(("item", name) for name in json.load(file))
+
+    jobs_map_path = JSON_DIR / "jobs_map.json"
+    if jobs_map_path.exists():
+        with jobs_map_path.open(encoding="utf-8") as file:
+            for job, items in json.load(file).items():
+                names.append(("job", job))
+                names.extend(("item", item) for item in items)
+
+    monsters_csv = DATA_DIR / "monstres_data.csv"
+    if monsters_csv.exists():
+        names.extend(("monster", name) for name in pd.read_csv(monsters_csv)["name"].dropna())
+    return names
+
+
+def build_search_index(names: list[tuple[str, str]]) -> dict:
+    documents: dict[tuple[str, str], dict] = {}
+    for kind, name in names:
+        folded = fold_name(name)
+        if not folded:
+            continue
+        document = documents.setdefault((kind, folded), {"name": name, "aliases": []})
+        if name != document["name"] and name not in document["aliases"]:
+            document["aliases"].append(name)
+
+    keys = sorted(documents, key=lambda key: (key[1], KINDS.index(key[0])))
+    postings: dict[str, list[int]] = {}
+    for doc_id, (_, folded) in enumerate(keys):
+        for gram in trigrams(folded):
+            postings.setdefault(gram, []).append(doc_id)
+
+    # Index de préfixes : chaque mot trié, pointant vers son document
+    words = sorted({(word, doc_id) for doc_id, (_, folded) in enumerate(keys) for word in folded.split(" ")})
+
+    return {
+        "version": 1,
+        "kinds": KINDS,
+        "docs": {
+            "names": [documents[key]["name"] for key in keys],
+            "folded": [key[1] for key in keys],
+            "kinds": [KINDS.index(key[0]) for key in keys],
+            "aliases": {str(doc_id): documents[key]["aliases"] for doc_id, key in enumerate(keys) if documents[key]["aliases"]},
+        },
+        # Listes de postings encodées en deltas pour garder le JSON client compact
+        "trigrams": {gram: np.diff(ids, prepend=0).tolist() for gram, ids in sorted(postings.items())},
+        "words": {"terms": [word for word, _ in words], "docs": [doc_id for _, doc_id in words]},
+    }
+
+
+def save_search_index(index: dict) -> None:
+    JSON_DIR.mkdir(parents=True, exist_ok=True)
+    with SEARCH_INDEX_PATH.open("w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False, separators=(",", ":"))
+    print(f"💾 Index de recherche sauvegardé: {SEARCH_INDEX_PATH} ({len(index['docs']['names'])} noms)")
+
+
+class SearchIndex:
+    def __init__(self, index: dict):
+        self.kinds = index["kinds"]
+        docs = index["docs"]
+        self.names = docs["names"]
+        self.folded = docs["folded"]
+        self.doc_kinds = np.asarray(docs["kinds"], dtype=np.int8)
+        self.aliases = {int(doc_id): aliases for doc_id, aliases in docs["aliases"].items()}
+        self.postings = {gram: np.cumsum(deltas, dtype=np.int32) for gram, deltas in index["trigrams"].items()}
+        self.word_terms = index["words"]["terms"]
+        self.word_docs = np.asarray(index["words"]["docs"], dtype=np.int32)
+        self.gram_counts = np.asarray([len(trigrams(folded)) for folded in self.folded], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: Path = SEARCH_INDEX_PATH) -> "SearchIndex":
+        with path.open(encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    @staticmethod
+    def prefix_range(terms: list[str], prefix: str) -> tuple[int, int]:
+        start = bisect.bisect_left(terms, prefix)
+        return start, bisect.bisect_left(terms, prefix + "\uffff", lo=start)
+
+    def search(self, query: str, limit: int = 10, kind: str | None = None) -> list[dict]:
+        folded_query = fold_name(query)
+        if not folded_query:
+            return []
+
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        query_grams = trigrams(folded_query)
+        matched = [self.postings[gram] for gram in query_grams if gram in self.postings]
+        if matched:
+            shared = np.bincount(np.concatenate(matched), minlength=len(self.names)).astype(np.float32)
+            scores += shared / (self.gram_counts + len(query_grams) - shared)
+
+        # Les documents sont triés par nom replié : un préfixe complet est une plage contiguë
+        start, end = self.prefix_range(self.word_terms, folded_query.split(" ")[-1])
+        scores[np.unique(self.word_docs[start:end])] += WORD_PREFIX_BONUS
+        start, end = self.prefix_range(self.folded, folded_query)
+        scores[start:end] += PREFIX_BONUS
+
+        if kind is not None:
+            scores[self.doc_kinds != self.kinds.index(kind)] = 0
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        ranked = sorted(candidates, key=lambda doc_id: (-scores[doc_id], len(self.folded[doc_id])))
+        return [
+            {
+                "name": self.names[doc_id],
+                "kind": self.kinds[self.doc_kinds[doc_id]],
+                "score": round(float(scores[doc_id]), 4),
+                "aliases": self.aliases.get(int(doc_id), []),
+            }
+            for doc_id in ranked
+        ]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge l'index de recherche floue.")
+    parser.add_argument("--query", help="Recherche floue sur les noms d'items, monstres et métiers.")
+    parser.add_argument("--kind", choices=KINDS)
+    parser.add_argument("--limit", type=int, default=10)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.query:
+        save_search_index(build_search_index(collect_names()))
+        return
+
+    index = SearchIndex.load()
+    started = time.perf_counter()
+    results = index.search(args.query, limit=args.limit, kind=args.kind)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for result in results:
+        print(f"{result['score']:.3f} [{result['kind']}] {result['name']}")
+    print(f"⏱️ {len(results)} résultats en {elapsed_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    run_stage("search_index", main)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les scripts de touch_database s'importent à plat (from monsters_scraper import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+import api_server
+from api_server import ApiServer
+
+
+def fake_route(data, path, query):
+    if path == "/bom":
+        raise ValueError("Recettes cycliques")
+    if path == "/crash":
+        raise KeyError("item")
+    return {"path": path}
+
+
+async def fetch(api: ApiServer, target: str) -> bytes:
+    server = await asyncio.start_server(api.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+    return raw
+
+
+def test_route_errors_get_a_response(monkeypatch):
+    monkeypatch.setattr(api_server, "route", fake_route)
+    api = ApiServer(None)
+    assert asyncio.run(fetch(api, "/bom")).startswith(b"HTTP/1.1 400 ")
+    assert asyncio.run(fetch(api, "/crash")).startswith(b"HTTP/1.1 500 ")
+    assert asyncio.run(fetch(api, "/items")).startswith(b"HTTP/1.1 200 ")
+    # Les 500 ne sont pas mises en cache, les 400 oui
+    assert "/crash" not in api.cache and "/bom" in api.cache
+
+
+def test_non_positive_limit_is_rejected():
+    # Les index ne doivent même pas être interrogés
+    data = SimpleNamespace(monsters=SimpleNamespace(weakest_to=None, nearest=None), search_index=SimpleNamespace(search=None))
+    for target in ["/monsters/weakest?element=fire&limit=-5", "/monsters/nearest?limit=0", "/search?q=bouftou&limit=0"]:
+        assert ApiServer(data).respond(target).status == 400
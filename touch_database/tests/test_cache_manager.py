@@ -0,0 +1,16 @@
+import time
+
+from cache_manager import plan_gc, scan_caches
+
+
+def test_gc_never_sees_the_item_conditions_database(tmp_path):
+    deep_html = tmp_path / "deep_html"
+    (deep_html / "armes").mkdir(parents=True)
+    (deep_html / "armes" / "44_epee.html").write_text("<html></html>", encoding="utf-8")
+    for name in ["item_conditions.sqlite", "item_conditions.sqlite-wal", "item_conditions.sqlite-shm"]:
+        (deep_html / name).write_bytes(b"\0" * 4096)
+
+    entries = scan_caches({"deep_html": deep_html})
+    assert [entry.path.name for entry in entries] == ["44_epee.html"]
+    evictions, _ = plan_gc(entries, max_bytes=0, max_age=0, now=time.time() + 86400)
+    assert {entry.path.name for entry, _ in evictions} <= {"44_epee.html"}
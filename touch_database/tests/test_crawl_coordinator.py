@@ -0,0 +1,17 @@
+from crawl_coordinator import Coordinator
+
+
+def test_heartbeat_keeps_tasks_and_complete_reports_lost_leases(tmp_path):
+    path = tmp_path / "crawl.sqlite"
+    first, second = Coordinator(path, "a"), Coordinator(path, "b")
+    first.enqueue("deep/armes", [("1", {}), ("2", {})])
+    assert [key for key, _ in first.claim("deep/armes", lease=0.0)] == ["1", "2"]
+
+    # Bail renouvelé pour "1" seulement : "2" expiré est repris par l'autre worker
+    assert first.heartbeat("deep/armes", ["1"]) == []
+    assert [key for key, _ in second.claim("deep/armes")] == ["2"]
+    assert first.heartbeat("deep/armes", ["2"]) == ["2"]
+
+    assert first.complete("deep/armes", ["1", "2"]) == ["2"]
+    assert second.complete("deep/armes", ["2"]) == []
+    assert first.status()["deep/armes"] == {"done": 2}
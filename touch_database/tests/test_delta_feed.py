@@ -0,0 +1,23 @@
+import delta_feed
+from delta_feed import diff_dataset, drops_snapshot
+
+
+def write_drops(path, normal_rate):
+    path.write_text(
+        "monster_id,monster_name,drop_kind,item_id,probability\n"
+        f"31,Bouftou,normal,385,{normal_rate}\n"
+        "31,Bouftou,conditioned,385,1.5\n",
+        encoding="utf-8",
+    )
+
+
+def test_normal_and_conditioned_drops_of_one_item_stay_separate(tmp_path, monkeypatch):
+    csv_path = tmp_path / "monster_drops.csv"
+    monkeypatch.setattr(delta_feed, "DROPS_CSV", csv_path)
+    write_drops(csv_path, 40.0)
+    old = drops_snapshot()
+    assert old["31"]["drops"] == {"normal:385": 40.0, "conditioned:385": 1.5}
+
+    write_drops(csv_path, 35.0)
+    delta = diff_dataset(old, drops_snapshot(), depth=1)
+    assert delta["changed"] == [[["31"], {"name": "Bouftou", "drops": {"normal:385": 35.0, "conditioned:385": 1.5}}]]
@@ -0,0 +1,32 @@
+from item_registry import ItemRegistry
+
+
+def make_registry() -> ItemRegistry:
+    names = ["Sardine à l'huile **", "Sardine à l'huile ***", "Petit Parchemin de Force", "Petit Parchemin de Force"]
+    return ItemRegistry(
+        {
+            "items": {
+                "ids": [1825, 1826, 683, 18289],
+                "names": names,
+                "slugs": [None] * 4,
+                "categories": ["consommables"] * 4,
+                "types": [None] * 4,
+                "levels": [None] * 4,
+                "image_ids": [None] * 4,
+            },
+            "monsters": {"ids": [], "names": [], "levels": []},
+            "jobs": {"ids": [], "names": []},
+        }
+    )
+
+
+def test_resolve_keeps_rarity_variants_apart():
+    registry = make_registry()
+    assert registry.resolve("Sardine à l'huile **") == 1825
+    assert registry.resolve("Sardine à l'huile  ***", "consommables") == 1826
+
+
+def test_homonyms_do_not_resolve_to_the_smallest_id():
+    registry = make_registry()
+    assert registry.resolve("Petit Parchemin de Force") is None
+    assert registry.candidates("Petit Parchemin de Force") == [683, 18289]
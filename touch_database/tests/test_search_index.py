@@ -0,0 +1,18 @@
+from search_index import SearchIndex, build_search_index
+
+
+def test_rarity_stars_stay_separate_documents():
+    index = build_search_index(
+        [
+            ("item", "Sardine à l'huile **"),
+            ("item", "Sardine à l'huile ****"),
+            ("item", "Izusu, la pelle Endormie"),
+            ("item", "Izusu la pelle Endormie"),
+        ]
+    )
+    names = index["docs"]["names"]
+    assert "Sardine à l'huile **" in names and "Sardine à l'huile ****" in names
+    # Une différence de ponctuation seule reste un alias du même document
+    assert len(names) == 3
+    results = SearchIndex(index).search("sardine a l'huile ****", limit=1)
+    assert results[0]["name"] == "Sardine à l'huile ****"
@@ -0,0 +1,40 @@
+from zone_index import ZoneIndex
+
+
+def make_index() -> ZoneIndex:
+    # Zone 0 : deux monstres dont un qui drop ; zone 1 : un monstre sans aucun drop normal
+    return ZoneIndex(
+        {
+            "zones": ["Plaine", "Terre de Nowel"],
+            "monsters": {
+                "ids": [1, 2, 3],
+                "names": ["Tofu", "Bouftou", "Bonhomme"],
+                "levels": [1, 5, 30],
+                "zone_indptr": [0, 1, 2, 3],
+                "zone_indices": [0, 0, 1],
+            },
+            "resources": {"names": [], "jobs": [], "levels": []},
+            "zone_monsters": {"indptr": [0, 2, 3], "indices": [0, 1, 2]},
+            "zone_resources": {"indptr": [0, 0, 0], "indices": []},
+            "drops": {
+                "item_ids": [100],
+                "item_names": ["Plume"],
+                "indptr": [0, 1],
+                "monsters": [0],
+                "probabilities": [0.5],
+            },
+        }
+    )
+
+
+def test_zone_expected_drops_averages_over_zone_monsters():
+    index = make_index()
+    assert index.zone_expected_drops(index.zone_row("Plaine")) == {100: 0.25}
+
+
+def test_zone_without_drops_is_empty():
+    index = make_index()
+    assert index.zone_expected_drops(index.zone_row("Terre de Nowel")) == {}
+    summary = index.zone_summary("Terre de Nowel")
+    assert summary["expected_drops_per_fight"] == []
+    assert [monster["monster_id"] for monster in summary["monsters"]] == [3]
@@ -0,0 +1,335 @@
+import argparse
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from monsters_scraper import clean_text, normalize_label, parse_first_int
+from profiling import run_stage
+
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_DIR = ROOT_DIR / "data"
+JSON_DIR = DATA_DIR / "json"
+ZONE_INDEX_PATH = JSON_DIR / "zones.json"
+
+MONSTERS_CSV = DATA_DIR / "monstres_data.csv"
+DROPS_CSV = DATA_DIR / "monster_drops.csv"
+JOBS_ITEMS_CSV = DATA_DIR / "jobs_items_mapping.csv"
+
+
+def split_zones(text) -> list[str]:
+    if not isinstance(text, str):
+        return []
+    # monstres_data.csv joint les zones par " | ", jobs_items_mapping.csv par des virgules
+    zones = [clean_text(zone) for zone in re.split(r"\s*[|,]\s*", text)]
+    return [zone for zone in zones if zone]
+
+
+def zone_key(zone: str) -> str:
+    return normalize_label(clean_text(zone))
+
+
+def to_csr(groups: list[list[int]]) -> tuple[list[int], list[int]]:
+    indptr = [0]
+    indices = []
+    for group in groups:
+        indices.extend(group)
+        indptr.append(len(indices))
+    return indptr, indices
+
+
+def build_zone_index() -> dict:
+    monsters_df = pd.read_csv(MONSTERS_CSV)
+    drops_df = pd.read_csv(DROPS_CSV)
+    jobs_df = pd.read_csv(JOBS_ITEMS_CSV) if JOBS_ITEMS_CSV.exists() else pd.DataFrame()
+
+    zone_names: list[str] = []
+    zone_ids: dict[str, int] = {}
+
+    def zone_id(zone: str) -> int:
+        key = zone_key(zone)
+        if key not in zone_ids:
+            zone_ids[key] = len(zone_names)
+            zone_names.append(zone)
+        return zone_ids[key]
+
+    monster_ids = monsters_df["monster_id"].astype(int).tolist()
+    monster_names = monsters_df["name"].fillna("").tolist()
+    monster_levels = monsters_df["level"].fillna(-1).astype(int).tolist()
+    monster_zones = [[zone_id(zone) for zone in split_zones(zones)] for zones in monsters_df["zones"].tolist()]
+    monster_rows = {monster_id: row for row, monster_id in enumerate(monster_ids)}
+
+    # Ressources récoltables : seules les lignes "resource" portent des zones
+    harvest_names: list[str] = []
+    harvest_jobs: list[str] = []
+    harvest_levels: list[int] = []
+    harvest_zones: list[list[int]] = []
+    if not jobs_df.empty and "zones" not in jobs_df.columns:
+        # jobs_scraper n'extrait pas (encore) les zones de récolte : l'index ne contient alors que les monstres
+        print(f"⚠️ Pas de colonne zones dans {JOBS_ITEMS_CSV.name}: ressources récoltables non indexées")
+    if not jobs_df.empty and "zones" in jobs_df.columns:
+        resources_df = jobs_df[jobs_df["item_type"] == "resource"] if "item_type" in jobs_df.columns else jobs_df
+        for _, row in resources_df.iterrows():
+            zones = [zone_id(zone) for zone in split_zones(row["zones"])]
+            if not zones:
+                continue
+            harvest_names.append(row["item_name"])
+            harvest_jobs.append(row["job_name"])
+            harvest_levels.append(parse_first_int(str(row.get("level_required", ""))) or 0)
+            harvest_zones.append(zones)
+
+    # Drops normaux uniquement : les drops conditionnés ne sont pas garantis en combat standard
+    normal_drops = drops_df[drops_df["drop_kind"] == "normal"]
+    normal_drops = normal_drops[normal_drops["monster_id"].isin(monster_rows)]
+    item_ids: list[int] = []
+    item_names: list[str] = []
+    item_rows: dict[int, int] = {}
+    item_drops: list[list[int]] = []
+    item_probabilities: list[list[float]] = []
+    for row in normal_drops.itertuples(index=False):
+        item_id = int(row.item_id)
+        if item_id not in item_rows:
+            item_rows[item_id] = len(item_ids)
+            item_ids.append(item_id)
+            item_names.append(row.item_name)
+            item_drops.append([])
+            item_probabilities.append([])
+        item_row = item_rows[item_id]
+        item_drops[item_row].append(monster_rows[int(row.monster_id)])
+        item_probabilities[item_row].append(0.0 if pd.isna(row.probability) else float(row.probability) / 100)
+
+    zone_monsters: list[list[int]] = [[] for _ in zone_names]
+    for monster_row, zones in enumerate(monster_zones):
+        for zone in zones:
+            zone_monsters[zone].append(monster_row)
+    zone_resources: list[list[int]] = [[] for _ in zone_names]
+    for resource_row, zones in enumerate(harvest_zones):
+        for zone in zones:
+            zone_resources[zone].append(resource_row)
+
+    monster_zone_indptr, monster_zone_indices = to_csr(monster_zones)
+    zone_monster_indptr, zone_monster_indices = to_csr(zone_monsters)
+    zone_resource_indptr, zone_resource_indices = to_csr(zone_resources)
+    drop_indptr, drop_monsters = to_csr(item_drops)
+    drop_probabilities = [probability for probabilities in item_probabilities for probability in probabilities]
+
+    return {
+        "zones": zone_names,
+        "monsters": {
+            "ids": monster_ids,
+            "names": monster_names,
+            "levels": monster_levels,
+            "zone_indptr": monster_zone_indptr,
+            "zone_indices": monster_zone_indices,
+        },
+        "resources": {
+            "names": harvest_names,
+            "jobs": harvest_jobs,
+            "levels": harvest_levels,
+        },
+        "zone_monsters": {"indptr": zone_monster_indptr, "indices": zone_monster_indices},
+        "zone_resources": {"indptr": zone_resource_indptr, "indices": zone_resource_indices},
+        "drops": {
+            "item_ids": item_ids,
+            "item_names": item_names,
+            "indptr": drop_indptr,
+            "monsters": drop_monsters,
+            "probabilities": drop_probabilities,
+        },
+    }
+
+
+def save_zone_index(index: dict) -> None:
+    JSON_DIR.mkdir(parents=True, exist_ok=True)
+    with ZONE_INDEX_PATH.open("w", encoding="utf-8") as file:
+        json.dump(index, file, ensure_ascii=False, separators=(",", ":"))
+    print(f"💾 Index des zones sauvegardé: {ZONE_INDEX_PATH} ({len(index['zones'])} zones)")
+
+
+class ZoneIndex:
+    def __init__(self, index: dict):
+        self.zones = index["zones"]
+        self.zone_rows = {zone_key(zone): row for row, zone in enumerate(self.zones)}
+
+        monsters = index["monsters"]
+        self.monster_ids = np.asarray(monsters["ids"], dtype=np.int64)
+        self.monster_names = monsters["names"]
+        self.monster_levels = np.asarray(monsters["levels"], dtype=np.int32)
+        self.monster_zone_indptr = np.asarray(monsters["zone_indptr"], dtype=np.int64)
+        self.monster_zone_indices = np.asarray(monsters["zone_indices"], dtype=np.int64)
+
+        resources = index["resources"]
+        self.resource_names = resources["names"]
+        self.resource_jobs = resources["jobs"]
+        self.resource_levels = np.asarray(resources["levels"], dtype=np.int32)
+        self.resource_rows: dict[str, list[int]] = {}
+        for row, name in enumerate(self.resource_names):
+            self.resource_rows.setdefault(zone_key(name), []).append(row)
+
+        self.zone_monster_indptr = np.asarray(index["zone_monsters"]["indptr"], dtype=np.int64)
+        self.zone_monster_indices = np.asarray(index["zone_monsters"]["indices"], dtype=np.int64)
+        self.zone_resource_indptr = np.asarray(index["zone_resources"]["indptr"], dtype=np.int64)
+        self.zone_resource_indices = np.asarray(index["zone_resources"]["indices"], dtype=np.int64)
+        self.resource_zone_sets = [set() for _ in self.resource_names]
+        for zone_row in range(len(self.zones)):
+            for resource_row in self.zone_resources_rows(zone_row):
+                self.resource_zone_sets[resource_row].add(zone_row)
+
+        drops = index["drops"]
+        self.item_ids = drops["item_ids"]
+        self.item_names = drops["item_names"]
+        self.item_rows = {str(item_id): row for row, item_id in enumerate(self.item_ids)}
+        for row, name in enumerate(self.item_names):
+            self.item_rows.setdefault(zone_key(name), row)
+        self.drop_indptr = np.asarray(drops["indptr"], dtype=np.int64)
+        self.drop_monsters = np.asarray(drops["monsters"], dtype=np.int64)
+        self.drop_probabilities = np.asarray(drops["probabilities"], dtype=np.float64)
+
+        # Nombre de monstres par zone, cumulé par niveau pour les requêtes "niveau <= L"
+        self.zone_sorted_levels = [
+            np.sort(self.monster_levels[self.zone_monsters_rows(zone_row)]) for zone_row in range(len(self.zones))
+        ]
+
+    @classmethod
+    def load(cls, path: Path = ZONE_INDEX_PATH) -> "ZoneIndex":
+        with path.open(encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def zone_monsters_rows(self, zone_row: int) -> np.ndarray:
+        return self.zone_monster_indices[self.zone_monster_indptr[zone_row] : self.zone_monster_indptr[zone_row + 1]]
+
+    def zone_resources_rows(self, zone_row: int) -> np.ndarray:
+        return self.zone_resource_indices[self.zone_resource_indptr[zone_row] : self.zone_resource_indptr[zone_row + 1]]
+
+    def zone_row(self, zone: str) -> int:
+        row = self.zone_rows.get(zone_key(zone))
+        if row is None:
+            raise KeyError(f"Zone inconnue: {zone}")
+        return row
+
+    def item_drop_slice(self, resource: str | int) -> tuple[np.ndarray, np.ndarray]:
+        row = self.item_rows.get(str(resource)) if str(resource).isdigit() else self.item_rows.get(zone_key(str(resource)))
+        if row is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        start, end = self.drop_indptr[row], self.drop_indptr[row + 1]
+        return self.drop_monsters[start:end], self.drop_probabilities[start:end]
+
+    def zone_expected_drops(self, zone_row: int, max_level: int | None = None) -> dict[int, float]:
+        monster_rows = self.zone_monsters_rows(zone_row)
+        if max_level is not None:
+            monster_rows = monster_rows[self.monster_levels[monster_rows] <= max_level]
+        if not len(monster_rows):
+            return {}
+        in_zone = np.zeros(len(self.monster_ids), dtype=bool)
+        in_zone[monster_rows] = True
+        mask = in_zone[self.drop_monsters]
+        if not mask.any():
+            return {}
+        item_rows = np.searchsorted(self.drop_indptr, np.flatnonzero(mask), side="right") - 1
+        totals = np.bincount(item_rows, weights=self.drop_probabilities[mask], minlength=len(self.item_ids)).astype(
+            np.float64
+        )
+        # Un combat tire ses monstres parmi ceux de la zone : espérance par monstre affronté
+        totals /= len(monster_rows)
+        return {self.item_ids[row]: float(totals[row]) for row in np.flatnonzero(totals)}
+
+    def zone_summary(self, zone: str, max_level: int | None = None) -> dict:
+        zone_row = self.zone_row(zone)
+        monster_rows = self.zone_monsters_rows(zone_row)
+        expected = self.zone_expected_drops(zone_row, max_level)
+        return {
+            "zone": self.zones[zone_row],
+            "monsters": [
+                {
+                    "monster_id": int(self.monster_ids[row]),
+                    "name": self.monster_names[row],
+                    "level": int(self.monster_levels[row]),
+                }
+                for row in monster_rows
+                if max_level is None or self.monster_levels[row] <= max_level
+            ],
+            "resources": [
+                {
+                    "name": self.resource_names[row],
+                    "job": self.resource_jobs[row],
+                    "level": int(self.resource_levels[row]),
+                }
+                for row in self.zone_resources_rows(zone_row)
+                if max_level is None or self.resource_levels[row] <= max_level
+            ],
+            "expected_drops_per_fight": sorted(
+                (
+                    {"item_id": item_id, "item_name": self.item_names[self.item_rows[str(item_id)]], "expected": value}
+                    for item_id, value in expected.items()
+                ),
+                key=lambda drop: drop["expected"],
+                reverse=True,
+            ),
+        }
+
+    def best_zones_for_resource(self, resource: str | int, level: int | None = None, limit: int = 10) -> list[dict]:
+        monster_rows, probabilities = self.item_drop_slice(resource)
+        if level is not None:
+            accessible = self.monster_levels[monster_rows] <= level
+            monster_rows, probabilities = monster_rows[accessible], probabilities[accessible]
+
+        # Répartit la probabilité de chaque monstre sur ses zones, puis normalise par la taille de zone
+        starts = self.monster_zone_indptr[monster_rows]
+        counts = self.monster_zone_indptr[monster_rows + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        zone_rows = self.monster_zone_indices[positions]
+        totals = np.bincount(zone_rows, weights=np.repeat(probabilities, counts), minlength=len(self.zones))
+        candidates = np.flatnonzero(totals)
+        scores = {}
+        for zone_row in candidates:
+            sorted_levels = self.zone_sorted_levels[zone_row]
+            monsters_count = len(sorted_levels) if level is None else np.searchsorted(sorted_levels, level, side="right")
+            scores[int(zone_row)] = float(totals[zone_row] / max(monsters_count, 1))
+
+        harvest_zones = set()
+        if not str(resource).isdigit():
+            for resource_row in self.resource_rows.get(zone_key(str(resource)), []):
+                if level is None or self.resource_levels[resource_row] <= level:
+                    harvest_zones |= self.resource_zone_sets[resource_row]
+
+        results = [
+            {
+                "zone": self.zones[zone_row],
+                "expected_per_fight": scores.get(zone_row, 0.0),
+                "harvestable": zone_row in harvest_zones,
+            }
+            for zone_row in set(scores) | harvest_zones
+        ]
+        results.sort(key=lambda result: (result["harvestable"], result["expected_per_fight"]), reverse=True)
+        return results[:limit]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Construit et interroge l'index des zones de farm.")
+    parser.add_argument("--zone", help="Affiche les monstres, ressources et drops attendus d'une zone.")
+    parser.add_argument("--resource", help="Nom ou ID de ressource à farmer.")
+    parser.add_argument("--level", type=int, help="Niveau maximum des monstres/ressources accessibles.")
+    parser.add_argument("--limit", type=int, default=10)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not args.zone and not args.resource:
+        save_zone_index(build_zone_index())
+        return
+
+    index = ZoneIndex.load()
+    if args.zone:
+        print(json.dumps(index.zone_summary(args.zone, args.level), ensure_ascii=False, indent=4))
+    if args.resource:
+        for result in index.best_zones_for_resource(args.resource, args.level, args.limit):
+            harvest = " 🌾" if result["harvestable"] else ""
+            print(f"{result['zone']}: {result['expected_per_fight']:.3f} / combat{harvest}")
+
+
+if __name__ == "__main__":
+    run_stage("zone_index", main)